@@ -11,6 +11,10 @@ from app.models.painting import Painting
 from app.models.user_session import UserSession
 from app.models.feedback import Feedback
 from app.models.user import User
+from app.models.tag import Tag
+from app.models.media_file import MediaFile
+from app.models.notification import Notification
+from app.models.catalog_import import CatalogImport
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
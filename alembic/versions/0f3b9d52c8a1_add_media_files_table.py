@@ -0,0 +1,45 @@
+"""Add media files reference counting table
+
+Revision ID: 0f3b9d52c8a1
+Revises: e4a8c61f0d27
+Create Date: 2026-10-18 15:02:44.508139
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0f3b9d52c8a1'
+down_revision: Union[str, Sequence[str], None] = 'e4a8c61f0d27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('mediafiles',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('url', sa.String(), nullable=False),
+    sa.Column('ref_count', sa.Integer(), server_default='0', nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_mediafiles_id'), 'mediafiles', ['id'], unique=False)
+    op.create_index(op.f('ix_mediafiles_url'), 'mediafiles', ['url'], unique=True)
+
+    # Ставим на учет уже загруженные файлы (со старыми именами uuid4)
+    op.execute("""
+        INSERT INTO mediafiles (url, ref_count)
+        SELECT url, count(*)
+        FROM paintings AS p, unnest(p.photo_filenames) AS url
+        GROUP BY url
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_mediafiles_url'), table_name='mediafiles')
+    op.drop_index(op.f('ix_mediafiles_id'), table_name='mediafiles')
+    op.drop_table('mediafiles')
@@ -0,0 +1,28 @@
+"""Add users token_version
+
+Revision ID: 2d9e7b4c1a63
+Revises: c5d81a4e2b97
+Create Date: 2026-10-18 19:52:06.418730
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2d9e7b4c1a63'
+down_revision: Union[str, Sequence[str], None] = 'c5d81a4e2b97'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('users', sa.Column('token_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('users', 'token_version')
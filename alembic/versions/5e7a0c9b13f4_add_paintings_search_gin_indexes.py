@@ -0,0 +1,44 @@
+"""Add paintings trigram title and tags GIN indexes
+
+Revision ID: 5e7a0c9b13f4
+Revises: 9c2e41d7a5b3
+Create Date: 2026-10-18 11:03:52.618204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e7a0c9b13f4'
+down_revision: Union[str, Sequence[str], None] = '9c2e41d7a5b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # CREATE INDEX CONCURRENTLY не блокирует запись в таблицу,
+    # но не может выполняться внутри транзакции.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_paintings_title_trgm', 'paintings', ['title'], unique=False,
+            postgresql_using='gin',
+            postgresql_ops={'title': 'gin_trgm_ops'},
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_paintings_tags_gin', 'paintings', ['tags'], unique=False,
+            postgresql_using='gin',
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_paintings_tags_gin', table_name='paintings', postgresql_concurrently=True)
+        op.drop_index('ix_paintings_title_trgm', table_name='paintings', postgresql_concurrently=True)
@@ -0,0 +1,55 @@
+"""Store media storage keys instead of static URLs
+
+Revision ID: 7a6d2e9f41c5
+Revises: 0f3b9d52c8a1
+Create Date: 2026-10-18 16:25:09.771304
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7a6d2e9f41c5'
+down_revision: Union[str, Sequence[str], None] = '0f3b9d52c8a1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+LOCAL_PREFIX = '/static/uploads/'
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.alter_column('mediafiles', 'url', new_column_name='storage_key')
+    op.drop_index('ix_mediafiles_url', table_name='mediafiles')
+    op.create_index(op.f('ix_mediafiles_storage_key'), 'mediafiles', ['storage_key'], unique=True)
+
+    # Публичные адреса теперь строит хранилище, в БД остаются только ключи
+    op.execute(f"""
+        UPDATE paintings
+        SET photo_filenames = ARRAY(
+            SELECT regexp_replace(name, '^{LOCAL_PREFIX}', '')
+            FROM unnest(photo_filenames) WITH ORDINALITY AS t(name, position)
+            ORDER BY position
+        )
+    """)
+    op.execute(f"UPDATE mediafiles SET storage_key = regexp_replace(storage_key, '^{LOCAL_PREFIX}', '')")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute(f"UPDATE mediafiles SET storage_key = '{LOCAL_PREFIX}' || storage_key")
+    op.execute(f"""
+        UPDATE paintings
+        SET photo_filenames = ARRAY(
+            SELECT '{LOCAL_PREFIX}' || name
+            FROM unnest(photo_filenames) WITH ORDINALITY AS t(name, position)
+            ORDER BY position
+        )
+    """)
+
+    op.drop_index(op.f('ix_mediafiles_storage_key'), table_name='mediafiles')
+    op.alter_column('mediafiles', 'storage_key', new_column_name='url')
+    op.create_index('ix_mediafiles_url', 'mediafiles', ['url'], unique=True)
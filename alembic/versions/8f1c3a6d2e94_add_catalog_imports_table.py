@@ -0,0 +1,43 @@
+"""Add catalog imports table
+
+Revision ID: 8f1c3a6d2e94
+Revises: 2d9e7b4c1a63
+Create Date: 2026-10-18 21:14:37.902615
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8f1c3a6d2e94'
+down_revision: Union[str, Sequence[str], None] = '2d9e7b4c1a63'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('catalogimports',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('source_sha256', sa.String(length=64), nullable=False),
+    sa.Column('source_name', sa.String(), nullable=False),
+    sa.Column('total_rows', sa.Integer(), nullable=False),
+    sa.Column('rows_done', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('rows_skipped', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('paintings_created', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('source_sha256')
+    )
+    op.create_index(op.f('ix_catalogimports_id'), 'catalogimports', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_catalogimports_id'), table_name='catalogimports')
+    op.drop_table('catalogimports')
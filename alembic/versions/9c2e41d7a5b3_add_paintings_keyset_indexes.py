@@ -0,0 +1,32 @@
+"""Add paintings keyset pagination indexes
+
+Revision ID: 9c2e41d7a5b3
+Revises: 3b1f3608cfc1
+Create Date: 2026-10-18 10:12:31.402117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c2e41d7a5b3'
+down_revision: Union[str, Sequence[str], None] = '3b1f3608cfc1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_paintings_title_id', 'paintings', ['title', 'id'], unique=False)
+    op.create_index('ix_paintings_width_id', 'paintings', ['width', 'id'], unique=False)
+    op.create_index('ix_paintings_height_id', 'paintings', ['height', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_paintings_height_id', table_name='paintings')
+    op.drop_index('ix_paintings_width_id', table_name='paintings')
+    op.drop_index('ix_paintings_title_id', table_name='paintings')
@@ -0,0 +1,46 @@
+"""Add tags catalog table
+
+Revision ID: b71d3f2a8e60
+Revises: 5e7a0c9b13f4
+Create Date: 2026-10-18 12:21:07.935512
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b71d3f2a8e60'
+down_revision: Union[str, Sequence[str], None] = '5e7a0c9b13f4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('tags',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('painting_count', sa.Integer(), server_default='0', nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_tags_id'), 'tags', ['id'], unique=False)
+    op.create_index(op.f('ix_tags_name'), 'tags', ['name'], unique=True)
+
+    # Заполняем справочник по уже существующим картинам.
+    # DISTINCT по id — повтор тега внутри одной картины считается один раз.
+    op.execute("""
+        INSERT INTO tags (name, painting_count)
+        SELECT tag, count(DISTINCT p.id)
+        FROM paintings AS p, unnest(p.tags) AS tag
+        GROUP BY tag
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_tags_name'), table_name='tags')
+    op.drop_index(op.f('ix_tags_id'), table_name='tags')
+    op.drop_table('tags')
@@ -0,0 +1,30 @@
+"""Add paintings updated_at
+
+Revision ID: e4a8c61f0d27
+Revises: b71d3f2a8e60
+Create Date: 2026-10-18 13:40:18.227961
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4a8c61f0d27'
+down_revision: Union[str, Sequence[str], None] = 'b71d3f2a8e60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('paintings', sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False))
+    op.create_index(op.f('ix_paintings_updated_at'), 'paintings', ['updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_paintings_updated_at'), table_name='paintings')
+    op.drop_column('paintings', 'updated_at')
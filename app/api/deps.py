@@ -2,13 +2,13 @@ from typing import AsyncGenerator
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
-from jose import jwt, JWTError
+from jose import JWTError
+from pydantic import ValidationError
 
-from app.core.config import settings
+from app.db.replicas import replica_router
 from app.db.session import SessionLocal
-from app.models.user import User
-from app.schemas.auth import TokenData
-from app.crud import user as crud_user
+from app.schemas.auth import Principal
+from app.services.principal_cache import principal_cache
 
 # Эта строка создает "схему" аутентификации.
 # tokenUrl указывает на эндпоинт, который выдает токен.
@@ -24,11 +24,24 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
         yield session
 
 
+async def get_read_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Сессия только для чтения: на одну из реплик по кругу или в основную БД,
+    если реплик нет, все выведены из ротации или клиент только что писал.
+    Записи и авторизация используют get_db.
+    """
+    async with replica_router.session() as session:
+        yield session
+
+
 async def get_current_user(
         db: AsyncSession = Depends(get_db), token: str = Depends(reusable_oauth2)
-) -> User:
+) -> Principal:
     """
-    Декодирует токен, проверяет его и возвращает пользователя из БД.
+    Декодирует токен, проверяет его и возвращает пользователя.
+    Токен и пользователь берутся из кэша, поэтому обычно запрос к БД не нужен.
+    Токен с устаревшей версией (после смены пароля или прав) отклоняется,
+    поэтому признак суперпользователя в принятом токене актуален и берется из него.
     """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -36,28 +49,23 @@ async def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=["HS256"]
-        )
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-        token_data = TokenData(username=username)
-    except JWTError:
+        token_data = principal_cache.decode_token(token)
+    except (JWTError, ValidationError):
         raise credentials_exception
 
-    # crud_user должен быть асинхронным
-    user = await crud_user.get_by_username(db, username=token_data.username)
-    if user is None:
+    principal = await principal_cache.get_principal(db, token_data.user_id)
+    if principal is None or principal.token_version != token_data.token_version:
         raise credentials_exception
-    return user
+    # Principal из кэша общий для запросов, поэтому меняем копию
+    return principal.model_copy(update={"is_superuser": token_data.is_superuser})
 
 
 def get_current_active_superuser(
-        current_user: User = Depends(get_current_user),
-) -> User:
+        current_user: Principal = Depends(get_current_user),
+) -> Principal:
     """
-    Проверяет, является ли пользователь, полученный из токена, суперюзером.
+    Проверяет, является ли пользователь, полученный из токена, суперюзером
+    (по claim "su", см. get_current_user).
     """
     if not current_user.is_superuser:
         raise HTTPException(
@@ -0,0 +1,77 @@
+from datetime import datetime, timezone
+
+from fastapi import APIRouter, Depends, Query, status
+from fastapi.responses import StreamingResponse
+
+from app.api import deps
+from app.db import pool
+from app.db.replicas import replica_router
+from app.db.slow_query import SlowQueryOrder, slow_query_log
+from app.db.session import engine
+from app.schemas.auth import Principal
+from app.services.catalog_export import MEDIA_TYPES, ExportFormat, stream_catalog
+
+router = APIRouter()
+
+
+@router.get("/db/pool")
+async def get_db_pool_stats(
+        current_user: Principal = Depends(deps.get_current_active_superuser)
+):
+    """
+    Состояние пула соединений с БД: занятые и свободные соединения,
+    открытия и закрытия соединений, гистограмма ожидания соединения.
+    """
+    return pool.pool_stats(engine)
+
+
+@router.get("/db/replicas")
+async def get_db_replicas_stats(
+        current_user: Principal = Depends(deps.get_current_active_superuser)
+):
+    """
+    Реплики для чтения: в ротации ли, отставание, последняя ошибка,
+    число чтений и состояние пула каждой.
+    """
+    return replica_router.stats()
+
+
+@router.get("/db/slow-queries")
+async def get_slow_queries(
+        limit: int = Query(20, ge=1, le=200),
+        order_by: SlowQueryOrder = "total",
+        current_user: Principal = Depends(deps.get_current_active_superuser)
+):
+    """
+    Самые медленные запросы этого процесса, сгруппированные по нормализованному
+    тексту: число выполнений, суммарное и максимальное время, маршруты,
+    параметры самого медленного выполнения и снятый план.
+    Работает при SLOW_QUERY_LOG_ENABLED=true.
+    """
+    return slow_query_log.top(limit=limit, order_by=order_by)
+
+
+@router.delete("/db/slow-queries", status_code=status.HTTP_204_NO_CONTENT)
+async def reset_slow_queries(
+        current_user: Principal = Depends(deps.get_current_active_superuser)
+):
+    """Очищает накопленную статистику медленных запросов."""
+    slow_query_log.reset()
+
+
+@router.get("/paintings/export")
+async def export_paintings(
+        format: ExportFormat = Query("ndjson", description="ndjson — объект на строку, csv — с заголовком"),
+        current_user: Principal = Depends(deps.get_current_active_superuser)
+):
+    """
+    Выгрузка всего каталога файлом. Ответ отдается потоком по мере чтения
+    из БД серверным курсором, поэтому размер каталога не ограничен памятью.
+    CSV в том же формате принимает scripts/import_paintings.py.
+    """
+    filename = f"paintings-{datetime.now(timezone.utc):%Y%m%d-%H%M%S}.{format}"
+    return StreamingResponse(
+        stream_catalog(format),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -1,9 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException
+import math
+
+from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api import deps
-from app.core.security import create_access_token
+from app.core.security import PasswordHashBusyError, create_access_token, login_limiter
 from app.crud import user as crud_user
 from app.schemas.auth import Token
 
@@ -11,21 +13,47 @@ router = APIRouter()
 
 @router.post("/login", response_model=Token)
 async def login_for_access_token(
+    request: Request,
     db: AsyncSession = Depends(deps.get_db),
     form_data: OAuth2PasswordRequestForm = Depends()
 ):
     """
     Аутентифицирует пользователя и возвращает JWT токен.
+    После серии неудачных попыток (по имени или по IP) отвечает 429
+    до конца окна, не проверяя пароль.
     """
-    # crud_user.authenticate должен быть асинхронным
-    user = await crud_user.authenticate(
-        db, username=form_data.username, password=form_data.password
-    )
+    # За обратным прокси адрес клиента берется из X-Forwarded-For (TRUSTED_PROXY_IPS)
+    client_ip = request.client.host if request.client else None
+    retry_after = login_limiter.retry_after(form_data.username, client_ip)
+    if retry_after is not None:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many failed login attempts",
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
+
+    try:
+        user = await crud_user.authenticate(
+            db, username=form_data.username, password=form_data.password
+        )
+    except PasswordHashBusyError:
+        raise HTTPException(
+            status_code=503,
+            detail="Too many concurrent login attempts",
+            headers={"Retry-After": "1"},
+        )
     if not user:
+        login_limiter.record_failure(form_data.username, client_ip)
         raise HTTPException(
             status_code=401,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    access_token = create_access_token(subject=user.username)
-    return {"access_token": access_token, "token_type": "bearer"}
\ No newline at end of file
+    login_limiter.reset(form_data.username)
+    # В токен кладем все, что нужно для авторизации: id, права и версию токенов.
+    # Смена пароля или прав увеличивает версию, и старые токены перестают приниматься.
+    access_token = create_access_token(
+        subject=user.username,
+        claims={"uid": user.id, "su": bool(user.is_superuser), "ver": user.token_version},
+    )
+    return {"access_token": access_token, "token_type": "bearer"}
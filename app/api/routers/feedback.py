@@ -1,10 +1,9 @@
-from fastapi import APIRouter, Depends, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from app import crud
-from app.schemas.feedback import FeedbackInDB, FeedbackBase, FeedbackCreate
-from app.schemas.user_session import UserSessionCreate
+from app.schemas.feedback import FeedbackInDB, FeedbackBase
 from app.api import deps
-from app.services.notification_service import bot, send_feedback_notification
+from app.services.notification_service import notification_dispatcher
 
 router = APIRouter()
 
@@ -12,7 +11,6 @@ router = APIRouter()
 @router.post("/", response_model=FeedbackInDB)
 async def create_feedback(
         *,
-        background_tasks: BackgroundTasks,
         db: AsyncSession = Depends(deps.get_db),
         # Клиент отправляет только базовые данные отзыва
         feedback_in: FeedbackBase
@@ -20,20 +18,16 @@ async def create_feedback(
     """
     Принять данные обратной связи от пользователя.
     При этом автоматически создается запись о сессии.
+    Сессия и отзыв вставляются одним запросом в одной транзакции,
+    отзыв на несуществующую картину отклоняется с 404.
+    Уведомление в Telegram пишется в outbox той же транзакцией
+    и отправляется диспетчером уведомлений.
     """
-    # 1. Создаем новую сессию для этого пользователя
-    session_create_obj = UserSessionCreate()
-    new_session = await crud.user_session.create(db=db, obj_in=session_create_obj)
+    new_feedback = await crud.feedback.create_with_session(db=db, obj_in=feedback_in)
+    if new_feedback is None:
+        raise HTTPException(status_code=404, detail="Painting not found")
 
-    # 2. Создаем объект отзыва, добавляя в него ID только что созданной сессии
-    feedback_create_obj = FeedbackCreate(
-        **feedback_in.dict(),
-        user_session_id=new_session.id
-    )
-
-    # 3. Сохраняем отзыв в базе данных
-    new_feedback = await crud.feedback.create(db=db, obj_in=feedback_create_obj)
-
-    background_tasks.add_task(send_feedback_notification, new_feedback.id)
+    # Будим диспетчер, чтобы уведомление ушло без ожидания очередного опроса
+    notification_dispatcher.wake()
 
     return new_feedback
@@ -1,28 +1,101 @@
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Form, File, UploadFile, Query
+from datetime import datetime
+from typing import List, Optional, Tuple, Union
+from fastapi import APIRouter, Depends, HTTPException, status, Form, File, UploadFile, Query, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-import os
-import shutil
-import uuid
 from app import crud
-from app.models.user import User
-from app.schemas.painting import PaintingInDB, PaintingCreate, PaintingUpdate
-from app.schemas.general import TotalCountResponse
+from app.core.config import settings
+from app.core.http_cache import conditional_response, make_etag
+from app.core.pagination import InvalidCursorError
+from app.schemas.painting import (
+    PaintingInDB, PaintingCreate, PaintingUpdate, PaintingSort, PaintingListItem, PaintingView,
+    PaintingBatch, PaintingBatchResult, PaintingFacets,
+)
+from app.schemas.auth import Principal
+from app.schemas.general import TotalCountResponse, CountMode
+from app.schemas.tag import TagWithCount
 from app.api import deps
+from app.services.catalog_cache import LIST_VIEWS, catalog_cache
+from app.services.images import ImageProcessingError
+from app.services.storage import storage
+from app.services.uploads import UploadBatchError, UploadTooLargeError, release_uploads, save_uploads
 
 router = APIRouter()
 
-UPLOADS_DIR = "static/uploads"
-os.makedirs(UPLOADS_DIR, exist_ok=True)
+# Заголовок, в котором отдаем курсор следующей страницы
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+# Заголовок с общим количеством картин при include_total=true
+TOTAL_COUNT_HEADER = "X-Total-Count"
+
+
+def _json_bytes_response(response: Response, content: bytes) -> Response:
+    """
+    Готовое тело JSON в обход сериализации FastAPI (FAST_JSON_RESPONSES).
+    Заголовки, выставленные обработчиком в `response`, переносятся в ответ.
+    """
+    return Response(content=content, media_type="application/json", headers=dict(response.headers))
+
+
+def _links_etag(*validator) -> str:
+    """
+    ETag ответа со ссылками на файлы. Если ссылки подписанные (S3 без
+    S3_PUBLIC_BASE_URL), в него входит период их действия: в следующем
+    периоде клиент получит тело со свежими ссылками, а не 304 со старыми.
+    Подпись меняется с каждым ответом, поэтому такой ETag слабый.
+    """
+    epoch = storage.url_epoch()
+    if epoch is None:
+        return make_etag(*validator)
+    return "W/" + make_etag(*validator, "links", epoch)
+
+
+async def _collection_validator(
+        request: Request, db: AsyncSession, **filters
+) -> Optional[Tuple[Optional[datetime], int]]:
+    """
+    Валидатор набора картин: max(updated_at) и число строк под фильтрами.
+    Запрос к БД за ним выполняется только для условного запроса
+    (If-None-Match) — обычный запрос не должен платить за лишний подсчет
+    строк перед основным запросом. Ему ETag ставится, если валидатор уже
+    есть в кэше каталога, иначе ответ уходит без ETag.
+    """
+    if "if-none-match" in request.headers:
+        return await catalog_cache.get_validator(db, **filters)
+    return catalog_cache.peek_validator(**filters)
+
+
+def _collection_not_modified(
+        request: Request,
+        response: Response,
+        validator: Optional[Tuple[Optional[datetime], int]],
+        *parts,
+        links: bool = False,
+) -> Optional[Response]:
+    """
+    Условный ответ для наборов картин (списки, количество, фасеты, теги).
+    Удаление картины, которая не была изменена последней, max(updated_at)
+    не сдвигает. Поэтому Last-Modified для наборов не отдается
+    и If-Modified-Since не проверяется, актуальность копии определяет
+    только ETag, куда входит и количество. Без валидатора (см.
+    `_collection_validator`) ETag не ставится.
+    `links` — в теле есть ссылки на файлы (см. `_links_etag`).
+    """
+    if validator is None:
+        return None
+    etag = _links_etag(*parts, *validator) if links else make_etag(*parts, *validator)
+    return conditional_response(request, response, etag)
 
 
 # --- Публичные эндпоинты ---
 
-@router.get("", response_model=List[PaintingInDB]) # Убрал слэш для гибкости
+@router.get("", response_model=Union[List[PaintingInDB], List[PaintingListItem]]) # Убрал слэш для гибкости
 async def read_paintings(
-    db: AsyncSession = Depends(deps.get_db),
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(deps.get_read_db),
     skip: int = 0,
     limit: int = 12,
+    sort: PaintingSort = Query("id", description="Поле сортировки, '-' в начале — по убыванию"),
+    cursor: Optional[str] = Query(None, description="Курсор из заголовка X-Next-Cursor предыдущей страницы"),
     title: Optional[str] = Query(None, description="Фильтр по названию картины"),
     # `Query(None)` позволяет FastAPI принимать строку и преобразовывать ее в список
     tags: Optional[List[str]] = Query(None, description="Фильтр по тегам (через запятую)"),
@@ -30,61 +103,198 @@ async def read_paintings(
     width_max: Optional[float] = Query(None, alias="width_max"),
     height_min: Optional[float] = Query(None, alias="height_min"),
     height_max: Optional[float] = Query(None, alias="height_max"),
+    include_total: bool = Query(False, description="Вернуть общее количество в заголовке X-Total-Count"),
+    total_mode: CountMode = Query("exact", description="estimated — оценка планировщика, если фильтров нет"),
+    view: PaintingView = Query("full", description="grid — облегченные элементы для сетки: название, размер, обложка"),
 ):
     """
     Получить список картин с фильтрацией и пагинацией.
+    Поддерживаются два режима: классический `skip` и keyset-пагинация через `cursor`.
+    Если страница заполнена целиком, курсор следующей страницы
+    возвращается в заголовке X-Next-Cursor.
+    С include_total=true общее количество считается тем же запросом
+    и возвращается в заголовке X-Total-Count, отдельный вызов /count не нужен.
+    С view=grid возвращаются PaintingListItem, и из БД читаются только
+    нужные для них колонки (без описания и тегов).
+    Поддерживает условные запросы (If-None-Match).
     """
-    paintings = await crud.painting.get_multi_filtered(
-        db, skip=skip, limit=limit, title=title, tags=tags,
+    filters = dict(
+        title=title, tags=tags,
         width_min=width_min, width_max=width_max,
         height_min=height_min, height_max=height_max
     )
+    validator = await _collection_validator(request, db, **filters)
+    not_modified = _collection_not_modified(request, response, validator, "list", view, links=True)
+    if not_modified:
+        return not_modified
+
+    try:
+        if include_total:
+            paintings, total = await catalog_cache.get_paintings_with_total(
+                db, skip=skip, limit=limit, sort=sort, cursor=cursor,
+                estimated=total_mode == "estimated", view=view, **filters
+            )
+            response.headers[TOTAL_COUNT_HEADER] = str(total)
+        else:
+            paintings = await catalog_cache.get_paintings(
+                db, skip=skip, limit=limit, sort=sort, cursor=cursor, view=view, **filters
+            )
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if paintings and len(paintings) == limit:
+        response.headers[NEXT_CURSOR_HEADER] = crud.painting.make_cursor(paintings[-1], sort=sort)
+    if settings.FAST_JSON_RESPONSES:
+        adapter, _ = LIST_VIEWS[view]
+        return _json_bytes_response(response, adapter.dump_json(paintings, by_alias=True))
     return paintings
 
 
 @router.get("/count", response_model=TotalCountResponse)
 async def get_paintings_count(
-    db: AsyncSession = Depends(deps.get_db),
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(deps.get_read_db),
     title: Optional[str] = Query(None, description="Фильтр по названию картины"),
     tags: Optional[List[str]] = Query(None, description="Фильтр по тегам (через запятую)"),
     width_min: Optional[float] = Query(None, alias="width_min"),
     width_max: Optional[float] = Query(None, alias="width_max"),
     height_min: Optional[float] = Query(None, alias="height_min"),
     height_max: Optional[float] = Query(None, alias="height_max"),
+    mode: CountMode = Query("exact", description="estimated — оценка планировщика, если фильтров нет"),
 ):
     """
     Получить общее количество картин с учетом фильтров.
     """
-    total = await crud.painting.count_filtered(
-        db, title=title, tags=tags,
+    filters = dict(
+        title=title, tags=tags,
         width_min=width_min, width_max=width_max,
         height_min=height_min, height_max=height_max
     )
+    validator = await _collection_validator(request, db, **filters)
+    not_modified = _collection_not_modified(request, response, validator, "count")
+    if not_modified:
+        return not_modified
+
+    total = await catalog_cache.count_paintings(db, estimated=mode == "estimated", **filters)
     return {"total": total}
 
 
+# Объявлен до /{painting_id}, иначе "facets" разбирался бы как id картины
+@router.get("/facets", response_model=PaintingFacets)
+async def get_paintings_facets(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(deps.get_read_db),
+    title: Optional[str] = Query(None, description="Фильтр по названию картины"),
+    tags: Optional[List[str]] = Query(None, description="Фильтр по тегам (через запятую)"),
+    width_min: Optional[float] = Query(None, alias="width_min"),
+    width_max: Optional[float] = Query(None, alias="width_max"),
+    height_min: Optional[float] = Query(None, alias="height_min"),
+    height_max: Optional[float] = Query(None, alias="height_max"),
+):
+    """
+    Счетчики для панели фильтров: сколько картин под текущими фильтрами
+    у каждого тега и в каждом интервале ширины и высоты.
+    """
+    filters = dict(
+        title=title, tags=tags,
+        width_min=width_min, width_max=width_max,
+        height_min=height_min, height_max=height_max
+    )
+    validator = await _collection_validator(request, db, **filters)
+    not_modified = _collection_not_modified(request, response, validator, "facets")
+    if not_modified:
+        return not_modified
+
+    return await catalog_cache.get_facets(db, **filters)
+
+
 @router.get("/{painting_id}", response_model=PaintingInDB)
 async def read_painting_by_id(
         painting_id: int,
-        db: AsyncSession = Depends(deps.get_db)
+        request: Request,
+        response: Response,
+        db: AsyncSession = Depends(deps.get_read_db)
 ):
-    db_painting = await crud.painting.get(db, id=painting_id)
+    last_modified = await catalog_cache.get_painting_updated_at(db, painting_id)
+    if last_modified is None:
+        raise HTTPException(status_code=404, detail="Painting not found")
+    # По If-Modified-Since нельзя понять, истекли ли подписанные ссылки в копии клиента
+    not_modified = conditional_response(
+        request, response, _links_etag("painting", painting_id, last_modified),
+        last_modified if storage.url_epoch() is None else None,
+    )
+    if not_modified:
+        return not_modified
+
+    db_painting = await catalog_cache.get_painting(db, painting_id)
     if db_painting is None:
         raise HTTPException(status_code=404, detail="Painting not found")
+    if settings.FAST_JSON_RESPONSES:
+        return _json_bytes_response(response, db_painting.model_dump_json(by_alias=True))
     return db_painting
 
 
+async def _catalog_not_modified(
+        request: Request, response: Response, db: AsyncSession, kind: str
+) -> Optional[Response]:
+    """Условный ответ для ресурсов, зависящих от всего каталога (списки тегов)."""
+    validator = await _collection_validator(request, db)
+    return _collection_not_modified(request, response, validator, kind)
+
+
 @router.get("/tags/all", response_model=List[str])
-async def get_all_unique_tags(db: AsyncSession = Depends(deps.get_db)):
+async def get_all_unique_tags(
+        request: Request,
+        response: Response,
+        db: AsyncSession = Depends(deps.get_read_db)
+):
     """
     Получить плоский список всех уникальных тегов из всех картин.
     """
-    tags = await crud.painting.get_all_tags(db=db)
+    not_modified = await _catalog_not_modified(request, response, db, "tags")
+    if not_modified:
+        return not_modified
+
+    tags = await catalog_cache.get_all_tags(db)
     return tags
 
 
+@router.get("/tags/counts", response_model=List[TagWithCount])
+async def get_tags_with_counts(
+        request: Request,
+        response: Response,
+        db: AsyncSession = Depends(deps.get_read_db)
+):
+    """
+    Получить все теги с количеством картин по каждому, по алфавиту.
+    """
+    not_modified = await _catalog_not_modified(request, response, db, "tag-counts")
+    if not_modified:
+        return not_modified
+
+    return await catalog_cache.get_tags_with_counts(db)
+
+
 # --- Защищенные эндпоинты (модифицированы) ---
 
+async def _save_images(images: List[UploadFile]) -> List[str]:
+    """
+    Сохраняет загруженные изображения вместе с производными (миниатюры и т.д.)
+    в хранилище и возвращает их ключи, закрепленные до вызова `release_uploads`.
+    Превышение лимита превращает в 413, файл, который не является изображением, — в 400.
+    """
+    try:
+        return await save_uploads(images)
+    except UploadBatchError as e:
+        if isinstance(e.error, UploadTooLargeError):
+            raise HTTPException(status_code=413, detail=str(e))
+        if isinstance(e.error, ImageProcessingError):
+            raise HTTPException(status_code=400, detail=str(e))
+        raise e.error
+
+
 @router.post("", response_model=PaintingInDB, status_code=status.HTTP_201_CREATED)
 async def create_painting(
         *,
@@ -95,7 +305,7 @@ async def create_painting(
         tags: str = Form(...),  # Тэги придут как строка "море,закат"
         description: str = Form(""),
         images: List[UploadFile] = File(...),
-        current_user: User = Depends(deps.get_current_active_superuser)
+        current_user: Principal = Depends(deps.get_current_active_superuser)
 ):
     """
     Создать новую картину. Требуются права суперпользователя.
@@ -104,20 +314,8 @@ async def create_painting(
     if not images:
         raise HTTPException(status_code=400, detail="No images uploaded.")
 
-    saved_filenames = []
-    for image in images:
-        # Генерируем уникальное имя файла, чтобы избежать конфликтов
-        extension = image.filename.split(".")[-1]
-        unique_filename = f"{uuid.uuid4()}.{extension}"
-        file_path = os.path.join(UPLOADS_DIR, unique_filename)
-
-        # Сохраняем файл на диск
-        try:
-            with open(file_path, "wb") as buffer:
-                shutil.copyfileobj(image.file, buffer)
-            saved_filenames.append(f"/static/uploads/{unique_filename}") # <-- Сохраняем полный путь
-        finally:
-            image.file.close()
+    # Файлы пишутся параллельно и вне event loop; при ошибке ничего не остается
+    saved_filenames = await _save_images(images)
 
     # Преобразуем строку тегов в список
     tags_list = [tag.strip() for tag in tags.split(',') if tag.strip()]
@@ -132,8 +330,47 @@ async def create_painting(
         photo_filenames=saved_filenames # Используем список сохраненных имен файлов
     )
 
-    new_painting = await crud.painting.create(db=db, obj_in=painting_in)
-    return new_painting
+    try:
+        new_painting = await crud.painting.create(db=db, obj_in=painting_in)
+    except Exception:
+        # Запись в БД не удалась — новые файлы больше никому не нужны
+        await db.rollback()
+        await release_uploads(db, unpin=saved_filenames)
+        raise
+    catalog_cache.invalidate()
+
+    # Теперь на файлы ссылается картина, закрепление загрузки не нужно.
+    # Это коммитит сессию и сбрасывает загруженные атрибуты, поэтому ответ собираем заранее.
+    result = PaintingInDB.model_validate(new_painting)
+    await release_uploads(db, unpin=saved_filenames)
+    return result
+
+
+@router.post("/batch", response_model=PaintingBatchResult)
+async def batch_update_paintings(
+        *,
+        db: AsyncSession = Depends(deps.get_db),
+        batch: PaintingBatch,
+        current_user: Principal = Depends(deps.get_current_active_superuser)
+):
+    """
+    Пакетные изменения картин: добавить или убрать теги, задать поля, удалить.
+    Операции применяются по порядку в одной транзакции, каждая — одним запросом
+    сразу для всех своих картин. Для каждой операции возвращается, какие
+    картины изменены, какие уже были в нужном состоянии и каких нет.
+    """
+    if sum(len(operation.ids) for operation in batch.operations) > settings.PAINTINGS_BATCH_MAX_IDS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"A batch may touch at most {settings.PAINTINGS_BATCH_MAX_IDS} paintings.",
+        )
+
+    results, released = await crud.painting.apply_batch(db, batch.operations)
+    if any(result.applied for result in results):
+        catalog_cache.invalidate()
+    # Файлы удаленных картин освобождаем только после коммита
+    await release_uploads(db, released)
+    return PaintingBatchResult(results=results)
 
 
 @router.put("/{painting_id}", response_model=PaintingInDB)
@@ -148,14 +385,14 @@ async def update_painting(
         description: str = Form(""),
         # Файлы опциональны: если не прислали, значит не меняем
         images: Optional[List[UploadFile]] = File(None),
-        current_user: User = Depends(deps.get_current_active_superuser)
+        current_user: Principal = Depends(deps.get_current_active_superuser)
 ):
     """
     Обновить существующую картину.
     Если переданы новые файлы, они полностью заменяют старые.
     """
-    db_painting = await crud.painting.get(db, id=painting_id)
-    if not db_painting:
+    # Дешевая проверка до обработки файлов; блокируется картина позже
+    if not await crud.painting.get(db, id=painting_id):
         raise HTTPException(status_code=404, detail="Painting not found")
 
     # Преобразуем строку тегов в список
@@ -170,35 +407,35 @@ async def update_painting(
         "description": description,
     }
 
-    # Если были загружены новые файлы
+    # Если были загружены новые файлы, сначала сохраняем их,
+    # а старые освобождаем только после успешного обновления записи.
+    saved_filenames = []
     if images:
-        # 1. Удаляем старые файлы с диска
-        for old_filename in db_painting.photo_filenames:
-            # Убираем /static/uploads/ из пути, чтобы получить имя файла
-            file_to_delete = old_filename.replace('/static/uploads/', '')
-            old_file_path = os.path.join(UPLOADS_DIR, file_to_delete)
-            if os.path.exists(old_file_path):
-                os.remove(old_file_path)
-
-        # 2. Сохраняем новые файлы
-        saved_filenames = []
-        for image in images:
-            extension = image.filename.split(".")[-1]
-            unique_filename = f"{uuid.uuid4()}.{extension}"
-            file_path = os.path.join(UPLOADS_DIR, unique_filename)
-            try:
-                with open(file_path, "wb") as buffer:
-                    shutil.copyfileobj(image.file, buffer)
-                saved_filenames.append(f"/static/uploads/{unique_filename}")
-            finally:
-                image.file.close()
-
-        # 3. Добавляем список новых файлов в данные для обновления
+        saved_filenames = await _save_images(images)
         update_data["photo_filenames"] = saved_filenames
 
-    # Создаем схему и обновляем запись в БД
+    # Создаем схему и обновляем запись в БД. Картина блокируется до коммита,
+    # и старые теги и файлы читаются под блокировкой: одновременная правка
+    # той же картины подождет, и счетчики ссылок не разойдутся.
     painting_in = PaintingUpdate(**update_data)
-    updated_painting = await crud.painting.update(db=db, db_obj=db_painting, obj_in=painting_in)
+    try:
+        db_painting = await crud.painting.get_for_update(db, id=painting_id)
+        if not db_painting:
+            raise HTTPException(status_code=404, detail="Painting not found")
+        old_filenames = list(db_painting.photo_filenames)
+        updated_painting = await crud.painting.update(db=db, db_obj=db_painting, obj_in=painting_in)
+    except Exception:
+        await db.rollback()
+        await release_uploads(db, unpin=saved_filenames)
+        raise
+    catalog_cache.invalidate()
+
+    if saved_filenames:
+        # Освобождение файлов коммитит сессию и сбрасывает загруженные атрибуты,
+        # поэтому ответ собираем заранее.
+        result = PaintingInDB.model_validate(updated_painting)
+        await release_uploads(db, old_filenames, unpin=saved_filenames)
+        return result
     return updated_painting
 
 @router.delete("/{painting_id}", response_model=PaintingInDB)
@@ -206,18 +443,25 @@ async def delete_painting(
         *,
         db: AsyncSession = Depends(deps.get_db),
         painting_id: int,
-        current_user: User = Depends(deps.get_current_active_superuser)
+        current_user: Principal = Depends(deps.get_current_active_superuser)
 ):
-    db_painting = await crud.painting.get(db, id=painting_id)
-    if not db_painting:
+    # remove блокирует картину и считает счетчики от ее состояния под блокировкой
+    deleted_painting = await crud.painting.remove(db=db, id=painting_id)
+    if not deleted_painting:
         raise HTTPException(status_code=404, detail="Painting not found")
+    catalog_cache.invalidate()
 
-    # Удаляем файлы с диска перед удалением записи из БД
-    for filename in db_painting.photo_filenames:
-        file_to_delete = filename.replace('/static/uploads/', '')
-        file_path = os.path.join(UPLOADS_DIR, file_to_delete)
-        if os.path.exists(file_path):
-            os.remove(file_path)
+    # Файлы освобождаем только после того, как запись удалена из БД
+    result = PaintingInDB.model_validate(deleted_painting)
+    await release_uploads(db, result.photo_filenames)
+    return result
 
-    deleted_painting = await crud.painting.remove(db=db, id=painting_id)
-    return deleted_painting
\ No newline at end of file
+
+@router.get("/cache/stats")
+async def get_catalog_cache_stats(
+        current_user: Principal = Depends(deps.get_current_active_superuser)
+):
+    """
+    Счетчики кэша каталога: попадания, промахи, вытеснения, истечения TTL.
+    """
+    return catalog_cache.stats()
\ No newline at end of file
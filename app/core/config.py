@@ -1,3 +1,4 @@
+from typing import List, Literal, Optional
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -5,8 +6,120 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
 
+    # Пул соединений с БД (на каждый процесс-воркер)
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT_SECONDS: float = 30.0
+    # Соединения старше этого закрываются при возврате в пул — меньше шансов
+    # наткнуться на соединение, оборванное балансировщиком или файрволом
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    # Вместо проверки на каждом получении соединения (pool_pre_ping)
+    # проверяются только простоявшие дольше этого; 0 — без проверки
+    DB_POOL_PING_IDLE_SECONDS: float = 300.0
+    # Сколько соединений открыть при запуске приложения
+    DB_POOL_WARMUP_CONNECTIONS: int = 5
+    # Кэш подготовленных выражений asyncpg на соединение;
+    # 0 — для PgBouncer в режиме transaction
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    DB_CONNECT_TIMEOUT_SECONDS: float = 10.0
+
+    # Реплики только для чтения публичного каталога, JSON-списком:
+    # DATABASE_REPLICA_URLS='["postgresql+asyncpg://...", ...]'. Пусто — все идет в основную БД
+    DATABASE_REPLICA_URLS: List[str] = []
+    REPLICA_HEALTH_CHECK_SECONDS: float = 5.0
+    # Реплика с большим отставанием или с ошибками выводится из ротации на это время
+    REPLICA_MAX_LAG_SECONDS: float = 10.0
+    REPLICA_EJECT_SECONDS: float = 30.0
+    # Сколько секунд после записи читать из основной БД (read-your-writes)
+    READ_YOUR_WRITES_SECONDS: float = 10.0
+
+    # bcrypt выполняется в отдельном ограниченном пуле потоков;
+    # проверки сверх лимита ожидания отклоняются, а не копятся в очереди
+    PASSWORD_HASH_THREADS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 32
+    # Ограничение неудачных попыток входа за окно времени
+    LOGIN_MAX_FAILURES_PER_USERNAME: int = 5
+    LOGIN_MAX_FAILURES_PER_IP: int = 20
+    LOGIN_FAILURE_WINDOW_SECONDS: float = 300.0
+    # Обратные прокси, которым верим в X-Forwarded-For, JSON-списком адресов
+    # или подсетей: TRUSTED_PROXY_IPS='["10.0.0.0/8"]'. Без этого за прокси
+    # все клиенты — это адрес прокси и делят один лимит входа по IP.
+    # Пусто — клиент определяется по адресу соединения
+    TRUSTED_PROXY_IPS: List[str] = []
+    # Кэш проверенных токенов и пользователей для авторизации. Отзыв токенов
+    # (смена пароля, снятие прав) доходит до других воркеров не позже TTL
+    AUTH_CACHE_ENABLED: bool = True
+    AUTH_CACHE_MAX_ENTRIES: int = 1024
+    AUTH_CACHE_TTL_SECONDS: float = 30.0
+
     TELEGRAM_BOT_TOKEN: str
     TELEGRAM_CHAT_ID: int
+    # Адрес Bot API; для проверки можно указать локальный фейковый сервер
+    TELEGRAM_API_BASE_URL: str = "https://api.telegram.org/bot"
+
+    # Диспетчер уведомлений из outbox. Если в приложении он выключен,
+    # его нужно запустить отдельным процессом (scripts/run_notification_dispatcher.py)
+    NOTIFICATION_DISPATCHER_ENABLED: bool = True
+    NOTIFICATION_BATCH_SIZE: int = 50
+    NOTIFICATION_POLL_SECONDS: float = 5.0
+    NOTIFICATION_LEASE_SECONDS: float = 60.0
+    # Telegram пропускает в группу не больше 20 сообщений в минуту
+    NOTIFICATION_MIN_INTERVAL_SECONDS: float = 3.0
+    NOTIFICATION_MAX_ATTEMPTS: int = 10
+    NOTIFICATION_RETRY_BASE_SECONDS: float = 5.0
+    NOTIFICATION_RETRY_MAX_SECONDS: float = 900.0
+
+    # Метрики Prometheus на /metrics. Под несколькими воркерами задайте
+    # PROMETHEUS_MULTIPROC_DIR — см. app/core/prometheus.py
+    METRICS_ENABLED: bool = True
+
+    # Журнал медленных запросов с EXPLAIN (ANALYZE, BUFFERS) для части из них.
+    # Включайте осознанно: в лог попадают значения параметров запросов
+    SLOW_QUERY_LOG_ENABLED: bool = False
+    SLOW_QUERY_THRESHOLD_MS: float = 200.0
+    # Доля медленных чтений, для которых снимается план, и не чаще
+    # раза в интервал на одну форму запроса
+    SLOW_QUERY_EXPLAIN_SAMPLE_RATE: float = 0.1
+    SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS: float = 300.0
+    SLOW_QUERY_EXPLAIN_TIMEOUT_MS: int = 10_000
+    SLOW_QUERY_MAX_ENTRIES: int = 500
+
+    # Кэш чтения каталога в памяти процесса
+    CATALOG_CACHE_ENABLED: bool = True
+    CATALOG_CACHE_MAX_ENTRIES: int = 1024
+    CATALOG_CACHE_TTL_SECONDS: float = 30.0
+    # Отдавать списки картин готовыми байтами JSON из скомпилированного TypeAdapter,
+    # минуя повторную валидацию и jsonable_encoder FastAPI
+    FAST_JSON_RESPONSES: bool = False
+    # Границы интервалов размеров (см) для фасетов /api/paintings/facets, JSON-списком
+    FACET_SIZE_EDGES_CM: List[float] = [30, 50, 70, 100, 150]
+    # Сколько картин в сумме могут затронуть операции одного пакетного запроса
+    PAINTINGS_BATCH_MAX_IDS: int = 1000
+
+    # Загрузка изображений
+    UPLOAD_MAX_FILE_BYTES: int = 25 * 1024 * 1024
+    UPLOAD_MAX_REQUEST_BYTES: int = 100 * 1024 * 1024
+    UPLOAD_CHUNK_BYTES: int = 1024 * 1024
+    UPLOAD_IO_THREADS: int = 4
+    # Локальный каталог для приема и обработки файлов до отправки в хранилище
+    UPLOAD_STAGING_DIR: str = "tmp/uploads"
+
+    # Хранилище медиафайлов: local — диск этого узла, s3 — S3-совместимое (AWS, MinIO)
+    STORAGE_BACKEND: Literal["local", "s3"] = "local"
+    LOCAL_STORAGE_DIR: str = "static/uploads"
+    LOCAL_STORAGE_URL_PREFIX: str = "/static/uploads/"
+    S3_BUCKET: str = ""
+    S3_ENDPOINT_URL: Optional[str] = None
+    S3_REGION: Optional[str] = None
+    S3_ACCESS_KEY_ID: Optional[str] = None
+    S3_SECRET_ACCESS_KEY: Optional[str] = None
+    # Публичный адрес бакета или CDN; если не задан, отдаются подписанные ссылки
+    S3_PUBLIC_BASE_URL: Optional[str] = None
+    S3_PRESIGN_EXPIRES_SECONDS: int = 3600
+
+    # Производные изображения (миниатюры и т.п.) строятся в пуле процессов
+    IMAGE_PROCESS_WORKERS: int = 2
+    IMAGE_VARIANT_QUALITY: int = 82
 
     class Config:
         env_file = ".env"
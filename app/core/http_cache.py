@@ -0,0 +1,68 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Optional
+
+from fastapi import Request, Response
+
+
+def make_etag(*parts: Any) -> str:
+    """Строгий ETag из дешевых валидаторов (время изменения, количество и т.п.)."""
+    raw = "|".join(str(part) for part in parts)
+    return '"' + hashlib.sha1(raw.encode()).hexdigest()[:32] + '"'
+
+
+def http_date(value: datetime) -> str:
+    """Дата в формате HTTP (RFC 7231), всегда в GMT."""
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    # Для If-None-Match используется слабое сравнение: префикс W/ игнорируется
+    candidates = [item.strip() for item in header.split(",")]
+    return "*" in candidates or any(
+        candidate.removeprefix("W/") == etag.removeprefix("W/") for candidate in candidates
+    )
+
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime]) -> bool:
+    """
+    Проверяет условные заголовки запроса.
+    If-None-Match приоритетнее If-Modified-Since: если он есть, второй не смотрим.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        # Last-Modified передается с точностью до секунды
+        return last_modified.replace(microsecond=0) <= since
+    return False
+
+
+def conditional_response(
+        request: Request,
+        response: Response,
+        etag: str,
+        last_modified: Optional[datetime] = None,
+) -> Optional[Response]:
+    """
+    Проставляет ETag и Last-Modified. Если клиентская копия актуальна,
+    возвращает готовый ответ 304 — тело тогда не нужно ни загружать, ни сериализовать.
+    """
+    headers = {"ETag": etag}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+
+    if is_not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+
+    response.headers.update(headers)
+    return None
@@ -0,0 +1,41 @@
+import os
+from typing import Dict, List
+
+# Производные изображения: максимальная длина большей стороны в пикселях.
+# Меньшие оригиналы не увеличиваются.
+VARIANT_SIZES: Dict[str, int] = {
+    "thumbnail": 320,
+    "medium": 960,
+    "large": 1920,
+}
+
+# Формат -> расширение файла
+VARIANT_FORMATS: Dict[str, str] = {
+    "webp": "webp",
+    "jpeg": "jpg",
+}
+
+
+def variant_url(url: str, size: str, fmt: str) -> str:
+    """
+    Путь (или ключ) производного изображения строится из пути оригинала:
+    ab/cd/abc.png -> ab/cd/abc_thumbnail.webp
+    """
+    stem, _ = os.path.splitext(url)
+    return f"{stem}_{size}.{VARIANT_FORMATS[fmt]}"
+
+
+def variant_urls(url: str) -> Dict[str, Dict[str, str]]:
+    """Все производные одного изображения: {размер: {формат: путь}}."""
+    return {
+        size: {fmt: variant_url(url, size, fmt) for fmt in VARIANT_FORMATS}
+        for size in VARIANT_SIZES
+    }
+
+
+def all_variant_urls(urls: List[str]) -> List[str]:
+    """Плоский список путей всех производных для набора изображений."""
+    return [
+        variant_url(url, size, fmt)
+        for url in urls for size in VARIANT_SIZES for fmt in VARIANT_FORMATS
+    ]
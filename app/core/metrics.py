@@ -0,0 +1,40 @@
+import bisect
+from typing import Sequence
+
+# Границы корзин по умолчанию, в секундах: от миллисекунды до десяти секунд
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """
+    Гистограмма с фиксированными корзинами в памяти процесса.
+    Корзины накопительные, как в Prometheus: `le` — верхняя граница,
+    последняя корзина (+Inf) равна общему числу наблюдений.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.bounds = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self._counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self) -> list:
+        """Пары (верхняя граница, число наблюдений не больше нее)."""
+        result, total = [], 0
+        for bound, count in zip(self.bounds + (float("inf"),), self._counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+    def as_dict(self) -> dict:
+        return {
+            "buckets": {("+Inf" if bound == float("inf") else str(bound)): total
+                        for bound, total in self.cumulative()},
+            "count": self.count,
+            "sum": round(self.sum, 6),
+        }
@@ -0,0 +1,152 @@
+import time
+
+from fastapi import HTTPException
+from starlette.datastructures import MutableHeaders
+from starlette.requests import cookie_parser
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core import prometheus
+from app.db import slow_query
+from app.db.replicas import begin_request
+
+_BODY_METHODS = {"POST", "PUT", "PATCH"}
+
+
+class MaxBodySizeMiddleware:
+    """
+    Ограничивает размер тела запроса прямо во время приема.
+    Запросы с заведомо большим Content-Length отклоняются сразу,
+    а при потоковой передаче без него — как только лимит превышен,
+    не дожидаясь, пока Starlette сохранит все тело во временный файл.
+    """
+
+    def __init__(self, app: ASGIApp, max_body_size: int):
+        self.app = app
+        self.max_body_size = max_body_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] not in _BODY_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        content_length = headers.get(b"content-length")
+        if content_length is not None and content_length.isdigit() \
+                and int(content_length) > self.max_body_size:
+            response = JSONResponse({"detail": "Request body too large"}, status_code=413)
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_body_size:
+                    # FastAPI пробрасывает HTTPException из разбора тела как есть
+                    raise HTTPException(status_code=413, detail="Request body too large")
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+
+class ReadYourWritesMiddleware:
+    """
+    Read-your-writes при чтении с реплик. Если запрос что-то записал
+    в основную БД, клиенту ставится cookie со временем окончания
+    «прилипания»; пока оно не истекло, чтения этого клиента в любом
+    воркере идут в основную БД, а не на реплику, которая могла не успеть
+    получить его изменения.
+    """
+
+    def __init__(self, app: ASGIApp, sticky_seconds: float, cookie_name: str = "db_primary_until"):
+        self.app = app
+        self.sticky_seconds = sticky_seconds
+        self.cookie_name = cookie_name
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        sticky = False
+        for name, value in scope["headers"]:
+            if name == b"cookie":
+                until = cookie_parser(value.decode("latin-1")).get(self.cookie_name, "")
+                sticky = until.isdigit() and int(until) > time.time()
+                break
+        routing = begin_request(sticky)
+
+        async def send_with_cookie(message: Message) -> None:
+            if message["type"] == "http.response.start" and routing.wrote:
+                until = int(time.time() + self.sticky_seconds) + 1
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "set-cookie",
+                    f"{self.cookie_name}={until}; Max-Age={int(self.sticky_seconds) + 1}; "
+                    f"Path=/; HttpOnly; SameSite=lax",
+                )
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
+
+
+
+class MetricsMiddleware:
+    """
+    Считает HTTP-запросы и их длительность по шаблону маршрута
+    (`/api/paintings/{painting_id}`, а не конкретный адрес) и статусу,
+    а также число и суммарное время запросов к БД на каждый HTTP-запрос.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        root_path = scope.get("root_path", "")
+        status_code = 500
+        db_stats = prometheus.begin_request()
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            if route is not None:
+                label = route.path
+            elif scope.get("root_path", "") != root_path:
+                # Смонтированное приложение (статика) — по префиксу монтирования
+                label = scope["root_path"][len(root_path):]
+            else:
+                # Не найденные адреса в одну метку, чтобы не плодить ряды
+                label = "__unmatched__"
+            prometheus.observe_request(
+                scope["method"], label, status_code, time.perf_counter() - started, db_stats
+            )
+
+
+
+class SlowQueryMiddleware:
+    """Запоминает запрос, чтобы журнал медленных запросов знал их маршрут."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http":
+            slow_query.begin_request(scope)
+        await self.app(scope, receive, send)
@@ -0,0 +1,66 @@
+import base64
+import binascii
+import json
+from decimal import Decimal, InvalidOperation
+from typing import Any, Tuple
+
+
+# Поля, по которым разрешена сортировка каталога.
+# Префикс "-" означает сортировку по убыванию.
+SORT_FIELDS = ("id", "title", "width", "height")
+
+# Числовые поля хранятся как Numeric, поэтому в курсоре держим их строкой,
+# чтобы не терять точность при переходе через float.
+_DECIMAL_FIELDS = ("width", "height")
+
+
+class InvalidCursorError(ValueError):
+    """Курсор поврежден или не соответствует запрошенной сортировке."""
+
+
+def parse_sort(sort: str) -> Tuple[str, bool]:
+    """Разбирает строку сортировки на (имя поля, по убыванию ли)."""
+    descending = sort.startswith("-")
+    field = sort[1:] if descending else sort
+    if field not in SORT_FIELDS:
+        raise ValueError(f"Unsupported sort field: {field}")
+    return field, descending
+
+
+def encode_cursor(sort: str, key: Any, last_id: int) -> str:
+    """
+    Упаковывает позицию последней записи страницы в непрозрачную строку.
+    Клиент просто передает ее обратно в параметре `cursor`.
+    """
+    field, _ = parse_sort(sort)
+    if field in _DECIMAL_FIELDS:
+        key = str(key)
+    payload = json.dumps({"s": sort, "k": key, "i": last_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str, sort: str) -> Tuple[Any, int]:
+    """Распаковывает курсор и возвращает (значение ключа сортировки, id)."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        cursor_sort, key, last_id = data["s"], data["k"], int(data["i"])
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise InvalidCursorError("Malformed cursor")
+
+    # Курсор от одной сортировки бессмысленен для другой
+    if cursor_sort != sort:
+        raise InvalidCursorError("Cursor does not match the requested sort order")
+
+    field, _ = parse_sort(sort)
+    try:
+        if field in _DECIMAL_FIELDS:
+            key = Decimal(key)
+        elif field == "id":
+            key = int(key)
+        elif not isinstance(key, str):
+            raise InvalidCursorError("Malformed cursor")
+    except (InvalidOperation, ValueError, TypeError):
+        raise InvalidCursorError("Malformed cursor")
+
+    return key, last_id
@@ -0,0 +1,115 @@
+"""
+Метрики в формате Prometheus: запросы к API по шаблону маршрута и статусу,
+запросы к БД — по отдельности и в сумме на один HTTP-запрос.
+
+Под несколькими воркерами uvicorn каждый процесс считает свое, поэтому
+перед запуском нужно задать переменную окружения PROMETHEUS_MULTIPROC_DIR
+(пустой каталог, очищаемый при каждом старте сервиса): процессы пишут
+значения туда, а /metrics собирает их из всех процессов.
+"""
+import os
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Optional
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest, multiprocess,
+)
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+REQUESTS = Counter(
+    "http_requests_total", "HTTP requests", ["method", "route", "status"],
+)
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP request latency", ["method", "route", "status"],
+)
+DB_QUERY_LATENCY = Histogram(
+    "db_query_duration_seconds", "Duration of a single SQL statement", ["statement"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+DB_QUERIES_PER_REQUEST = Histogram(
+    "http_request_db_queries", "SQL statements executed per HTTP request", ["method", "route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 50, 100),
+)
+DB_TIME_PER_REQUEST = Histogram(
+    "http_request_db_duration_seconds", "Time spent in SQL statements per HTTP request", ["method", "route"],
+)
+
+# Метка statement — первое слово запроса; все прочее попадает в "other",
+# чтобы число рядов метрики оставалось ограниченным
+_STATEMENT_KINDS = {"select", "insert", "update", "delete", "with"}
+
+
+@dataclass
+class RequestDbStats:
+    """Запросы к БД, выполненные в рамках одного HTTP-запроса."""
+    queries: int = 0
+    seconds: float = 0.0
+
+
+_request_db_stats: ContextVar[Optional[RequestDbStats]] = ContextVar("request_db_stats", default=None)
+
+
+def begin_request() -> RequestDbStats:
+    """Вызывается в начале HTTP-запроса (MetricsMiddleware)."""
+    stats = RequestDbStats()
+    _request_db_stats.set(stats)
+    return stats
+
+
+def _statement_kind(statement: str) -> str:
+    words = statement.split(None, 1)
+    kind = words[0].lower() if words else ""
+    return kind if kind in _STATEMENT_KINDS else "other"
+
+
+def instrument_queries(engine: AsyncEngine) -> None:
+    """Засекает время каждого SQL-запроса движка."""
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started_at"].pop()
+        DB_QUERY_LATENCY.labels(_statement_kind(statement)).observe(elapsed)
+        stats = _request_db_stats.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.seconds += elapsed
+
+    @event.listens_for(sync_engine, "handle_error")
+    def handle_error(exception_context):
+        # При ошибке after_cursor_execute не вызывается — убираем время старта
+        started = exception_context.connection.info.get("query_started_at") \
+            if exception_context.connection is not None else None
+        if started:
+            started.pop()
+
+
+def observe_request(method: str, route: str, status: int, seconds: float, db: RequestDbStats) -> None:
+    status_label = str(status)
+    REQUESTS.labels(method, route, status_label).inc()
+    REQUEST_LATENCY.labels(method, route, status_label).observe(seconds)
+    DB_QUERIES_PER_REQUEST.labels(method, route).observe(db.queries)
+    DB_TIME_PER_REQUEST.labels(method, route).observe(db.seconds)
+
+
+def render_metrics() -> bytes:
+    """Текст для /metrics: из всех процессов или только из этого."""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
+
+
+def mark_process_dead() -> None:
+    """Вызывается при остановке воркера в режиме нескольких процессов."""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        multiprocess.mark_process_dead(os.getpid())
+
@@ -1,26 +1,56 @@
+import asyncio
+import secrets
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Union, Any
+from typing import Any, Dict, Optional, Union
 from jose import jwt
 from passlib.context import CryptContext
 
+from app.core.cache import LRUTTLCache
 from app.core.config import settings
 
 # Контекст для хэширования паролей. Используем bcrypt.
 password_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# bcrypt занимает десятки миллисекунд CPU и отпускает GIL, поэтому считаем его
+# в отдельном небольшом пуле потоков, а не в event loop и не в общем пуле Starlette.
+_password_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_THREADS, thread_name_prefix="password-hash"
+)
+# Сколько проверок сейчас выполняется или ждет в очереди пула
+_pending_hashes = 0
+# Хэш случайного пароля для проверок по несуществующим пользователям
+_dummy_hash: Optional[str] = None
+_dummy_hash_lock = asyncio.Lock()
 
-def create_access_token(subject: Union[str, Any], expires_delta: timedelta = None) -> str:
-    """Создает JWT токен."""
+
+class PasswordHashBusyError(RuntimeError):
+    """Очередь проверок паролей переполнена (PASSWORD_HASH_MAX_PENDING)."""
+
+
+def create_access_token(
+        subject: Union[str, Any], expires_delta: timedelta = None, claims: Optional[Dict[str, Any]] = None
+) -> str:
+    """
+    Создает JWT токен. `claims` — дополнительные поля, например id пользователя,
+    признак суперпользователя и версия токенов (см. login_for_access_token).
+    """
     if expires_delta:
         expire = datetime.now(timezone.utc) + expires_delta
     else:
         expire = datetime.now(timezone.utc) + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
 
-    to_encode = {"exp": expire, "sub": str(subject)}
+    to_encode = {**(claims or {}), "exp": expire, "sub": str(subject)}
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm="HS256")
     return encoded_jwt
 
 
+def decode_access_token(token: str) -> Dict[str, Any]:
+    """Проверяет подпись и срок действия токена и возвращает его содержимое."""
+    return jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
+
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Проверяет, соответствует ли обычный пароль хэшу."""
     return password_context.verify(plain_password, hashed_password)
@@ -28,4 +58,110 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 
 def get_password_hash(password: str) -> str:
     """Возвращает хэш для пароля."""
-    return password_context.hash(password)
\ No newline at end of file
+    return password_context.hash(password)
+
+
+async def _run_password_job(fn, *args):
+    """
+    Выполняет функцию bcrypt в пуле паролей. Если в очереди уже
+    PASSWORD_HASH_MAX_PENDING задач, сразу отказывает: иначе поток попыток
+    входа растягивал бы очередь и время ответа без ограничения.
+    """
+    global _pending_hashes
+    if _pending_hashes >= settings.PASSWORD_HASH_MAX_PENDING:
+        raise PasswordHashBusyError("Too many concurrent password checks")
+    _pending_hashes += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_password_executor, fn, *args)
+    finally:
+        _pending_hashes -= 1
+
+
+async def get_password_hash_async(password: str) -> str:
+    """Асинхронный вариант `get_password_hash` для кода внутри event loop."""
+    return await _run_password_job(get_password_hash, password)
+
+
+async def init_dummy_hash() -> None:
+    """
+    Считает фиктивный хэш для `verify_password_async` один раз.
+    Вызывается при запуске приложения; без этого первые одновременные
+    входы несуществующих пользователей ждали бы один общий расчет.
+    """
+    global _dummy_hash
+    async with _dummy_hash_lock:
+        if _dummy_hash is None:
+            _dummy_hash = await get_password_hash_async(secrets.token_urlsafe(16))
+
+
+async def verify_password_async(plain_password: str, hashed_password: Optional[str]) -> bool:
+    """
+    Проверяет пароль в пуле потоков, не блокируя event loop.
+    Если хэша нет (пользователь не найден), сверяет пароль с фиктивным хэшем
+    той же стоимости и возвращает False: по времени ответа нельзя понять,
+    существует ли такой пользователь.
+    """
+    if hashed_password is None:
+        if _dummy_hash is None:
+            await init_dummy_hash()
+        await _run_password_job(verify_password, plain_password, _dummy_hash)
+        return False
+    return await _run_password_job(verify_password, plain_password, hashed_password)
+
+
+class LoginAttemptLimiter:
+    """
+    Считает неудачные попытки входа отдельно по имени пользователя и по IP
+    в окне `window` секунд с первой неудачи. Пока счетчик на пределе,
+    вход отклоняется без проверки пароля, так что перебор не тратит CPU на bcrypt.
+    Счетчики живут в памяти процесса; у каждого воркера свои.
+    """
+
+    def __init__(
+            self,
+            *,
+            max_per_username: int,
+            max_per_ip: int,
+            window: float,
+            maxsize: int = 10_000,
+            clock=time.monotonic,
+    ):
+        self.window = window
+        self._limits = {"username": max_per_username, "ip": max_per_ip}
+        self._clock = clock
+        # Значение — (число неудач, конец окна); запись живет до конца окна
+        self._failures = LRUTTLCache(maxsize=maxsize, ttl=window, clock=clock)
+
+    @staticmethod
+    def _keys(username: str, ip: Optional[str]):
+        keys = [("username", username)]
+        if ip:
+            keys.append(("ip", ip))
+        return keys
+
+    def retry_after(self, username: str, ip: Optional[str]) -> Optional[float]:
+        """Через сколько секунд можно пробовать снова; None — можно сейчас."""
+        now = self._clock()
+        waits = []
+        for key in self._keys(username, ip):
+            count, window_end = self._failures.get(key, (0, now))
+            if count >= self._limits[key[0]]:
+                waits.append(window_end - now)
+        return max(waits) if waits else None
+
+    def record_failure(self, username: str, ip: Optional[str]) -> None:
+        now = self._clock()
+        for key in self._keys(username, ip):
+            count, window_end = self._failures.get(key, (0, now + self.window))
+            self._failures.set(key, (count + 1, window_end), ttl=window_end - now)
+
+    def reset(self, username: str) -> None:
+        """Успешный вход обнуляет счетчик по имени (но не по IP)."""
+        self._failures.delete(("username", username))
+
+
+login_limiter = LoginAttemptLimiter(
+    max_per_username=settings.LOGIN_MAX_FAILURES_PER_USERNAME,
+    max_per_ip=settings.LOGIN_MAX_FAILURES_PER_IP,
+    window=settings.LOGIN_FAILURE_WINDOW_SECONDS,
+)
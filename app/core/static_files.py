@@ -0,0 +1,47 @@
+import os
+
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse
+from starlette.types import Scope
+
+# Содержимое под именем-хэшем никогда не меняется, поэтому кэшируем навсегда
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+class ImmutableStaticFiles(StaticFiles):
+    """
+    Раздача неизменяемых файлов (загрузки с именами по хэшу содержимого).
+
+    Поверх обычного StaticFiles добавляет `Cache-Control: public,
+    max-age=31536000, immutable`: браузер не перепроверяет файл при каждом
+    показе страницы, заголовок есть и в ответе 304.
+
+    Range-запросы, ETag/Last-Modified и ответ 304 обеспечивает FileResponse.
+    Он же отдает файл через расширение ASGI `http.response.pathsend`
+    (zero-copy sendfile), если сервер его поддерживает.
+    """
+
+    def __init__(self, *args, cache_control: str = IMMUTABLE_CACHE_CONTROL, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cache_control = cache_control
+
+    def file_response(
+            self,
+            full_path,
+            stat_result: os.stat_result,
+            scope: Scope,
+            status_code: int = 200,
+    ) -> Response:
+        request_headers = Headers(scope=scope)
+        response = FileResponse(
+            full_path,
+            status_code=status_code,
+            headers={"Cache-Control": self.cache_control},
+            stat_result=stat_result,
+            method=scope["method"],
+        )
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
@@ -1,4 +1,8 @@
 from .crud_painting import painting
+from .crud_tag import tag
+from .crud_media_file import media_file
 from .crud_feedback import feedback
 from .crud_user_session import user_session
-from .crud_user import user
\ No newline at end of file
+from .crud_user import user
+from .crud_notification import notification
+from .crud_catalog_import import catalog_import
@@ -0,0 +1,59 @@
+from typing import Optional
+
+from pydantic import BaseModel
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.base import CRUDBase
+from app.models.catalog_import import CatalogImport
+
+
+# Записи создает и ведет только скрипт импорта,
+# поэтому отдельных схем создания и обновления нет.
+class CRUDCatalogImport(CRUDBase[CatalogImport, BaseModel, BaseModel]):
+
+    async def get_by_source(self, db: AsyncSession, *, source_sha256: str) -> Optional[CatalogImport]:
+        result = await db.execute(select(self.model).filter(self.model.source_sha256 == source_sha256))
+        return result.scalars().first()
+
+    async def start(
+            self, db: AsyncSession, *, source_sha256: str, source_name: str, total_rows: int, restart: bool = False
+    ) -> CatalogImport:
+        """
+        Возвращает импорт этого файла, создавая его при первом запуске, и коммитит.
+        С `restart` прогресс сбрасывается и файл импортируется заново.
+        """
+        job = await self.get_by_source(db, source_sha256=source_sha256)
+        if job is None:
+            job = self.model(source_sha256=source_sha256, source_name=source_name, total_rows=total_rows)
+            db.add(job)
+        elif restart:
+            job.rows_done = job.rows_skipped = job.paintings_created = 0
+            job.finished_at = None
+        job.source_name = source_name
+        job.total_rows = total_rows
+        await db.commit()
+        await db.refresh(job)
+        return job
+
+    async def advance(self, db: AsyncSession, *, id: int, rows: int, skipped: int, created: int) -> None:
+        """
+        Сдвигает прогресс в текущей транзакции, без коммита:
+        вызывающий код коммитит его вместе с пачкой картин.
+        """
+        await db.execute(
+            update(self.model)
+            .where(self.model.id == id)
+            .values(
+                rows_done=self.model.rows_done + rows,
+                rows_skipped=self.model.rows_skipped + skipped,
+                paintings_created=self.model.paintings_created + created,
+            )
+        )
+
+    async def finish(self, db: AsyncSession, *, id: int) -> None:
+        await db.execute(update(self.model).where(self.model.id == id).values(finished_at=func.now()))
+        await db.commit()
+
+
+catalog_import = CRUDCatalogImport(CatalogImport)
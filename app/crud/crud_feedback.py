@@ -1,10 +1,88 @@
+from typing import Optional
+from sqlalchemy import func, insert, literal, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
 from app.crud.base import CRUDBase
 from app.models.feedback import Feedback
-from app.schemas.feedback import FeedbackCreate
+from app.models.notification import Notification
+from app.models.painting import Painting
+from app.models.user_session import UserSession
+from app.schemas.feedback import FeedbackBase, FeedbackCreate
 from pydantic import BaseModel
 
 # У нас нет схемы для обновления отзыва, поэтому можно использовать BaseModel
 class CRUDFeedback(CRUDBase[Feedback, FeedbackCreate, BaseModel]):
-    pass
 
-feedback = CRUDFeedback(Feedback)
\ No newline at end of file
+    def _create_with_session_statement(self, obj_in: FeedbackBase):
+        """
+        Один запрос с цепочкой CTE: картина -> новая сессия (только если картина есть)
+        -> отзыв с id этой сессии -> запись в outbox уведомлений о новом отзыве.
+        Возвращает строку отзыва.
+        """
+        painting = (
+            select(Painting.id)
+            .where(Painting.id == obj_in.painting_id)
+            .cte("painting")
+        )
+        new_session = (
+            insert(UserSession)
+            .from_select(["created_at"], select(func.now()).select_from(painting))
+            .returning(UserSession.id)
+            .cte("new_session")
+        )
+        new_feedback = (
+            insert(Feedback)
+            .from_select(
+                ["user_name", "phone_number", "painting_id", "user_session_id"],
+                select(
+                    literal(obj_in.user_name),
+                    literal(obj_in.phone_number),
+                    literal(obj_in.painting_id),
+                    new_session.c.id,
+                ),
+            )
+            .returning(*Feedback.__table__.c)
+            .cte("new_feedback")
+        )
+        outbox = (
+            insert(Notification)
+            .from_select(
+                ["kind", "payload"],
+                select(
+                    literal("feedback"),
+                    func.jsonb_build_object(
+                        "feedback_id", new_feedback.c.id,
+                        "painting_id", new_feedback.c.painting_id,
+                        "user_name", new_feedback.c.user_name,
+                        "phone_number", new_feedback.c.phone_number,
+                    ),
+                ),
+                # Остальные колонки заполняет сама БД (server_default)
+                include_defaults=False,
+            )
+            .cte("outbox")
+        )
+        return select(aliased(Feedback, new_feedback)).add_cte(outbox)
+
+    async def create_with_session(self, db: AsyncSession, *, obj_in: FeedbackBase) -> Optional[Feedback]:
+        """
+        Создать сессию пользователя, отзыв и уведомление о нем атомарно,
+        за один запрос к БД. Существование картины проверяется тем же запросом:
+        если картины нет, не вставляется ничего и возвращается None.
+        """
+        try:
+            result = await db.execute(self._create_with_session_statement(obj_in))
+            db_obj = result.scalars().first()
+            if db_obj is not None:
+                # Отсоединяем отзыв, чтобы commit не сбросил его атрибуты:
+                # все поля уже пришли в RETURNING, перечитывать их не нужно
+                db.expunge(db_obj)
+            await db.commit()
+        except IntegrityError:
+            # Картину удалили между проверкой и вставкой отзыва
+            await db.rollback()
+            return None
+        return db_obj
+
+feedback = CRUDFeedback(Feedback)
@@ -0,0 +1,70 @@
+from collections import Counter
+from typing import Dict, Iterable, List
+
+from pydantic import BaseModel
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.base import CRUDBase
+from app.models.media_file import MediaFile
+
+
+def reference_deltas(old_keys: Iterable[str], new_keys: Iterable[str]) -> Dict[str, int]:
+    """На сколько меняется число ссылок на каждый файл при замене набора фото."""
+    deltas = Counter(new_keys or [])
+    deltas.subtract(Counter(old_keys or []))
+    return {key: delta for key, delta in deltas.items() if delta}
+
+
+# Записи создаются только как побочный эффект изменения картин,
+# поэтому отдельных схем создания и обновления нет.
+class CRUDMediaFile(CRUDBase[MediaFile, BaseModel, BaseModel]):
+
+    async def adjust_references(self, db: AsyncSession, deltas: Dict[str, int]) -> None:
+        """
+        Меняет счетчики ссылок в текущей транзакции, без коммита.
+        Записи со счетчиком 0 не удаляются здесь: файлы убирает
+        `release_uploads` уже после коммита изменения картины.
+        """
+        if not deltas:
+            return
+
+        # Одинаковый порядок блокировок исключает взаимные блокировки
+        keys = sorted(deltas)
+        stmt = insert(self.model).values(
+            [{"storage_key": key, "ref_count": deltas[key]} for key in keys]
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[self.model.storage_key],
+            set_={"ref_count": self.model.ref_count + stmt.excluded.ref_count},
+        )
+        await db.execute(stmt)
+
+    async def lock_unreferenced(self, db: AsyncSession, keys: Iterable[str]) -> List[str]:
+        """
+        Блокирует до конца транзакции записи из `keys` со счетчиком 0
+        и возвращает их ключи. Ключи без записи мусором не считаются:
+        запись создается раньше, чем файл попадает в хранилище.
+        """
+        keys = sorted(set(keys))
+        if not keys:
+            return []
+
+        column = self.model.storage_key
+        result = await db.execute(
+            select(column)
+            .where(column.in_(keys), self.model.ref_count <= 0)
+            .order_by(column)
+            .with_for_update()
+        )
+        return list(result.scalars().all())
+
+    async def remove_keys(self, db: AsyncSession, keys: Iterable[str]) -> None:
+        """Удаляет учетные записи файлов без коммита."""
+        keys = list(keys)
+        if keys:
+            await db.execute(delete(self.model).where(self.model.storage_key.in_(keys)))
+
+
+media_file = CRUDMediaFile(MediaFile)
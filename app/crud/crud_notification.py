@@ -0,0 +1,99 @@
+from typing import Iterable, List, Optional
+
+from pydantic import BaseModel
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.base import CRUDBase
+from app.models.notification import Notification
+
+
+# Уведомления создаются только вместе с событиями (см. crud_feedback),
+# поэтому отдельных схем создания и обновления нет.
+class CRUDNotification(CRUDBase[Notification, BaseModel, BaseModel]):
+
+    async def claim_batch(
+            self, db: AsyncSession, *, limit: int, lease_seconds: float, max_attempts: int
+    ) -> List[Notification]:
+        """
+        Забирает до `limit` готовых к отправке уведомлений и коммитит.
+        Строки выбираются с FOR UPDATE SKIP LOCKED, так что параллельные
+        диспетчеры не получают одно и то же, и сразу арендуются на
+        `lease_seconds`: если диспетчер упадет, не отметив результат,
+        после аренды уведомление будет отправлено повторно.
+        """
+        claimable = (
+            select(self.model.id)
+            .where(
+                self.model.sent_at.is_(None),
+                self.model.next_attempt_at <= func.now(),
+                self.model.attempts < max_attempts,
+            )
+            .order_by(self.model.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        stmt = (
+            update(self.model)
+            .where(self.model.id.in_(claimable.scalar_subquery()))
+            .values(next_attempt_at=func.now() + func.make_interval(0, 0, 0, 0, 0, 0, lease_seconds))
+            .returning(self.model)
+            .execution_options(synchronize_session=False)
+        )
+        result = await db.execute(stmt)
+        notifications = sorted(result.scalars().all(), key=lambda n: n.id)
+        # Отдаем отсоединенными: после commit атрибуты не будут перечитываться
+        for notification in notifications:
+            db.expunge(notification)
+        await db.commit()
+        return notifications
+
+    async def mark_sent(self, db: AsyncSession, ids: Iterable[int]) -> None:
+        await db.execute(
+            update(self.model)
+            .where(self.model.id.in_(list(ids)))
+            .values(sent_at=func.now(), last_error=None)
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+
+    async def mark_failed(
+            self,
+            db: AsyncSession,
+            ids: Iterable[int],
+            *,
+            error: str,
+            retry_base: float,
+            retry_max: float,
+            retry_after: Optional[float] = None,
+    ) -> None:
+        """
+        Откладывает повтор. По умолчанию — экспоненциально по числу попыток
+        (retry_base, 2×retry_base, ... не больше retry_max) со случайным
+        разбросом до 20%, чтобы повторы не собирались в одну волну.
+        `retry_after` — задержка, которую назвал сам Telegram: это ограничение
+        скорости, а не сбой, и попытка в таком случае не засчитывается.
+        """
+        if retry_after is not None:
+            values = dict(
+                next_attempt_at=func.now() + func.make_interval(0, 0, 0, 0, 0, 0, retry_after),
+                last_error=error,
+            )
+        else:
+            attempts = self.model.attempts + 1
+            delay = func.least(retry_base * func.power(2, attempts - 1), retry_max) * (1 + func.random() * 0.2)
+            values = dict(
+                attempts=attempts,
+                next_attempt_at=func.now() + func.make_interval(0, 0, 0, 0, 0, 0, delay),
+                last_error=error,
+            )
+        await db.execute(
+            update(self.model)
+            .where(self.model.id.in_(list(ids)))
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+
+
+notification = CRUDNotification(Notification)
@@ -1,13 +1,285 @@
-from typing import List, Optional
+from collections import Counter
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+from fastapi.encoders import jsonable_encoder
+from app.core.pagination import decode_cursor, encode_cursor, parse_sort
 from app.crud.base import CRUDBase
+from app.crud.crud_media_file import media_file as crud_media_file, reference_deltas
+from app.crud.crud_tag import tag as crud_tag, tag_deltas
+from app.models.feedback import Feedback
 from app.models.painting import Painting
-from app.schemas.painting import PaintingCreate, PaintingUpdate
-from sqlalchemy import select, func
+from app.schemas.painting import (
+    PaintingBatchItemResult, PaintingBatchOperation, PaintingCreate, PaintingFacets, PaintingUpdate,
+    PatchBatchOperation, SizeBucket, TagFacet,
+)
+from sqlalchemy import (
+    Integer, Numeric, Row, any_, bindparam, delete, distinct, null, or_, select, func, literal, literal_column,
+    text, true, tuple_, union_all, update,
+)
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only
+
+# Промежуточная таблица массового импорта. Живет до конца транзакции
+# и видна только своему соединению, поэтому импорты не мешают друг другу.
+_STAGING_TABLE = "painting_import_staging"
+_STAGING_COLUMNS = ("row_no", "title", "width", "height", "tags", "description", "photo_filenames")
+_CREATE_STAGING_SQL = text(f"""
+    CREATE TEMP TABLE {_STAGING_TABLE} (
+        row_no integer NOT NULL,
+        title varchar(255) NOT NULL,
+        width numeric(10, 2) NOT NULL,
+        height numeric(10, 2) NOT NULL,
+        tags varchar[] NOT NULL,
+        description text,
+        photo_filenames varchar[] NOT NULL
+    ) ON COMMIT DROP
+""")
+_INSERT_STAGED_SQL = text(f"""
+    INSERT INTO paintings (title, width, height, tags, description, photo_filenames)
+    SELECT title, width, height, tags, description, photo_filenames
+    FROM {_STAGING_TABLE}
+    ORDER BY row_no
+""")
+# Счетчики тегов и ссылок на файлы — одним запросом на всю пачку, по тем же
+# правилам, что tag_deltas (повтор тега в картине — один раз) и reference_deltas
+_COUNT_STAGED_TAGS_SQL = text(f"""
+    INSERT INTO tags (name, painting_count)
+    SELECT tag, count(DISTINCT row_no)
+    FROM {_STAGING_TABLE}, unnest(tags) AS tag
+    GROUP BY tag
+    ORDER BY tag
+    ON CONFLICT (name) DO UPDATE SET painting_count = tags.painting_count + EXCLUDED.painting_count
+""")
+_COUNT_STAGED_MEDIA_SQL = text(f"""
+    INSERT INTO mediafiles (storage_key, ref_count)
+    SELECT storage_key, count(*)
+    FROM {_STAGING_TABLE}, unnest(photo_filenames) AS storage_key
+    GROUP BY storage_key
+    ORDER BY storage_key
+    ON CONFLICT (storage_key) DO UPDATE SET ref_count = mediafiles.ref_count + EXCLUDED.ref_count
+""")
+
+# Пакетные изменения: все затрагиваемые картины блокируются одним запросом
+# в порядке id (без взаимных блокировок), заодно читается их исходное состояние
+_LOCK_BATCH_SQL = text("""
+    SELECT id, tags, photo_filenames FROM paintings
+    WHERE id = ANY(CAST(:ids AS integer[]))
+    ORDER BY id
+    FOR UPDATE
+""")
+# Теги добавляются в конец в переданном порядке, уже имеющиеся не дублируются;
+# картины, у которых все теги уже есть, не трогаются
+_ADD_TAGS_SQL = text("""
+    UPDATE paintings
+    SET tags = paintings.tags || ARRAY(
+            SELECT tag FROM unnest(CAST(:tags AS varchar[])) WITH ORDINALITY AS added(tag, position)
+            WHERE tag <> ALL(paintings.tags)
+            ORDER BY position
+        ),
+        updated_at = now()
+    WHERE id = ANY(CAST(:ids AS integer[])) AND NOT paintings.tags @> CAST(:tags AS varchar[])
+    RETURNING id, tags, photo_filenames
+""")
+_REMOVE_TAGS_SQL = text("""
+    UPDATE paintings
+    SET tags = ARRAY(
+            SELECT tag FROM unnest(paintings.tags) WITH ORDINALITY AS kept(tag, position)
+            WHERE tag <> ALL(CAST(:tags AS varchar[]))
+            ORDER BY position
+        ),
+        updated_at = now()
+    WHERE id = ANY(CAST(:ids AS integer[])) AND paintings.tags && CAST(:tags AS varchar[])
+    RETURNING id, tags, photo_filenames
+""")
+_TAG_OPERATIONS = {"add_tags": _ADD_TAGS_SQL, "remove_tags": _REMOVE_TAGS_SQL}
 
 
 class CRUDPainting(CRUDBase[Painting, PaintingCreate, PaintingUpdate]):
 
+    # create/update/remove переопределены, чтобы справочник тегов и учет ссылок
+    # на файлы менялись в той же транзакции, что и сама картина.
+
+    async def get_for_update(self, db: AsyncSession, *, id: int) -> Optional[Painting]:
+        """
+        Картина, заблокированная до конца транзакции, с состоянием, перечитанным
+        под блокировкой (даже если объект уже загружен в сессию). Изменения
+        считают разницу тегов и файлов от исходного состояния, поэтому две
+        одновременные правки одной картины должны выполняться по очереди.
+        """
+        result = await db.execute(
+            select(self.model)
+            .where(self.model.id == id)
+            .with_for_update()
+            .execution_options(populate_existing=True)
+        )
+        return result.scalars().first()
+
+    async def create(self, db: AsyncSession, *, obj_in: PaintingCreate) -> Painting:
+        """Создать картину и учесть ее теги в справочнике."""
+        db_obj = self.model(**jsonable_encoder(obj_in))
+        db.add(db_obj)
+        await crud_tag.adjust_counts(db, tag_deltas([], db_obj.tags))
+        await crud_media_file.adjust_references(db, reference_deltas([], db_obj.photo_filenames))
+        await db.commit()
+        await db.refresh(db_obj)
+        return db_obj
+
+    async def update(
+            self,
+            db: AsyncSession,
+            *,
+            db_obj: Painting,
+            obj_in: Union[PaintingUpdate, Dict[str, Any]]
+    ) -> Painting:
+        """
+        Обновить картину и скорректировать счетчики измененных тегов и файлов.
+        `db_obj` должен быть получен через `get_for_update` в этой же транзакции.
+        """
+        old_tags = list(db_obj.tags or [])
+        old_photos = list(db_obj.photo_filenames or [])
+        obj_data = jsonable_encoder(db_obj)
+        if isinstance(obj_in, dict):
+            update_data = obj_in
+        else:
+            update_data = obj_in.dict(exclude_unset=True)
+
+        for field in obj_data:
+            if field in update_data:
+                setattr(db_obj, field, update_data[field])
+
+        db.add(db_obj)
+        await crud_tag.adjust_counts(db, tag_deltas(old_tags, db_obj.tags))
+        await crud_media_file.adjust_references(db, reference_deltas(old_photos, db_obj.photo_filenames))
+        await db.commit()
+        await db.refresh(db_obj)
+        return db_obj
+
+    async def remove(self, db: AsyncSession, *, id: int) -> Painting:
+        """Удалить картину и уменьшить счетчики ее тегов и файлов."""
+        obj = await self.get_for_update(db, id=id)
+        if obj:
+            await crud_tag.adjust_counts(db, tag_deltas(obj.tags, []))
+            await crud_media_file.adjust_references(db, reference_deltas(obj.photo_filenames, []))
+            await db.delete(obj)
+            await db.commit()
+        return obj
+
+    async def bulk_create(self, db: AsyncSession, rows: Sequence[PaintingCreate]) -> int:
+        """
+        Массовое создание картин в текущей транзакции, без коммита.
+        Строки передаются через COPY во временную таблицу, откуда одним
+        INSERT ... SELECT попадают в paintings в исходном порядке; справочник
+        тегов и учет ссылок на файлы обновляются по пачке целиком.
+        Вызывается не больше одного раза за транзакцию. Возвращает число картин.
+        """
+        if not rows:
+            return 0
+
+        await db.execute(_CREATE_STAGING_SQL)
+        # COPY есть только в драйвере: берем соединение asyncpg внутри уже начатой транзакции
+        connection = await db.connection()
+        raw_connection = await connection.get_raw_connection()
+        await raw_connection.driver_connection.copy_records_to_table(
+            _STAGING_TABLE,
+            columns=_STAGING_COLUMNS,
+            records=[
+                (
+                    row_no, row.title, Decimal(str(row.width)), Decimal(str(row.height)),
+                    row.tags, row.description, row.photo_filenames,
+                )
+                for row_no, row in enumerate(rows)
+            ],
+        )
+        result = await db.execute(_INSERT_STAGED_SQL)
+        await db.execute(_COUNT_STAGED_TAGS_SQL)
+        await db.execute(_COUNT_STAGED_MEDIA_SQL)
+        return result.rowcount
+
+    def _patch_statement(self, operation: PatchBatchOperation, ids: List[int]):
+        """
+        UPDATE с одинаковыми значениями для всех `ids` (None — если менять нечего).
+        Картины, у которых поля уже такие, не меняются, и updated_at у них не сдвигается.
+        """
+        values = operation.fields.model_dump(exclude_none=True)
+        if not values:
+            return None
+        if "tags" in values:
+            values["tags"] = _unique(values["tags"])
+        changed = or_(*(getattr(self.model, name).is_distinct_from(value) for name, value in values.items()))
+        return (
+            update(self.model)
+            .where(self.model.id == any_(bindparam("ids", ids, type_=ARRAY(Integer))), changed)
+            .values(**values, updated_at=func.now())
+            .returning(self.model.id, self.model.tags, self.model.photo_filenames)
+        )
+
+    async def apply_batch(
+            self, db: AsyncSession, operations: Sequence[PaintingBatchOperation]
+    ) -> Tuple[List[PaintingBatchItemResult], List[str]]:
+        """
+        Применяет операции по порядку в одной транзакции и коммитит.
+        Каждая операция — один UPDATE/DELETE по `id = ANY(...)` сразу для всех
+        своих картин; справочник тегов и учет ссылок на файлы обновляются
+        в конце одним запросом каждый, по итоговому состоянию картин.
+        Возвращает результаты операций и ключи файлов, на которые стало
+        меньше ссылок: их освобождает вызывающий код после коммита.
+        """
+        all_ids = sorted({id for operation in operations for id in operation.ids})
+        rows = (await db.execute(_LOCK_BATCH_SQL, {"ids": all_ids})).all()
+        before = {row.id: (row.tags, row.photo_filenames) for row in rows}
+        # Текущее состояние картин; None — удалена в этом пакете
+        state: Dict[int, Optional[Tuple[List[str], List[str]]]] = dict(before)
+
+        results = []
+        for index, operation in enumerate(operations):
+            ids = sorted(set(operation.ids))
+            present = [id for id in ids if state.get(id) is not None]
+            applied: List[int] = []
+            if present:
+                if operation.op == "delete":
+                    await db.execute(delete(Feedback).where(
+                        Feedback.painting_id == any_(bindparam("ids", present, type_=ARRAY(Integer)))
+                    ))
+                    result = await db.execute(
+                        delete(self.model)
+                        .where(self.model.id == any_(bindparam("ids", present, type_=ARRAY(Integer))))
+                        .returning(self.model.id)
+                    )
+                    applied = sorted(result.scalars().all())
+                    state.update({id: None for id in applied})
+                else:
+                    if operation.op == "patch":
+                        statement = self._patch_statement(operation, present)
+                        changed = (await db.execute(statement)).all() if statement is not None else []
+                    else:
+                        changed = (await db.execute(
+                            _TAG_OPERATIONS[operation.op], {"ids": present, "tags": _unique(operation.tags)}
+                        )).all()
+                    state.update({row.id: (row.tags, row.photo_filenames) for row in changed})
+                    applied = sorted(row.id for row in changed)
+            results.append(PaintingBatchItemResult(
+                index=index,
+                op=operation.op,
+                applied=applied,
+                unchanged=sorted(set(present) - set(applied)),
+                not_found=sorted(set(ids) - set(present)),
+            ))
+
+        tag_changes: Counter = Counter()
+        reference_changes: Counter = Counter()
+        for id, (old_tags, old_photos) in before.items():
+            new_tags, new_photos = state[id] or ([], [])
+            tag_changes.update(tag_deltas(old_tags, new_tags))
+            reference_changes.update(reference_deltas(old_photos, new_photos))
+        await crud_tag.adjust_counts(db, {name: delta for name, delta in tag_changes.items() if delta})
+        await crud_media_file.adjust_references(
+            db, {key: delta for key, delta in reference_changes.items() if delta}
+        )
+        await db.commit()
+        return results, sorted(key for key, delta in reference_changes.items() if delta < 0)
+
     def _apply_filters(
             self,
             query,  # Объект запроса SQLAlchemy
@@ -42,12 +314,48 @@ class CRUDPainting(CRUDBase[Painting, PaintingCreate, PaintingUpdate]):
 
         return query
 
+    def _apply_keyset(self, query, *, sort: str, cursor: Optional[str] = None):
+        """
+        Применяет сортировку по (ключ сортировки, id) и, если передан курсор,
+        условие "строго после последней записи предыдущей страницы".
+        В отличие от OFFSET, такой запрос идет по индексу сразу к нужной позиции.
+        """
+        field, descending = parse_sort(sort)
+        column = getattr(self.model, field)
+
+        if cursor is not None:
+            last_key, last_id = decode_cursor(cursor, sort)
+            if field == "id":
+                current, last = self.model.id, literal(last_id)
+            else:
+                # Сравнение кортежей (title, id) > ('...', 42) в PostgreSQL
+                # использует составной индекс и корректно разруливает дубли.
+                current = tuple_(column, self.model.id)
+                last = tuple_(literal(last_key), literal(last_id))
+            query = query.filter(current < last if descending else current > last)
+
+        if field == "id":
+            order = [column.desc() if descending else column.asc()]
+        elif descending:
+            order = [column.desc(), self.model.id.desc()]
+        else:
+            order = [column.asc(), self.model.id.asc()]
+        return query.order_by(*order)
+
+    def make_cursor(self, painting: Painting, *, sort: str = "id") -> str:
+        """Строит курсор, указывающий на позицию сразу после `painting`."""
+        field, _ = parse_sort(sort)
+        return encode_cursor(sort, getattr(painting, field), painting.id)
+
     async def get_multi_filtered(
             self,
             db: AsyncSession,
             *,
             skip: int = 0,
             limit: int = 12,
+            sort: str = "id",
+            cursor: Optional[str] = None,
+            columns: Optional[Sequence[str]] = None,
             title: Optional[str] = None,
             tags: Optional[List[str]] = None,
             width_min: Optional[float] = None,
@@ -55,18 +363,128 @@ class CRUDPainting(CRUDBase[Painting, PaintingCreate, PaintingUpdate]):
             height_min: Optional[float] = None,
             height_max: Optional[float] = None,
     ) -> List[Painting]:
-        """Получить список картин с фильтрацией и пагинацией."""
-        query = select(self.model)
-        query = self._apply_filters(
-            query, title=title, tags=tags,
+        """
+        Получить список картин с фильтрацией и пагинацией.
+        Если передан `cursor`, используется keyset-пагинация и `skip` игнорируется.
+        `columns` ограничивает набор читаемых колонок (см. `_page_query`).
+        """
+        query = self._page_query(
+            select(self.model), skip=skip, limit=limit, sort=sort, cursor=cursor, columns=columns,
+            title=title, tags=tags,
             width_min=width_min, width_max=width_max,
             height_min=height_min, height_max=height_max
         )
-
-        query = query.order_by(self.model.id).offset(skip).limit(limit)
         result = await db.execute(query)
         return result.scalars().all()
 
+    async def get_multi_filtered_with_total(
+            self,
+            db: AsyncSession,
+            *,
+            skip: int = 0,
+            limit: int = 12,
+            sort: str = "id",
+            cursor: Optional[str] = None,
+            estimated: bool = False,
+            columns: Optional[Sequence[str]] = None,
+            title: Optional[str] = None,
+            tags: Optional[List[str]] = None,
+            width_min: Optional[float] = None,
+            width_max: Optional[float] = None,
+            height_min: Optional[float] = None,
+            height_max: Optional[float] = None,
+    ) -> Tuple[List[Painting], int]:
+        """
+        Получить страницу картин и общее количество одним запросом.
+        Общее количество приходит скалярным подзапросом в каждой строке.
+        При `estimated=True` и отсутствии фильтров вместо count(*) читается
+        оценка планировщика из pg_class.
+        """
+        filters = dict(
+            title=title, tags=tags,
+            width_min=width_min, width_max=width_max,
+            height_min=height_min, height_max=height_max
+        )
+        use_estimate = estimated and not self.has_filters(**filters)
+        if use_estimate:
+            total_column = self._estimated_count_column()
+        else:
+            total_query = self._apply_filters(select(func.count(self.model.id)), **filters)
+            total_column = total_query.scalar_subquery()
+
+        query = self._page_query(
+            select(self.model, total_column.label("total")),
+            skip=skip, limit=limit, sort=sort, cursor=cursor, columns=columns, **filters
+        )
+        rows = (await db.execute(query)).all()
+        if rows:
+            total = rows[0].total
+            # reltuples = -1, если таблицу еще ни разу не анализировали
+            if total is not None and total >= 0:
+                return [row[0] for row in rows], total
+
+        # Пустая страница (например, skip за пределами каталога) не несет total,
+        # поэтому в этом редком случае считаем отдельно.
+        if use_estimate:
+            total = await self.estimate_count(db)
+        if not use_estimate or total < 0:
+            total = await self.count_filtered(db, **filters)
+        return [row[0] for row in rows], total
+
+    def has_filters(
+            self,
+            *,
+            title: Optional[str] = None,
+            tags: Optional[List[str]] = None,
+            width_min: Optional[float] = None,
+            width_max: Optional[float] = None,
+            height_min: Optional[float] = None,
+            height_max: Optional[float] = None,
+    ) -> bool:
+        """Проверяет, задан ли хотя бы один фильтр (по тем же правилам, что и `_apply_filters`)."""
+        return bool(title) or bool(tags) or any(
+            value is not None for value in (width_min, width_max, height_min, height_max)
+        )
+
+    def _page_query(
+            self,
+            query,
+            *,
+            skip: int,
+            limit: int,
+            sort: str,
+            cursor: Optional[str],
+            columns: Optional[Sequence[str]] = None,
+            **filters,
+    ):
+        """
+        Добавляет к запросу фильтры, сортировку и границы страницы.
+        Если заданы `columns`, из таблицы читаются только они: остальные атрибуты
+        (например, description) остаются незагруженными и обращаться к ним нельзя.
+        """
+        if columns:
+            query = query.options(load_only(*(getattr(self.model, name) for name in columns)))
+        query = self._apply_filters(query, **filters)
+        query = self._apply_keyset(query, sort=sort, cursor=cursor)
+        if cursor is None:
+            query = query.offset(skip)
+        return query.limit(limit)
+
+    def _estimated_count_column(self):
+        """Подзапрос с оценкой числа строк из статистики планировщика."""
+        return literal_column(
+            f"(SELECT reltuples::bigint FROM pg_class "
+            f"WHERE oid = '{self.model.__tablename__}'::regclass)"
+        )
+
+    async def estimate_count(self, db: AsyncSession) -> int:
+        """
+        Приблизительное количество картин без полного сканирования таблицы.
+        Возвращает -1, если статистика еще не собрана.
+        """
+        result = await db.execute(select(self._estimated_count_column()))
+        return result.scalar_one()
+
     async def count_filtered(
             self,
             db: AsyncSession,
@@ -77,8 +495,21 @@ class CRUDPainting(CRUDBase[Painting, PaintingCreate, PaintingUpdate]):
             width_max: Optional[float] = None,
             height_min: Optional[float] = None,
             height_max: Optional[float] = None,
+            estimated: bool = False,
     ) -> int:
-        """Подсчитать количество картин с учетом фильтров."""
+        """
+        Подсчитать количество картин с учетом фильтров.
+        При `estimated=True` и отсутствии фильтров возвращает оценку планировщика.
+        """
+        if estimated and not self.has_filters(
+                title=title, tags=tags,
+                width_min=width_min, width_max=width_max,
+                height_min=height_min, height_max=height_max
+        ):
+            total = await self.estimate_count(db)
+            if total >= 0:
+                return total
+
         # Начинаем с запроса на подсчет
         query = select(func.count(self.model.id))
         query = self._apply_filters(
@@ -90,14 +521,132 @@ class CRUDPainting(CRUDBase[Painting, PaintingCreate, PaintingUpdate]):
         result = await db.execute(query)
         return result.scalar_one()
 
-    async def get_all_tags(self, db: AsyncSession) -> List[str]:
-        """Получает отсортированный список всех уникальных тегов."""
-        query = select(func.distinct(func.unnest(self.model.tags))).order_by(
-            func.unnest(self.model.tags)
+    async def get_facets(
+            self,
+            db: AsyncSession,
+            *,
+            size_edges: Sequence[float],
+            title: Optional[str] = None,
+            tags: Optional[List[str]] = None,
+            width_min: Optional[float] = None,
+            width_max: Optional[float] = None,
+            height_min: Optional[float] = None,
+            height_max: Optional[float] = None,
+    ) -> PaintingFacets:
+        """
+        Фасеты для текущих фильтров одним запросом: количество картин по каждому
+        тегу и по интервалам ширины и высоты с границами `size_edges`.
+        Отфильтрованные картины читаются один раз (CTE), а три группировки
+        объединяются через UNION ALL. Пустые интервалы тоже возвращаются.
+        """
+        filtered = self._apply_filters(
+            select(self.model.id, self.model.tags, self.model.width, self.model.height),
+            title=title, tags=tags,
+            width_min=width_min, width_max=width_max,
+            height_min=height_min, height_max=height_max
+        ).cte("filtered")
+        edges = sorted(size_edges)
+        # width_bucket(x, границы): 0 — меньше первой границы, len(edges) — не меньше последней
+        thresholds = literal([Decimal(str(edge)) for edge in edges], ARRAY(Numeric))
+        unnested = func.unnest(filtered.c.tags).table_valued("tag").render_derived().lateral("unnested")
+        tag = unnested.c.tag
+
+        def size_facet(name: str):
+            bucket = func.width_bucket(filtered.c[name], thresholds)
+            return (
+                select(literal(name).label("facet"), null().label("tag"), bucket.label("bucket"),
+                       func.count().label("count"))
+                .select_from(filtered)
+                .group_by(bucket)
+            )
+
+        query = union_all(
+            # Повтор тега внутри одной картины считается один раз
+            select(literal("tags").label("facet"), tag.label("tag"), literal(None, Integer).label("bucket"),
+                   func.count(distinct(filtered.c.id)).label("count"))
+            .select_from(filtered.join(unnested, true()))
+            .group_by(tag),
+            size_facet("width"),
+            size_facet("height"),
+        )
+        rows = (await db.execute(query)).all()
+
+        bounds = [None, *edges, None]
+        sizes = {"width": [0] * (len(edges) + 1), "height": [0] * (len(edges) + 1)}
+        tag_counts = []
+        for row in rows:
+            if row.facet == "tags":
+                tag_counts.append(TagFacet(name=row.tag, count=row.count))
+            else:
+                sizes[row.facet][row.bucket] = row.count
+        tag_counts.sort(key=lambda facet: (-facet.count, facet.name))
+        return PaintingFacets(
+            total=sum(sizes["width"]),
+            tags=tag_counts,
+            **{
+                name: [
+                    SizeBucket(min=bounds[index], max=bounds[index + 1], count=count)
+                    for index, count in enumerate(counts)
+                ]
+                for name, counts in sizes.items()
+            },
+        )
+
+    async def get_validator(
+            self,
+            db: AsyncSession,
+            *,
+            title: Optional[str] = None,
+            tags: Optional[List[str]] = None,
+            width_min: Optional[float] = None,
+            width_max: Optional[float] = None,
+            height_min: Optional[float] = None,
+            height_max: Optional[float] = None,
+    ) -> Tuple[Optional[datetime], int]:
+        """
+        Дешевый валидатор для условных запросов: время последнего изменения
+        и количество картин под фильтрами. Количество нужно, чтобы
+        удаление картины тоже меняло валидатор.
+        """
+        query = select(func.max(self.model.updated_at), func.count(self.model.id))
+        query = self._apply_filters(
+            query, title=title, tags=tags,
+            width_min=width_min, width_max=width_max,
+            height_min=height_min, height_max=height_max
         )
         result = await db.execute(query)
-        tags = result.scalars().all()
-        return tags
+        last_modified, total = result.one()
+        return last_modified, total
+
+    async def get_updated_at(self, db: AsyncSession, *, id: int) -> Optional[datetime]:
+        """Время изменения одной картины, без загрузки всей строки."""
+        result = await db.execute(select(self.model.updated_at).filter(self.model.id == id))
+        return result.scalar_one_or_none()
+
+    async def get_all_tags(self, db: AsyncSession) -> List[str]:
+        """
+        Получает отсортированный список всех уникальных тегов.
+        Читает справочник тегов, а не разворачивает массивы всех картин.
+        """
+        return await crud_tag.get_names(db)
+
+    async def stream_all(
+            self, db: AsyncSession, *, columns: Sequence[str], batch_size: int = 1000
+    ) -> AsyncIterator[Sequence[Row]]:
+        """
+        Колонки `columns` всех картин по возрастанию id, пачками по `batch_size`.
+        Строки читаются серверным курсором без создания ORM-объектов,
+        так что в памяти держится только текущая пачка, а не весь каталог.
+        """
+        query = select(*(getattr(self.model, name) for name in columns)).order_by(self.model.id)
+        result = await db.stream(query.execution_options(yield_per=batch_size))
+        async for partition in result.partitions():
+            yield partition
+
+
+def _unique(tags: Iterable[str]) -> List[str]:
+    """Теги без пробелов по краям, пустых и повторов, в исходном порядке."""
+    return list(dict.fromkeys(tag.strip() for tag in tags if tag.strip()))
 
 
 # Создаем единый экземпляр класса
@@ -0,0 +1,66 @@
+from typing import Dict, Iterable, List
+
+from pydantic import BaseModel
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.base import CRUDBase
+from app.models.tag import Tag
+
+
+def tag_deltas(old_tags: Iterable[str], new_tags: Iterable[str]) -> Dict[str, int]:
+    """
+    Считает, на сколько нужно изменить счетчик каждого тега,
+    когда у картины набор тегов меняется с `old_tags` на `new_tags`.
+    Повторы внутри одной картины учитываются один раз.
+    """
+    old, new = set(old_tags or []), set(new_tags or [])
+    deltas = {name: 1 for name in new - old}
+    deltas.update({name: -1 for name in old - new})
+    return deltas
+
+
+# Теги создаются только как побочный эффект изменения картин,
+# поэтому отдельных схем создания и обновления нет.
+class CRUDTag(CRUDBase[Tag, BaseModel, BaseModel]):
+
+    async def adjust_counts(self, db: AsyncSession, deltas: Dict[str, int]) -> None:
+        """
+        Применяет изменения счетчиков в текущей транзакции, без коммита.
+        Вызывающий код коммитит их вместе с изменением самой картины.
+        """
+        if not deltas:
+            return
+
+        # Сортировка имен задает одинаковый порядок блокировок строк
+        # в параллельных транзакциях и исключает взаимные блокировки.
+        names = sorted(deltas)
+        stmt = insert(self.model).values(
+            [{"name": name, "painting_count": deltas[name]} for name in names]
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[self.model.name],
+            set_={"painting_count": self.model.painting_count + stmt.excluded.painting_count},
+        )
+        await db.execute(stmt)
+
+        # Теги, которых больше нет ни у одной картины, убираем из справочника
+        await db.execute(
+            delete(self.model).where(
+                self.model.name.in_(names), self.model.painting_count <= 0
+            )
+        )
+
+    async def get_names(self, db: AsyncSession) -> List[str]:
+        """Отсортированный список всех используемых тегов."""
+        result = await db.execute(select(self.model.name).order_by(self.model.name))
+        return result.scalars().all()
+
+    async def get_with_counts(self, db: AsyncSession) -> List[Tag]:
+        """Все теги с количеством картин, по алфавиту."""
+        result = await db.execute(select(self.model).order_by(self.model.name))
+        return result.scalars().all()
+
+
+tag = CRUDTag(Tag)
@@ -1,9 +1,9 @@
 from typing import Optional
-from sqlalchemy import select
+from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel # Используем для заглушек в Generic
 # Импортируем нашу функцию для проверки пароля и базовый класс CRUD
-from app.core.security import verify_password
+from app.core.security import get_password_hash_async, verify_password_async
 from app.crud.base import CRUDBase
 from app.models.user import User
 
@@ -15,16 +15,37 @@ class CRUDUser(CRUDBase[User, BaseModel, BaseModel]):
     async def authenticate(self, db: AsyncSession, *, username: str, password: str) -> Optional[User]:
         user = await self.get_by_username(db, username=username)
 
-        # Если пользователь не найден, выходим
-        if not user:
-            return None
-
         # Шаг 2: проверяем пароль.
-        # Хеширование - это CPU-bound операция, ей await не нужен.
-        if not verify_password(password, user.hashed_password):
+        # bcrypt выполняется в пуле потоков, чтобы не блокировать event loop.
+        # Для несуществующего пользователя проверка идет по фиктивному хэшу,
+        # поэтому ответ занимает столько же времени, сколько и с неверным паролем.
+        hashed_password = user.hashed_password if user else None
+        if not await verify_password_async(password, hashed_password):
             return None
 
         # Если все проверки пройдены, возвращаем пользователя
         return user
 
+    async def revoke_tokens(self, db: AsyncSession, *, user_id: int, **values) -> None:
+        """
+        Увеличивает версию токенов пользователя (заодно меняя `values`) и коммитит.
+        Все выданные ему токены перестают приниматься. Кэш авторизации
+        в текущем процессе нужно сбросить отдельно (principal_cache.invalidate).
+        """
+        await db.execute(
+            update(self.model)
+            .where(self.model.id == user_id)
+            .values(token_version=self.model.token_version + 1, **values)
+        )
+        await db.commit()
+
+    async def set_password(self, db: AsyncSession, *, user_id: int, password: str) -> None:
+        """Меняет пароль и отзывает все токены пользователя."""
+        hashed_password = await get_password_hash_async(password)
+        await self.revoke_tokens(db, user_id=user_id, hashed_password=hashed_password)
+
+    async def set_superuser(self, db: AsyncSession, *, user_id: int, is_superuser: bool) -> None:
+        """Выдает или снимает права суперпользователя и отзывает все токены."""
+        await self.revoke_tokens(db, user_id=user_id, is_superuser=is_superuser)
+
 user = CRUDUser(User)
\ No newline at end of file
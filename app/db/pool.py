@@ -0,0 +1,157 @@
+import asyncio
+import logging
+import time
+from contextlib import AsyncExitStack
+from dataclasses import dataclass, field
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.core.metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PoolMetrics:
+    """Счетчики пула соединений с БД."""
+    checkouts: int = 0
+    checkins: int = 0
+    # Открытые и закрытые соединения: их рост при ровной нагрузке — это «текучка»
+    connects: int = 0
+    closes: int = 0
+    invalidations: int = 0
+    # Соединения, не прошедшие проверку после долгого простоя
+    failed_pings: int = 0
+    checkout_timeouts: int = 0
+    # Сколько запрос ждал соединение (включая открытие нового, если пул рос)
+    checkout_wait: Histogram = field(default_factory=Histogram)
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """`AsyncAdaptedQueuePool`, который считает время получения соединения."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            self.metrics.checkout_timeouts += 1
+            raise
+        finally:
+            self.metrics.checkout_wait.observe(time.perf_counter() - started)
+
+    def recreate(self) -> "InstrumentedPool":
+        # engine.dispose() пересоздает пул — счетчики переносим в новый
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+def instrument_engine(engine: AsyncEngine, *, ping_idle_seconds: float) -> None:
+    """
+    Подписывается на события пула: считает соединения и проверяет только те,
+    что простояли дольше `ping_idle_seconds`. Это дешевле `pool_pre_ping`,
+    который делает лишний запрос к БД на каждое получение соединения.
+    Разорванное соединение, не попавшее под проверку, SQLAlchemy распознает
+    при первой ошибке и заменяет вместе с остальными соединениями пула.
+    """
+    sync_engine: Engine = engine.sync_engine
+    dialect = sync_engine.dialect
+
+    def metrics() -> PoolMetrics:
+        return sync_engine.pool.metrics
+
+    @event.listens_for(sync_engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        metrics().connects += 1
+
+    @event.listens_for(sync_engine, "close")
+    def on_close(dbapi_connection, connection_record):
+        metrics().closes += 1
+
+    @event.listens_for(sync_engine, "close_detached")
+    def on_close_detached(dbapi_connection):
+        metrics().closes += 1
+
+    @event.listens_for(sync_engine, "invalidate")
+    def on_invalidate(dbapi_connection, connection_record, exception):
+        metrics().invalidations += 1
+
+    @event.listens_for(sync_engine, "checkin")
+    def on_checkin(dbapi_connection, connection_record):
+        metrics().checkins += 1
+        connection_record.info["checked_in_at"] = time.monotonic()
+
+    @event.listens_for(sync_engine, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        checked_in_at = connection_record.info.pop("checked_in_at", None)
+        # Сервер уже закрыл соединение (остановка, обрыв сети) — драйвер знает
+        # об этом без запроса; такое соединение не отдаем, пул откроет новое
+        is_closed = getattr(getattr(dbapi_connection, "driver_connection", None), "is_closed", None)
+        if is_closed is not None and is_closed():
+            metrics().failed_pings += 1
+            raise exc.DisconnectionError()
+        if (
+                ping_idle_seconds
+                and checked_in_at is not None
+                and time.monotonic() - checked_in_at >= ping_idle_seconds
+        ):
+            try:
+                dialect.do_ping(dbapi_connection)
+            except Exception as e:
+                metrics().failed_pings += 1
+                # Пул выбросит это соединение и попробует взять другое
+                raise exc.DisconnectionError() from e
+        metrics().checkouts += 1
+
+
+def pool_stats(engine: AsyncEngine) -> dict:
+    """Текущее состояние пула и накопленные счетчики."""
+    pool = engine.sync_engine.pool
+    metrics: PoolMetrics = pool.metrics
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": pool.overflow(),
+        "checkouts": metrics.checkouts,
+        "checkins": metrics.checkins,
+        "connects": metrics.connects,
+        "closes": metrics.closes,
+        "invalidations": metrics.invalidations,
+        "failed_pings": metrics.failed_pings,
+        "checkout_timeouts": metrics.checkout_timeouts,
+        "checkout_wait_seconds": metrics.checkout_wait.as_dict(),
+    }
+
+
+async def warm_up(engine: AsyncEngine, connections: int) -> int:
+    """
+    Открывает до `connections` соединений одновременно и возвращает их в пул,
+    чтобы первые запросы после запуска не тратили время на подключение.
+    Ошибка подключения не мешает запуску приложения: соединения откроются
+    по мере надобности. Возвращает число открытых соединений.
+    """
+    connections = min(connections, engine.sync_engine.pool.size())
+    if connections <= 0:
+        return 0
+    started = time.perf_counter()
+    async with AsyncExitStack() as stack:
+        results = await asyncio.gather(
+            *(stack.enter_async_context(engine.connect()) for _ in range(connections)),
+            return_exceptions=True,
+        )
+        opened = [conn for conn in results if not isinstance(conn, BaseException)]
+    errors = [e for e in results if isinstance(e, BaseException)]
+    if errors:
+        logger.warning("Pool warm-up opened %d of %d connections: %s", len(opened), connections, errors[0])
+    else:
+        logger.info("Pool warmed up with %d connections in %.3fs", len(opened), time.perf_counter() - started)
+    return len(opened)
@@ -0,0 +1,247 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import AsyncIterator, List, Optional, Sequence
+
+from sqlalchemy import event, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.pool import pool_stats, warm_up
+from app.db.session import SessionLocal, make_engine
+
+logger = logging.getLogger(__name__)
+
+# Отставание реплики в секундах. Если все полученные изменения уже применены,
+# отставание нулевое, даже когда в основную БД давно ничего не писали.
+# Для основной БД (не в режиме восстановления) тоже 0.
+LAG_SQL = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+
+@dataclass
+class RequestRouting:
+    """Состояние маршрутизации одного HTTP-запроса."""
+    # Клиент недавно писал (cookie) — его чтения идут в основную БД
+    sticky: bool = False
+    # Запрос сам что-то записал
+    wrote: bool = False
+
+
+_request_routing: ContextVar[Optional[RequestRouting]] = ContextVar("request_routing", default=None)
+
+
+def begin_request(sticky: bool) -> RequestRouting:
+    """Вызывается в начале запроса (ReadYourWritesMiddleware)."""
+    routing = RequestRouting(sticky=sticky)
+    _request_routing.set(routing)
+    return routing
+
+
+@dataclass
+class Replica:
+    name: str
+    engine: AsyncEngine
+    sessionmaker: async_sessionmaker
+    ejected_until: float = 0.0
+    last_error: Optional[str] = None
+    lag_seconds: Optional[float] = None
+    reads: int = 0
+    ejections: int = 0
+
+
+class ReplicaRouter:
+    """
+    Раздает сессии для чтения: по кругу между живыми репликами.
+
+    Реплика выводится из ротации на `eject_seconds`, если запрос через нее
+    потерял соединение или фоновая проверка не прошла (ошибка или отставание
+    больше `max_lag_seconds`), и возвращается после успешной проверки.
+    Чтения идут в основную БД, если реплик нет или все выведены, если запрос
+    сам что-то записал, если клиент писал недавно (cookie) и в течение
+    `sticky_seconds` после изменения картин в этом процессе — иначе кэш
+    каталога, сброшенный записью, заполнился бы устаревшими данными с реплики.
+    """
+
+    def __init__(
+            self,
+            replicas: Sequence[Replica],
+            *,
+            primary_sessionmaker: async_sessionmaker = SessionLocal,
+            sticky_seconds: float = 10.0,
+            eject_seconds: float = 30.0,
+            max_lag_seconds: float = 10.0,
+            check_seconds: float = 5.0,
+    ):
+        self.replicas: List[Replica] = list(replicas)
+        self.primary_sessionmaker = primary_sessionmaker
+        self.sticky_seconds = sticky_seconds
+        self.eject_seconds = eject_seconds
+        self.max_lag_seconds = max_lag_seconds
+        self.check_seconds = check_seconds
+        self.primary_reads = 0
+        self._next = 0
+        self._primary_until = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def hold_primary(self) -> None:
+        """
+        Все чтения этого процесса — в основную БД на `sticky_seconds`.
+        Вызывается при сбросе кэша каталога после изменения картин.
+        """
+        self._primary_until = time.monotonic() + self.sticky_seconds
+
+    def _primary_required(self) -> bool:
+        routing = _request_routing.get()
+        if routing is not None and (routing.sticky or routing.wrote):
+            return True
+        return time.monotonic() < self._primary_until
+
+    def choose(self) -> Optional[Replica]:
+        """Следующая живая реплика или None, если читать нужно из основной БД."""
+        if not self.replicas or self._primary_required():
+            return None
+        now = time.monotonic()
+        for _ in range(len(self.replicas)):
+            replica = self.replicas[self._next % len(self.replicas)]
+            self._next += 1
+            if replica.ejected_until <= now:
+                return replica
+        return None
+
+    def eject(self, replica: Replica, reason: str) -> None:
+        if replica.ejected_until <= time.monotonic():
+            replica.ejections += 1
+            logger.warning("Replica %s ejected for %.0fs: %s", replica.name, self.eject_seconds, reason)
+        replica.ejected_until = time.monotonic() + self.eject_seconds
+        replica.last_error = reason
+
+    @asynccontextmanager
+    async def session(self) -> AsyncIterator[AsyncSession]:
+        """
+        Сессия для чтения. Соединение с репликой берется до того, как сессия
+        отдана вызывающему: если реплика недоступна, она выводится из ротации,
+        а чтение один раз переходит в основную БД. Обрыв посреди запроса
+        повторить уже нельзя — тогда реплика выводится, а ошибка пробрасывается.
+        """
+        replica = self.choose()
+        if replica is not None:
+            replica.reads += 1
+            session = replica.sessionmaker()
+            try:
+                await session.connection()
+            except (DBAPIError, OSError, asyncio.TimeoutError) as e:
+                await session.close()
+                self.eject(replica, f"{type(e).__name__}: {e}")
+                replica = None
+
+        if replica is None:
+            self.primary_reads += 1
+            async with self.primary_sessionmaker() as session:
+                yield session
+            return
+
+        async with session:
+            try:
+                yield session
+            except (DBAPIError, OSError, asyncio.TimeoutError) as e:
+                # Ошибки запроса (например, неверный SQL) реплику не выводят
+                if not isinstance(e, DBAPIError) or e.connection_invalidated:
+                    self.eject(replica, f"{type(e).__name__}: {e}")
+                raise
+
+    async def check(self, replica: Replica) -> None:
+        try:
+            async with replica.engine.connect() as conn:
+                lag = float((await asyncio.wait_for(
+                    conn.execute(LAG_SQL), timeout=self.check_seconds
+                )).scalar_one())
+        except Exception as e:
+            replica.lag_seconds = None
+            self.eject(replica, f"{type(e).__name__}: {e}")
+            return
+        replica.lag_seconds = lag
+        if lag > self.max_lag_seconds:
+            self.eject(replica, f"replication lag {lag:.1f}s")
+        elif replica.ejected_until:
+            logger.info("Replica %s is back in rotation", replica.name)
+            replica.ejected_until = 0.0
+            replica.last_error = None
+
+    async def run(self) -> None:
+        while True:
+            await asyncio.gather(*(self.check(replica) for replica in self.replicas))
+            await asyncio.sleep(self.check_seconds)
+
+    async def start(self, warmup_connections: int = 0) -> None:
+        for replica in self.replicas:
+            await warm_up(replica.engine, warmup_connections)
+        if self.replicas and self._task is None:
+            self._task = asyncio.create_task(self.run(), name="replica-health-check")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        return {
+            "primary_reads": self.primary_reads,
+            "primary_sticky_seconds_left": round(max(0.0, self._primary_until - now), 3),
+            "replicas": [
+                {
+                    "name": replica.name,
+                    "healthy": replica.ejected_until <= now,
+                    "lag_seconds": replica.lag_seconds,
+                    "last_error": replica.last_error,
+                    "reads": replica.reads,
+                    "ejections": replica.ejections,
+                    "pool": pool_stats(replica.engine),
+                }
+                for replica in self.replicas
+            ],
+        }
+
+
+def make_replica(url: str) -> Replica:
+    engine = make_engine(url)
+    return Replica(
+        name=engine.url.render_as_string(hide_password=True),
+        engine=engine,
+        sessionmaker=async_sessionmaker(autocommit=False, autoflush=False, bind=engine),
+    )
+
+
+replica_router = ReplicaRouter(
+    [make_replica(url) for url in settings.DATABASE_REPLICA_URLS],
+    sticky_seconds=settings.READ_YOUR_WRITES_SECONDS,
+    eject_seconds=settings.REPLICA_EJECT_SECONDS,
+    max_lag_seconds=settings.REPLICA_MAX_LAG_SECONDS,
+    check_seconds=settings.REPLICA_HEALTH_CHECK_SECONDS,
+)
+
+
+@event.listens_for(Session, "after_commit")
+def _mark_write(session: Session) -> None:
+    # Реплики только читают и не фиксируют транзакции, так что любая
+    # фиксация внутри HTTP-запроса — это его запись в основную БД
+    routing = _request_routing.get()
+    if routing is not None:
+        routing.wrote = True
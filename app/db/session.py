@@ -1,9 +1,43 @@
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine, async_sessionmaker
 from app.core.config import settings
+from app.core.prometheus import instrument_queries
+from app.db.pool import InstrumentedPool, instrument_engine
+from app.db.slow_query import slow_query_log
 
-# Создаем асинхронный "движок" для взаимодействия с базой данных.
-# 'pool_pre_ping=True' проверяет соединение перед каждым запросом.
-engine = create_async_engine(settings.DATABASE_URL, pool_pre_ping=True)
+
+def make_engine(url: str) -> AsyncEngine:
+    """
+    Асинхронный "движок" для взаимодействия с базой данных.
+    Параметры пула задаются в настройках; живость соединений проверяется
+    только после долгого простоя (см. instrument_engine).
+    """
+    engine = create_async_engine(
+        url,
+        poolclass=InstrumentedPool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+        pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+        # Берем последнее возвращенное соединение: горячие соединения работают,
+        # а проверка после простоя достается только редко используемым
+        pool_use_lifo=True,
+        connect_args={
+            # Кэш подготовленных выражений на стороне SQLAlchemy и самого asyncpg
+            "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+            "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+            "timeout": settings.DB_CONNECT_TIMEOUT_SECONDS,
+        },
+    )
+    instrument_engine(engine, ping_idle_seconds=settings.DB_POOL_PING_IDLE_SECONDS)
+    if settings.METRICS_ENABLED:
+        instrument_queries(engine)
+    if settings.SLOW_QUERY_LOG_ENABLED:
+        slow_query_log.instrument(engine)
+    return engine
+
+
+# Основная БД: все записи, авторизация и чтения сразу после записи
+engine = make_engine(settings.DATABASE_URL)
 
 # Создаем "фабрику" для асинхронных сессий.
 # autocommit=False и autoflush=False — стандартные и безопасные настройки.
@@ -0,0 +1,229 @@
+import asyncio
+import logging
+import random
+import re
+import time
+from collections import OrderedDict
+from contextvars import Context, ContextVar
+from dataclasses import dataclass, field
+from operator import attrgetter
+from typing import List, Literal, Optional, Set
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.types import Scope
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+SlowQueryOrder = Literal["total", "max", "count"]
+_ORDER_FIELDS = {"total": "total_ms", "max": "max_ms", "count": "count"}
+
+_request_scope: ContextVar[Optional[Scope]] = ContextVar("slow_query_request_scope", default=None)
+# Запросы самого журнала (EXPLAIN в фоновой задаче) не учитываются
+_explaining: ContextVar[bool] = ContextVar("slow_query_explaining", default=False)
+
+# Нормализация: литералы и списки параметров заменяются заглушками,
+# чтобы запросы, отличающиеся только значениями, попадали в одну группу
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PARAM_LIST = re.compile(r"\$\d+(?:::[\w\[\]]+)?(?:\s*,\s*\$\d+(?:::[\w\[\]]+)?)+")
+_PARAM = re.compile(r"\$\d+")
+_WHITESPACE = re.compile(r"\s+")
+# EXPLAIN ANALYZE выполняет запрос еще раз, поэтому разбираем только чтение
+_WRITE_KEYWORDS = re.compile(r"\b(insert|update|delete|merge|truncate|for\s+update|for\s+share)\b", re.I)
+
+
+def normalize_statement(statement: str) -> str:
+    normalized = _STRING_LITERAL.sub("?", statement)
+    normalized = _PARAM_LIST.sub("?, ...", normalized)
+    normalized = _PARAM.sub("?", normalized)
+    normalized = _NUMBER_LITERAL.sub("?", normalized)
+    return _WHITESPACE.sub(" ", normalized).strip()
+
+
+def _is_read_only(statement: str) -> bool:
+    words = statement.split(None, 1)
+    head = words[0].lower() if words else ""
+    return head in ("select", "with") and not _WRITE_KEYWORDS.search(statement)
+
+
+def _format_params(parameters, max_length: int = 200) -> list:
+    if parameters is None:
+        return []
+    values = parameters.values() if isinstance(parameters, dict) else parameters
+    return [repr(value)[:max_length] for value in values]
+
+
+@dataclass
+class SlowQueryStats:
+    """Накопленная статистика по одной нормализованной форме запроса."""
+    query: str
+    count: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    last_seen: float = 0.0
+    routes: Set[str] = field(default_factory=set)
+    # Исходный текст и параметры самого медленного выполнения
+    slowest_statement: str = ""
+    slowest_params: list = field(default_factory=list)
+    plan: Optional[List[str]] = None
+    plan_ms: Optional[float] = None
+    explained_at: Optional[float] = None
+
+    def as_dict(self) -> dict:
+        return {
+            "query": self.query,
+            "count": self.count,
+            "total_ms": round(self.total_ms, 3),
+            "mean_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 3),
+            "last_seen": self.last_seen,
+            "routes": sorted(self.routes),
+            "slowest_statement": self.slowest_statement,
+            "slowest_params": self.slowest_params,
+            "plan": self.plan,
+            "plan_for_ms": self.plan_ms,
+        }
+
+
+class SlowQueryLog:
+    """
+    Журнал медленных запросов (включается SLOW_QUERY_LOG_ENABLED).
+
+    Каждый запрос дольше порога пишется в лог с параметрами и маршрутом,
+    из которого он выполнен, и учитывается в статистике по нормализованному
+    тексту. Для части медленных чтений в фоне на отдельном соединении
+    снимается `EXPLAIN (ANALYZE, BUFFERS)`: с вероятностью `explain_sample_rate`,
+    не чаще раза в `explain_interval` секунд на одну форму запроса и не больше
+    одного разбора одновременно — так нагрузка от профилирования ограничена.
+    Статистика своя у каждого процесса.
+    """
+
+    def __init__(
+            self,
+            *,
+            threshold_ms: float,
+            explain_sample_rate: float,
+            explain_interval: float,
+            explain_timeout_ms: int,
+            max_entries: int,
+    ):
+        self.threshold = threshold_ms / 1000
+        self.explain_sample_rate = explain_sample_rate
+        self.explain_interval = explain_interval
+        self.explain_timeout_ms = explain_timeout_ms
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, SlowQueryStats]" = OrderedDict()
+        self._explaining = False
+        self._tasks: Set[asyncio.Task] = set()
+
+    def record(self, engine: AsyncEngine, statement: str, parameters, elapsed: float) -> None:
+        scope = _request_scope.get()
+        route = None
+        if scope is not None:
+            route = f"{scope['method']} {getattr(scope.get('route'), 'path', scope['path'])}"
+        elapsed_ms = elapsed * 1000
+        params = _format_params(parameters)
+        logger.warning(
+            "Slow query %.1f ms (%s): %s; params=%s", elapsed_ms, route or "no request", statement, params
+        )
+
+        query = normalize_statement(statement)
+        entry = self._entries.get(query)
+        if entry is None:
+            entry = self._entries[query] = SlowQueryStats(query=query)
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        self._entries.move_to_end(query)
+        entry.count += 1
+        entry.total_ms += elapsed_ms
+        entry.last_seen = time.time()
+        if route and len(entry.routes) < 10:
+            entry.routes.add(route)
+        if elapsed_ms >= entry.max_ms:
+            entry.max_ms = elapsed_ms
+            entry.slowest_statement = statement
+            entry.slowest_params = params
+
+        if (
+                not self._explaining
+                and _is_read_only(statement)
+                and (entry.explained_at is None
+                     or time.monotonic() - entry.explained_at >= self.explain_interval)
+                and random.random() < self.explain_sample_rate
+        ):
+            self._explaining = True
+            entry.explained_at = time.monotonic()
+            # Пустой контекст вместо копии контекста запроса: иначе EXPLAIN
+            # попал бы в счетчики запросов к БД этого HTTP-запроса (prometheus)
+            task = asyncio.get_running_loop().create_task(
+                self._explain(engine, entry, statement, parameters, elapsed_ms), context=Context()
+            )
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _explain(self, engine: AsyncEngine, entry: SlowQueryStats, statement: str, parameters,
+                       elapsed_ms: float) -> None:
+        _explaining.set(True)
+        try:
+            async with engine.connect() as conn:
+                # Разбор не должен сам превратиться в долгий запрос
+                await conn.exec_driver_sql(f"SET LOCAL statement_timeout = {int(self.explain_timeout_ms)}")
+                result = await conn.exec_driver_sql(
+                    "EXPLAIN (ANALYZE, BUFFERS) " + statement, parameters
+                )
+                plan = [row[0] for row in result]
+                await conn.rollback()
+        except Exception as e:
+            logger.warning("EXPLAIN for slow query failed: %s", e)
+            return
+        finally:
+            self._explaining = False
+        entry.plan = plan
+        entry.plan_ms = round(elapsed_ms, 3)
+        logger.warning("Plan for slow query (%.1f ms): %s\n%s", elapsed_ms, statement, "\n".join(plan))
+
+    def instrument(self, engine: AsyncEngine) -> None:
+        """Подписывается на выполнение запросов движка."""
+        sync_engine = engine.sync_engine
+
+        @event.listens_for(sync_engine, "before_cursor_execute")
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            conn.info.setdefault("slow_query_started_at", []).append(time.perf_counter())
+
+        @event.listens_for(sync_engine, "after_cursor_execute")
+        def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            elapsed = time.perf_counter() - conn.info["slow_query_started_at"].pop()
+            if elapsed >= self.threshold and not executemany and not _explaining.get():
+                self.record(engine, statement, parameters, elapsed)
+
+        @event.listens_for(sync_engine, "handle_error")
+        def handle_error(exception_context):
+            connection = exception_context.connection
+            started = connection.info.get("slow_query_started_at") if connection is not None else None
+            if started:
+                started.pop()
+
+    def top(self, limit: int = 20, order_by: SlowQueryOrder = "total") -> List[dict]:
+        key = attrgetter(_ORDER_FIELDS[order_by])
+        entries = sorted(self._entries.values(), key=key, reverse=True)
+        return [entry.as_dict() for entry in entries[:limit]]
+
+    def reset(self) -> None:
+        self._entries.clear()
+
+
+def begin_request(scope: Scope) -> None:
+    """Вызывается в начале HTTP-запроса (SlowQueryMiddleware)."""
+    _request_scope.set(scope)
+
+
+slow_query_log = SlowQueryLog(
+    threshold_ms=settings.SLOW_QUERY_THRESHOLD_MS,
+    explain_sample_rate=settings.SLOW_QUERY_EXPLAIN_SAMPLE_RATE,
+    explain_interval=settings.SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS,
+    explain_timeout_ms=settings.SLOW_QUERY_EXPLAIN_TIMEOUT_MS,
+    max_entries=settings.SLOW_QUERY_MAX_ENTRIES,
+)
@@ -1,18 +1,61 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
+from uvicorn.middleware.proxy_headers import ProxyHeadersMiddleware
+from app.core.config import settings
+from app.core import prometheus, security
+from app.core.middleware import (
+    MaxBodySizeMiddleware, MetricsMiddleware, ReadYourWritesMiddleware, SlowQueryMiddleware,
+)
+from app.core.static_files import ImmutableStaticFiles
 # Импортируем наши роутеры
 from app.api.routers import auth as auth_router
 from app.api.routers import paintings as paintings_router
 from app.api.routers import feedback as feedback_router
+from app.api.routers import admin as admin_router
+from app.db import pool
+from app.db.replicas import replica_router
+from app.db.session import engine
+from app.services import images
+from app.services.notification_service import notification_dispatcher
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Открываем соединения заранее, чтобы первые запросы не ждали подключения
+    await pool.warm_up(engine, settings.DB_POOL_WARMUP_CONNECTIONS)
+    await replica_router.start(settings.DB_POOL_WARMUP_CONNECTIONS)
+    # Фиктивный хэш для входа несуществующих пользователей — до первых запросов
+    await security.init_dummy_hash()
+    if settings.NOTIFICATION_DISPATCHER_ENABLED:
+        notification_dispatcher.start()
+    yield
+    await notification_dispatcher.stop()
+    # Останавливаем пул процессов обработки изображений
+    images.shutdown_pool()
+    await replica_router.stop()
+    await engine.dispose()
+    prometheus.mark_process_dead()
+
 
 # Создаем экземпляр приложения
 app = FastAPI(
     title="ArtGallery API",
     description="API для веб-приложения картинной галереи.",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
+# Ограничение размера тела запроса (в первую очередь — загрузок изображений).
+# Добавляем до CORS, чтобы ответ 413 тоже получил CORS-заголовки.
+app.add_middleware(MaxBodySizeMiddleware, max_body_size=settings.UPLOAD_MAX_REQUEST_BYTES)
+# Клиент, который только что писал, читает из основной БД, а не с реплики
+app.add_middleware(ReadYourWritesMiddleware, sticky_seconds=settings.READ_YOUR_WRITES_SECONDS)
+if settings.SLOW_QUERY_LOG_ENABLED:
+    app.add_middleware(SlowQueryMiddleware)
+
 # Настройка CORS
 origins = [
     "http://localhost",
@@ -27,16 +70,44 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Чтобы фронтенд мог прочитать курсор следующей страницы и общее количество
+    expose_headers=[
+        paintings_router.NEXT_CURSOR_HEADER, paintings_router.TOTAL_COUNT_HEADER,
+        "ETag", "Last-Modified",
+    ],
 )
 
 # Подключаем роутеры к приложению
 app.include_router(auth_router.router, prefix="/api/auth", tags=["Auth"])
 app.include_router(paintings_router.router, prefix="/api/paintings", tags=["Paintings"])
 app.include_router(feedback_router.router, prefix="/api/feedback", tags=["Feedback"])
+app.include_router(admin_router.router, prefix="/api/admin", tags=["Admin"])
+
+# Метрики добавляем последними: так они охватывают и остальные middleware
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/metrics", include_in_schema=False)
+    def read_metrics():
+        return Response(prometheus.render_metrics(), media_type=prometheus.CONTENT_TYPE_LATEST)
+
+# Адрес клиента из X-Forwarded-For от доверенных прокси. Добавляем самым
+# последним, чтобы все остальное (лимит входа, метрики) видело адрес клиента
+if settings.TRUSTED_PROXY_IPS:
+    app.add_middleware(ProxyHeadersMiddleware, trusted_hosts=settings.TRUSTED_PROXY_IPS)
 
 # Просто для проверки, что сервер запустился
 @app.get("/")
 def read_root():
     return {"message": "Welcome to ArtGallery API"}
 
+# Загрузки лежат под именами-хэшами и никогда не меняются — отдаем их
+# с долгим кэшированием. Монтируем раньше общего /static, чтобы этот путь
+# обрабатывался первым.
+if settings.STORAGE_BACKEND == "local":
+    app.mount(
+        settings.LOCAL_STORAGE_URL_PREFIX.rstrip("/"),
+        ImmutableStaticFiles(directory=settings.LOCAL_STORAGE_DIR),
+        name="uploads",
+    )
 app.mount("/static", StaticFiles(directory="static"), name="static")
\ No newline at end of file
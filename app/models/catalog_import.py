@@ -0,0 +1,31 @@
+from sqlalchemy import Column, DateTime, Integer, String, func
+
+from app.db.base import Base
+
+
+class CatalogImport(Base):
+    """
+    Ход массового импорта каталога (scripts/import_paintings.py).
+    Счетчик обработанных строк меняется в той же транзакции, что и вставка
+    очередной пачки картин, поэтому прерванный импорт того же файла
+    продолжается ровно с первой незаписанной строки.
+    """
+    # Имя таблицы будет 'catalogimports'
+    id = Column(Integer, primary_key=True, index=True)
+
+    # SHA-256 содержимого исходного файла: по нему узнается повторный запуск
+    source_sha256 = Column(String(64), unique=True, nullable=False)
+    source_name = Column(String, nullable=False)
+
+    # Строки данных файла (без заголовка), обработанные и пропущенные
+    total_rows = Column(Integer, nullable=False)
+    rows_done = Column(Integer, nullable=False, default=0, server_default="0")
+    rows_skipped = Column(Integer, nullable=False, default=0, server_default="0")
+    paintings_created = Column(Integer, nullable=False, default=0, server_default="0")
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    def __repr__(self):
+        return f"<CatalogImport(source_name='{self.source_name}', rows_done={self.rows_done}/{self.total_rows})>"
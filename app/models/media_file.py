@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, String
+
+from app.db.base import Base
+
+
+class MediaFile(Base):
+    """
+    Учет ссылок на загруженные файлы. Одинаковые по содержимому файлы
+    хранятся один раз, и файл удаляется с диска только тогда,
+    когда на него не ссылается ни одна картина.
+    """
+    # Имя таблицы будет 'mediafiles'
+    id = Column(Integer, primary_key=True, index=True)
+
+    # Ключ файла в хранилище, как он записан в Painting.photo_filenames
+    storage_key = Column(String, unique=True, index=True, nullable=False)
+
+    # Сколько раз файл встречается в photo_filenames всех картин,
+    # плюс незавершенные загрузки, которые его закрепили
+    ref_count = Column(Integer, nullable=False, default=0, server_default="0")
+
+    def __repr__(self):
+        return f"<MediaFile(storage_key='{self.storage_key}', ref_count={self.ref_count})>"
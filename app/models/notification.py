@@ -0,0 +1,35 @@
+from sqlalchemy import Column, DateTime, Index, Integer, String, Text, func, text
+from sqlalchemy.dialects.postgresql import JSONB
+
+from app.db.base import Base
+
+
+class Notification(Base):
+    """
+    Исходящее уведомление (outbox). Пишется в той же транзакции, что и событие,
+    поэтому не теряется при перезапуске приложения или сбое Telegram.
+    Отправляет его отдельный диспетчер (app/services/notification_service.py).
+    """
+    __table_args__ = (
+        # Диспетчер выбирает только неотправленные, поэтому индекс частичный
+        Index("ix_notifications_pending", "next_attempt_at", postgresql_where=text("sent_at IS NULL")),
+    )
+
+    # Имя таблицы будет 'notifications'
+    id = Column(Integer, primary_key=True, index=True)
+
+    # Тип события, по нему выбирается шаблон сообщения (например, "feedback")
+    kind = Column(String(50), nullable=False)
+    # Снимок данных события на момент записи
+    payload = Column(JSONB, nullable=False)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    # Неудачные попытки отправки
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    # Раньше этого времени строку не берут: задержка повтора или аренда диспетчером
+    next_attempt_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    sent_at = Column(DateTime(timezone=True), nullable=True)
+    last_error = Column(Text, nullable=True)
+
+    def __repr__(self):
+        return f"<Notification(id={self.id}, kind='{self.kind}', sent_at={self.sent_at})>"
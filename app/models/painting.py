@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Numeric, Text
+from sqlalchemy import Column, Integer, String, Numeric, Text, Index, DateTime, func
 from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.orm import relationship
 
@@ -6,6 +6,22 @@ from app.db.base import Base
 
 
 class Painting(Base):
+    # Составные индексы (ключ сортировки, id) нужны для keyset-пагинации:
+    # запрос "после (title, id)" сразу спускается по индексу к нужной позиции.
+    __table_args__ = (
+        Index("ix_paintings_title_id", "title", "id"),
+        Index("ix_paintings_width_id", "width", "id"),
+        Index("ix_paintings_height_id", "height", "id"),
+        # Триграммный GIN-индекс обслуживает `title ILIKE '%...%'`,
+        # а GIN по массиву — оператор пересечения тегов `tags && ARRAY[...]`.
+        # Требует расширения pg_trgm (создается миграцией).
+        Index(
+            "ix_paintings_title_trgm", "title",
+            postgresql_using="gin", postgresql_ops={"title": "gin_trgm_ops"},
+        ),
+        Index("ix_paintings_tags_gin", "tags", postgresql_using="gin"),
+    )
+
     # Имя таблицы будет 'paintings' согласно правилу в Base
     id = Column(Integer, primary_key=True, index=True)
 
@@ -21,6 +37,13 @@ class Painting(Base):
     # Список имен файлов фотографий
     photo_filenames = Column(ARRAY(String), nullable=False)
 
+    # Время последнего изменения. По нему строятся ETag и Last-Modified,
+    # а индекс позволяет брать max(updated_at) без прохода по таблице.
+    updated_at = Column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now(),
+        nullable=False, index=True
+    )
+
     # Связь с таблицей Feedback
     # 'back_populates' создает двустороннюю связь.
     # 'cascade' означает, что при удалении картины удалятся и все связанные отзывы.
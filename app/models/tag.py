@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, String
+
+from app.db.base import Base
+
+
+class Tag(Base):
+    """
+    Справочник тегов с количеством картин, у которых этот тег есть.
+    Поддерживается инкрементально при создании, изменении и удалении картин,
+    поэтому список тегов не требует прохода по всей таблице paintings.
+    """
+    # Имя таблицы будет 'tags'
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, unique=True, index=True, nullable=False)
+    painting_count = Column(Integer, nullable=False, default=0, server_default="0")
+
+    def __repr__(self):
+        return f"<Tag(name='{self.name}', painting_count={self.painting_count})>"
@@ -6,4 +6,7 @@ class User(Base):
     id = Column(Integer, primary_key=True, index=True)
     username = Column(String, unique=True, index=True, nullable=False)
     hashed_password = Column(String, nullable=False)
-    is_superuser = Column(Boolean(), default=False)
\ No newline at end of file
+    is_superuser = Column(Boolean(), default=False)
+    # Версия токенов: входит в JWT, увеличивается при смене пароля или прав,
+    # и все выданные ранее токены перестают приниматься
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Union
 
 class LoginRequest(BaseModel):
@@ -9,5 +9,19 @@ class Token(BaseModel):
     access_token: str
     token_type: str
 
+# Содержимое JWT. Короткие имена claims сокращают размер токена.
 class TokenData(BaseModel):
-    username: Union[str, None] = None
+    username: Union[str, None] = Field(None, alias="sub")
+    user_id: int = Field(alias="uid")
+    is_superuser: bool = Field(False, alias="su")
+    token_version: int = Field(alias="ver")
+
+# Пользователь, от имени которого выполняется запрос: только то,
+# что нужно для авторизации, без хэша пароля. Кэшируется в памяти.
+class Principal(BaseModel):
+    id: int
+    username: str
+    is_superuser: Union[bool, None] = False
+    token_version: int
+
+    model_config = ConfigDict(from_attributes=True)
@@ -1,4 +1,8 @@
+from typing import Literal
 from pydantic import BaseModel
 
+# exact — точный count(*), estimated — оценка планировщика (только без фильтров)
+CountMode = Literal["exact", "estimated"]
+
 class TotalCountResponse(BaseModel):
     total: int
\ No newline at end of file
@@ -1,5 +1,8 @@
-from pydantic import BaseModel, ConfigDict, Field
-from typing import List, Union
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter, computed_field, field_serializer
+from typing import Annotated, Dict, List, Literal, Optional, Union
+
+from app.core.image_variants import variant_urls
+from app.services.storage import storage
 
 
 class ArticleInDB(BaseModel):
@@ -37,10 +40,138 @@ class PaintingUpdate(BaseModel):
     photo_filenames: Union[List[str], None] = None
 
 
+# ------------------- Пакетные изменения -------------------
+
+# Поля, которые пакетная правка задает сразу нескольким картинам.
+# Фото так не меняются: для них нужна загрузка файлов.
+class PaintingPatch(BaseModel):
+    title: Union[str, None] = None
+    width: Union[float, None] = None
+    height: Union[float, None] = None
+    tags: Union[List[str], None] = None
+    description: Union[str, None] = None
+
+
+class TagsBatchOperation(BaseModel):
+    """Добавить теги картинам или убрать их."""
+    op: Literal["add_tags", "remove_tags"]
+    ids: List[int] = Field(min_length=1)
+    tags: List[str] = Field(min_length=1)
+
+
+class PatchBatchOperation(BaseModel):
+    """Задать одинаковые значения полей картинам."""
+    op: Literal["patch"]
+    ids: List[int] = Field(min_length=1)
+    fields: PaintingPatch
+
+
+class DeleteBatchOperation(BaseModel):
+    op: Literal["delete"]
+    ids: List[int] = Field(min_length=1)
+
+
+PaintingBatchOperation = Annotated[
+    Union[TagsBatchOperation, PatchBatchOperation, DeleteBatchOperation], Field(discriminator="op")
+]
+
+
+class PaintingBatch(BaseModel):
+    # Операции применяются по порядку в одной транзакции
+    operations: List[PaintingBatchOperation] = Field(min_length=1)
+
+
+class PaintingBatchItemResult(BaseModel):
+    index: int
+    op: str
+    # Измененные (удаленные) картины; уже бывшие в нужном состоянии; отсутствующие
+    applied: List[int]
+    unchanged: List[int]
+    not_found: List[int]
+
+
+class PaintingBatchResult(BaseModel):
+    results: List[PaintingBatchItemResult]
+
+
+def _variant_links(photo_key: str) -> Dict[str, Dict[str, str]]:
+    """Адреса производных изображения: {"thumbnail": {"webp": ..., "jpeg": ...}, ...}."""
+    return {
+        size: {fmt: storage.url(key) for fmt, key in formats.items()}
+        for size, formats in variant_urls(photo_key).items()
+    }
+
+
 # Схема для чтения данных о картине из БД (что сервер отправляет клиенту).
 # Наследуется от базовой схемы и добавляет поля, генерируемые сервером.
 class PaintingInDB(PaintingBase, ArticleInDB):
-    pass
+
+    # В БД лежат ключи хранилища, клиенту отдаем адреса для прямого скачивания
+    @field_serializer("photo_filenames")
+    def serialize_photo_urls(self, keys: List[str]) -> List[str]:
+        return [storage.url(key) for key in keys]
+
+    # Адреса производных изображений для каждого фото, в том же порядке,
+    # что и photo_filenames: [{"thumbnail": {"webp": ..., "jpeg": ...}, ...}]
+    @computed_field
+    @property
+    def photo_variants(self) -> List[Dict[str, Dict[str, str]]]:
+        return [_variant_links(photo_key) for photo_key in self.photo_filenames]
+
+
+# Облегченный элемент списка для сетки каталога: только то, что показывает плитка.
+# Набор полей схемы определяет и набор колонок, которые читаются из БД.
+class PaintingListItem(ArticleInDB):
+    title: str
+    width: float
+    height: float
+    # Нужны только для обложки, в ответ целиком не попадают
+    photo_filenames: List[str] = Field(exclude=True)
+
+    @computed_field
+    @property
+    def cover(self) -> Optional[str]:
+        return storage.url(self.photo_filenames[0]) if self.photo_filenames else None
+
+    @computed_field
+    @property
+    def cover_variants(self) -> Optional[Dict[str, Dict[str, str]]]:
+        return _variant_links(self.photo_filenames[0]) if self.photo_filenames else None
+
+
+# Схема списка компилируется один раз при импорте: валидирует сразу всю страницу
+# ORM-объектов и сериализует ее в байты JSON без промежуточных dict
+painting_list_adapter = TypeAdapter(List[PaintingInDB])
+painting_list_item_adapter = TypeAdapter(List[PaintingListItem])
+
+
+# Допустимые варианты сортировки каталога. "-" в начале — по убыванию.
+PaintingSort = Literal["id", "-id", "title", "-title", "width", "-width", "height", "-height"]
+
+# Представление списка: full — полные карточки, grid — PaintingListItem для сетки
+PaintingView = Literal["full", "grid"]
+
+
+# ------------------- Фасеты каталога -------------------
+
+class TagFacet(BaseModel):
+    name: str
+    count: int
+
+
+# Интервал размера: min включительно, max не включительно; None — без границы
+class SizeBucket(BaseModel):
+    min: Optional[float]
+    max: Optional[float]
+    count: int
+
+
+class PaintingFacets(BaseModel):
+    total: int
+    # По убыванию количества картин, при равенстве — по имени
+    tags: List[TagFacet]
+    width: List[SizeBucket]
+    height: List[SizeBucket]
 
 
 class TotalPagesResponse(BaseModel):
@@ -0,0 +1,10 @@
+from pydantic import BaseModel, ConfigDict
+
+# ------------------- Схемы для Тегов -------------------
+
+# Тег вместе с количеством картин, у которых он есть.
+class TagWithCount(BaseModel):
+    name: str
+    painting_count: int
+
+    model_config = ConfigDict(from_attributes=True)
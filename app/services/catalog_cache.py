@@ -0,0 +1,215 @@
+import asyncio
+import logging
+from contextvars import Context
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Hashable, List, Optional, Set, Tuple, Union
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import LRUTTLCache
+from app.core.config import settings
+from app.crud.crud_painting import painting as crud_painting
+from app.crud.crud_tag import tag as crud_tag
+from app.db.replicas import replica_router
+from app.schemas.painting import (
+    PaintingFacets, PaintingInDB, PaintingListItem, painting_list_adapter, painting_list_item_adapter,
+)
+from app.schemas.tag import TagWithCount
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+# Представления списка: адаптер схемы и колонки, которые нужно читать из БД
+# (None — все). Для сетки это ровно поля PaintingListItem.
+LIST_VIEWS = {
+    "full": (painting_list_adapter, None),
+    "grid": (painting_list_item_adapter, tuple(PaintingListItem.model_fields)),
+}
+
+
+def filters_key(
+        *,
+        title: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        width_min: Optional[float] = None,
+        width_max: Optional[float] = None,
+        height_min: Optional[float] = None,
+        height_max: Optional[float] = None,
+) -> Tuple:
+    """
+    Нормализует фильтры в ключ кэша: пустые значения приравниваются к None
+    (как в `_apply_filters`), а порядок и повторы тегов не важны.
+    """
+    return (
+        title or None,
+        tuple(sorted(set(tags))) if tags else None,
+        width_min, width_max, height_min, height_max,
+    )
+
+
+class CatalogCache:
+    """
+    Кэш чтения каталога картин (read-through).
+
+    Хранит уже провалидированные Pydantic-схемы, а не ORM-объекты,
+    поэтому закэшированные данные не привязаны к сессии БД.
+    Любое изменение каталога увеличивает `version`: она входит в ключ,
+    так что старые записи перестают читаться сразу, даже если загрузка
+    началась до изменения. Кэш локален для процесса — в других воркерах
+    устаревшие данные живут не дольше TTL.
+    """
+
+    def __init__(self, *, enabled: bool, maxsize: int, ttl: float):
+        self.enabled = enabled
+        self.version = 0
+        self._cache = LRUTTLCache(maxsize=maxsize, ttl=ttl)
+        # Валидаторы, которые сейчас загружаются в фоне (peek_validator)
+        self._loading: Set[Hashable] = set()
+        self._tasks: Set[asyncio.Task] = set()
+
+    def invalidate(self) -> None:
+        """Вызывается после любого изменения картин."""
+        self.version += 1
+        self._cache.clear()
+        # Пока реплики догоняют, кэш заполняется из основной БД
+        replica_router.hold_primary()
+
+    def stats(self) -> dict:
+        return {
+            **self._cache.stats.as_dict(),
+            "size": len(self._cache),
+            "version": self.version,
+            "enabled": self.enabled,
+        }
+
+    async def _read_through(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        if not self.enabled:
+            return await loader()
+
+        version = self.version
+        full_key = (version, key)
+        value = self._cache.get(full_key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        value = await loader()
+        # Если за время загрузки каталог изменился, результат уже устарел
+        if version == self.version:
+            self._cache.set(full_key, value)
+        return value
+
+    async def get_paintings(
+            self, db: AsyncSession, *, skip: int, limit: int, sort: str,
+            cursor: Optional[str], view: str = "full", **filters
+    ) -> Union[List[PaintingInDB], List[PaintingListItem]]:
+        adapter, columns = LIST_VIEWS[view]
+
+        async def load():
+            paintings = await crud_painting.get_multi_filtered(
+                db, skip=skip, limit=limit, sort=sort, cursor=cursor, columns=columns, **filters
+            )
+            return adapter.validate_python(paintings)
+
+        key = ("list", view, skip if cursor is None else None, limit, sort, cursor, filters_key(**filters))
+        return await self._read_through(key, load)
+
+    async def get_paintings_with_total(
+            self, db: AsyncSession, *, skip: int, limit: int, sort: str,
+            cursor: Optional[str], estimated: bool, view: str = "full", **filters
+    ) -> Tuple[Union[List[PaintingInDB], List[PaintingListItem]], int]:
+        adapter, columns = LIST_VIEWS[view]
+
+        async def load():
+            paintings, total = await crud_painting.get_multi_filtered_with_total(
+                db, skip=skip, limit=limit, sort=sort, cursor=cursor, estimated=estimated,
+                columns=columns, **filters
+            )
+            return adapter.validate_python(paintings), total
+
+        key = (
+            "list+total", view, skip if cursor is None else None, limit, sort, cursor,
+            estimated, filters_key(**filters),
+        )
+        return await self._read_through(key, load)
+
+    async def count_paintings(self, db: AsyncSession, *, estimated: bool, **filters) -> int:
+        async def load():
+            return await crud_painting.count_filtered(db, estimated=estimated, **filters)
+
+        return await self._read_through(("count", estimated, filters_key(**filters)), load)
+
+    async def get_facets(self, db: AsyncSession, **filters) -> PaintingFacets:
+        async def load():
+            return await crud_painting.get_facets(db, size_edges=settings.FACET_SIZE_EDGES_CM, **filters)
+
+        return await self._read_through(("facets", filters_key(**filters)), load)
+
+    async def get_painting(self, db: AsyncSession, painting_id: int) -> Optional[PaintingInDB]:
+        async def load():
+            db_painting = await crud_painting.get(db, id=painting_id)
+            return PaintingInDB.model_validate(db_painting) if db_painting else None
+
+        return await self._read_through(("detail", painting_id), load)
+
+    async def get_validator(self, db: AsyncSession, **filters) -> Tuple[Optional[datetime], int]:
+        async def load():
+            return await crud_painting.get_validator(db, **filters)
+
+        return await self._read_through(("validator", filters_key(**filters)), load)
+
+    def peek_validator(self, **filters) -> Optional[Tuple[Optional[datetime], int]]:
+        """
+        Валидатор из кэша без запроса к БД или None, если его там нет.
+        Недостающий валидатор загружается в фоне отдельной сессией, так что
+        следующие запросы с теми же фильтрами его уже получат.
+        """
+        if not self.enabled:
+            return None
+        key = ("validator", filters_key(**filters))
+        value = self._cache.get((self.version, key), _MISSING)
+        if value is not _MISSING:
+            return value
+
+        if key not in self._loading:
+            self._loading.add(key)
+            # Пустой контекст: фоновый запрос не относится к текущему HTTP-запросу
+            # (счетчики запросов к БД, read-your-writes)
+            task = asyncio.get_running_loop().create_task(self._load_validator(key, filters), context=Context())
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        return None
+
+    async def _load_validator(self, key: Hashable, filters: dict) -> None:
+        try:
+            async with replica_router.session() as db:
+                await self.get_validator(db, **filters)
+        except Exception as e:
+            logger.warning("Loading catalog validator failed: %s", e)
+        finally:
+            self._loading.discard(key)
+
+    async def get_painting_updated_at(self, db: AsyncSession, painting_id: int) -> Optional[datetime]:
+        async def load():
+            return await crud_painting.get_updated_at(db, id=painting_id)
+
+        return await self._read_through(("detail-validator", painting_id), load)
+
+    async def get_all_tags(self, db: AsyncSession) -> List[str]:
+        async def load():
+            return list(await crud_painting.get_all_tags(db))
+
+        return await self._read_through(("tags",), load)
+
+    async def get_tags_with_counts(self, db: AsyncSession) -> List[TagWithCount]:
+        async def load():
+            return [TagWithCount.model_validate(t) for t in await crud_tag.get_with_counts(db)]
+
+        return await self._read_through(("tag-counts",), load)
+
+
+catalog_cache = CatalogCache(
+    enabled=settings.CATALOG_CACHE_ENABLED,
+    maxsize=settings.CATALOG_CACHE_MAX_ENTRIES,
+    ttl=settings.CATALOG_CACHE_TTL_SECONDS,
+)
@@ -0,0 +1,72 @@
+import csv
+import io
+import json
+from typing import AsyncIterator, Iterable, List, Literal
+
+from app.crud.crud_painting import painting as crud_painting
+from app.db.replicas import replica_router
+
+ExportFormat = Literal["ndjson", "csv"]
+
+EXPORT_COLUMNS = ("id", "title", "width", "height", "tags", "description", "photo_filenames", "updated_at")
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+
+# Списки в CSV — строкой, как их принимает scripts/import_paintings.py:
+# теги через запятую (как в форме создания картины), файлы через ";"
+CSV_TAGS_SEPARATOR = ","
+CSV_FILES_SEPARATOR = ";"
+
+
+def split_list(value: str, separator: str) -> List[str]:
+    """Разбирает список из ячейки CSV, пустые элементы отбрасываются."""
+    return [item.strip() for item in value.split(separator) if item.strip()]
+
+
+def _ndjson_lines(rows: Iterable) -> str:
+    return "".join(
+        json.dumps({
+            "id": row.id,
+            "title": row.title,
+            "width": float(row.width),
+            "height": float(row.height),
+            "tags": row.tags,
+            "description": row.description,
+            "photo_filenames": row.photo_filenames,
+            "updated_at": row.updated_at.isoformat(),
+        }, ensure_ascii=False) + "\n"
+        for row in rows
+    )
+
+
+def _csv_lines(rows: Iterable, header: bool = False) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(EXPORT_COLUMNS)
+    writer.writerows(
+        (
+            row.id, row.title, row.width, row.height,
+            CSV_TAGS_SEPARATOR.join(row.tags), row.description or "",
+            CSV_FILES_SEPARATOR.join(row.photo_filenames), row.updated_at.isoformat(),
+        )
+        for row in rows
+    )
+    return buffer.getvalue()
+
+
+async def stream_catalog(fmt: ExportFormat, *, batch_size: int = 1000) -> AsyncIterator[bytes]:
+    """
+    Весь каталог в NDJSON или CSV по мере чтения из БД.
+
+    Сессия открывается здесь, а не берется из зависимости: тело ответа
+    отдается уже после выхода из обработчика. Чтение идет на реплику,
+    если она есть. В photo_filenames — ключи хранилища, поэтому выгрузку
+    можно загрузить обратно скриптом импорта с --images-dir, указывающим
+    на локальное хранилище.
+    """
+    if fmt == "csv":
+        yield _csv_lines([], header=True).encode()
+    async with replica_router.session() as db:
+        async for rows in crud_painting.stream_all(db, columns=EXPORT_COLUMNS, batch_size=batch_size):
+            chunk = _csv_lines(rows) if fmt == "csv" else _ndjson_lines(rows)
+            yield chunk.encode()
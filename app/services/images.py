@@ -0,0 +1,131 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from app.core.config import settings
+from app.core.image_variants import VARIANT_SIZES, variant_url
+
+# Параметры сохранения для каждого формата
+_SAVE_OPTIONS = {
+    "webp": {"format": "WEBP", "method": 4},
+    "jpeg": {"format": "JPEG", "optimize": True, "progressive": True},
+}
+
+# Форматы, которые хранят прозрачность. Для остальных она заливается белым.
+_ALPHA_FORMATS = {"webp"}
+
+# Ошибки чтения файла. DecompressionBombError (размеры больше
+# Image.MAX_IMAGE_PIXELS вдвое) — не OSError, поэтому перечислена отдельно.
+_READ_ERRORS = (UnidentifiedImageError, Image.DecompressionBombError, OSError)
+
+# Принимаемые форматы (как их называет Pillow) -> расширение ключа в хранилище.
+# MPO — JPEG с несколькими кадрами, так снимают некоторые телефоны.
+IMAGE_EXTENSIONS: Dict[str, str] = {
+    "JPEG": "jpg",
+    "MPO": "jpg",
+    "PNG": "png",
+    "WEBP": "webp",
+    "GIF": "gif",
+}
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+
+class ImageProcessingError(Exception):
+    """Файл не удалось прочитать как изображение."""
+
+
+def detect_extension(path: str, name: str) -> str:
+    """
+    Расширение файла по его содержимому, а не по имени от клиента
+    (`name` нужно только для сообщения об ошибке). Pillow читает только
+    заголовок. Неизвестный или неподдерживаемый формат — ImageProcessingError.
+    """
+    try:
+        with Image.open(path) as image:
+            image_format = image.format
+    except Image.DecompressionBombError:
+        raise ImageProcessingError(f"File '{name}' has too many pixels")
+    except _READ_ERRORS:
+        raise ImageProcessingError(f"File '{name}' is not an image")
+    if image_format not in IMAGE_EXTENSIONS:
+        raise ImageProcessingError(f"File '{name}' has unsupported image format {image_format}")
+    return IMAGE_EXTENSIONS[image_format]
+
+
+def _flatten(image: Image.Image) -> Image.Image:
+    """Кладет изображение с прозрачностью на белый фон (для JPEG)."""
+    background = Image.new("RGB", image.size, (255, 255, 255))
+    background.paste(image, mask=image.getchannel("A"))
+    return background
+
+
+def render_variants(source_path: str, sizes: Dict[str, int], quality: int) -> int:
+    """
+    Строит все производные одного изображения рядом с ним:
+    photo.jpg -> photo_thumbnail.webp, photo_thumbnail.jpg, ...
+    Выполняется в дочернем процессе, поэтому работает только с путями
+    и простыми типами. Возвращает количество записанных файлов.
+    Прозрачность сохраняется в WebP, а в JPEG заливается белым.
+    """
+    written = 0
+    with Image.open(source_path) as image:
+        # Учитываем поворот из EXIF, иначе фото с телефона лягут набок
+        image = ImageOps.exif_transpose(image)
+        image = image.convert("RGBA" if image.has_transparency_data else "RGB")
+        for size, max_side in sizes.items():
+            variant = image.copy()
+            variant.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+            for fmt, options in _SAVE_OPTIONS.items():
+                target = variant_url(source_path, size, fmt)
+                temp = target + ".part"
+                output = variant
+                if variant.mode == "RGBA" and fmt not in _ALPHA_FORMATS:
+                    output = _flatten(variant)
+                output.save(temp, quality=quality, **options)
+                os.replace(temp, target)
+                written += 1
+    return written
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _process_pool
+    if _process_pool is None:
+        # spawn вместо fork: форк процесса с запущенным event loop и потоками небезопасен
+        _process_pool = ProcessPoolExecutor(
+            max_workers=settings.IMAGE_PROCESS_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _process_pool
+
+
+async def generate_variants(source_paths: List[str]) -> int:
+    """
+    Параллельно строит производные для набора локальных файлов
+    в пуле процессов, не нагружая event loop. Возвращает число записанных файлов.
+    """
+    if not source_paths:
+        return 0
+    loop = asyncio.get_running_loop()
+    pool = _get_pool()
+    try:
+        results = await asyncio.gather(*(
+            loop.run_in_executor(
+                pool, render_variants, path, VARIANT_SIZES, settings.IMAGE_VARIANT_QUALITY,
+            )
+            for path in source_paths
+        ))
+    except _READ_ERRORS as e:
+        raise ImageProcessingError(f"Cannot process image: {e}")
+    return sum(results)
+
+
+def shutdown_pool() -> None:
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=False, cancel_futures=True)
+        _process_pool = None
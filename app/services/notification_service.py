@@ -1,26 +1,229 @@
+import asyncio
+import json
+import logging
+import time
+from datetime import timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
 from telegram import Bot
-from sqlalchemy.ext.asyncio import AsyncSession
+from telegram.error import RetryAfter
+
 from app.core.config import settings
-from app.crud.crud_feedback import feedback as crud_feedback
-from app.crud.crud_painting import painting as crud_painting
+from app.crud.crud_notification import notification as crud_notification
 from app.db.session import SessionLocal  # фабрика сессий
+from app.models.notification import Notification
+
+logger = logging.getLogger(__name__)
 
-bot = Bot(token=settings.TELEGRAM_BOT_TOKEN)
+# Максимальная длина текста одного сообщения в Telegram
+TELEGRAM_MESSAGE_LIMIT = 4096
+# Место под заголовок сообщения
+_HEADER_RESERVE = 200
 
-async def send_feedback_notification(feedback_id: int):
-    # Открываем новую сессию для фоновой задачи
-    async with SessionLocal() as db:
-        fb = await crud_feedback.get(db, id=feedback_id)
-        p = await crud_painting.get(db, id=fb.painting_id)
 
-    text = (
-        "У вас новая заявка на обратную связь!\n"
-        f"🖼 Артикул: {p.id}\n"
-        f"👤 Пользователь: {fb.user_name}\n"
-        f"📱 Телефон: {fb.phone_number}"
+def format_feedback(payload: dict) -> str:
+    return (
+        f"🖼 Артикул: {payload['painting_id']}\n"
+        f"👤 Пользователь: {payload['user_name']}\n"
+        f"📱 Телефон: {payload['phone_number']}"
     )
-    try:
-        await bot.send_message(chat_id=settings.TELEGRAM_CHAT_ID, text=text)
-    except Exception as e:
-        # Логируем ошибку для дальнейшего расследования
-        print(f"[Notification Error] {e}")
\ No newline at end of file
+
+
+# Шаблоны по типу уведомления: (заголовок одиночного сообщения, заголовок сводки, тело)
+_FORMATS: Dict[str, Tuple[str, str, Callable[[dict], str]]] = {
+    "feedback": (
+        "У вас новая заявка на обратную связь!",
+        "Новых заявок на обратную связь: {count}",
+        format_feedback,
+    ),
+}
+
+
+def _format_body(item: Notification) -> str:
+    if item.kind in _FORMATS:
+        return _FORMATS[item.kind][2](item.payload)
+    return f"{item.kind}: {json.dumps(item.payload, ensure_ascii=False)}"
+
+
+def _header(kind: str, count: int) -> str:
+    single, digest, _ = _FORMATS.get(kind, (kind, kind + ": {count}", None))
+    return single if count == 1 else digest.format(count=count)
+
+
+def build_messages(notifications: List[Notification]) -> List[Tuple[List[int], str]]:
+    """
+    Собирает уведомления в сообщения: одно уведомление — обычное сообщение,
+    несколько однотипных подряд — сводка. Сводка делится по лимиту длины
+    Telegram. Возвращает пары (id уведомлений, текст сообщения).
+    """
+    messages = []
+    group: List[Notification] = []
+    bodies: List[str] = []
+    size = 0
+
+    def flush():
+        if group:
+            text = _header(group[0].kind, len(group)) + "\n\n" + "\n\n".join(bodies)
+            messages.append(([item.id for item in group], text))
+            group.clear()
+            bodies.clear()
+
+    for item in notifications:
+        body = _format_body(item)[:TELEGRAM_MESSAGE_LIMIT - _HEADER_RESERVE]
+        if group and (item.kind != group[0].kind or size + len(body) > TELEGRAM_MESSAGE_LIMIT - _HEADER_RESERVE):
+            flush()
+            size = 0
+        group.append(item)
+        bodies.append(body)
+        size += len(body) + 2
+    flush()
+    return messages
+
+
+class RateLimiter:
+    """Пропускает не чаще одного сообщения в `interval` секунд."""
+
+    def __init__(self, interval: float, clock: Callable[[], float] = time.monotonic):
+        self.interval = interval
+        self._clock = clock
+        self._next_at = 0.0
+
+    async def wait(self) -> None:
+        now = self._clock()
+        if self._next_at > now:
+            await asyncio.sleep(self._next_at - now)
+        self._next_at = max(now, self._next_at) + self.interval
+
+    def defer(self, seconds: float) -> None:
+        """Telegram попросил подождать: ничего не отправляем `seconds` секунд."""
+        self._next_at = max(self._next_at, self._clock() + seconds)
+
+
+class NotificationDispatcher:
+    """
+    Отправляет уведомления из outbox в Telegram.
+
+    Забирает готовые строки пачками (SKIP LOCKED, поэтому можно запускать
+    несколько диспетчеров), склеивает всплески в сводки, соблюдает интервал
+    между сообщениями и откладывает неудачные отправки с растущей задержкой.
+    Доставка «хотя бы один раз»: при падении между отправкой и отметкой
+    сообщение повторится после истечения аренды.
+    """
+
+    def __init__(
+            self,
+            *,
+            bot: Bot,
+            chat_id: int,
+            sessionmaker: async_sessionmaker = SessionLocal,
+            batch_size: int = 50,
+            poll_seconds: float = 5.0,
+            lease_seconds: float = 60.0,
+            min_interval: float = 3.0,
+            max_attempts: int = 10,
+            retry_base: float = 5.0,
+            retry_max: float = 900.0,
+    ):
+        self.bot = bot
+        self.chat_id = chat_id
+        self.sessionmaker = sessionmaker
+        self.batch_size = batch_size
+        self.poll_seconds = poll_seconds
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.limiter = RateLimiter(min_interval)
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def wake(self) -> None:
+        """Вызывается после записи нового уведомления, чтобы не ждать опроса."""
+        self._wakeup.set()
+
+    async def _send(self, text: str) -> None:
+        await self.limiter.wait()
+        await self.bot.send_message(chat_id=self.chat_id, text=text)
+
+    async def dispatch_once(self) -> int:
+        """Отправляет одну пачку и возвращает число обработанных уведомлений."""
+        async with self.sessionmaker() as db:
+            batch = await crud_notification.claim_batch(
+                db, limit=self.batch_size, lease_seconds=self.lease_seconds,
+                max_attempts=self.max_attempts,
+            )
+            messages = build_messages(batch)
+            for position, (ids, text) in enumerate(messages):
+                try:
+                    await self._send(text)
+                except RetryAfter as e:
+                    retry_after = e.retry_after
+                    if isinstance(retry_after, timedelta):
+                        retry_after = retry_after.total_seconds()
+                    self.limiter.defer(retry_after)
+                    # Остаток пачки тоже откладываем, а не держим аренду в ожидании
+                    pending = [i for later_ids, _ in messages[position:] for i in later_ids]
+                    await crud_notification.mark_failed(
+                        db, pending, error=str(e), retry_base=self.retry_base,
+                        retry_max=self.retry_max, retry_after=retry_after,
+                    )
+                    break
+                except Exception as e:
+                    logger.warning("Failed to send %d notification(s): %s", len(ids), e)
+                    await crud_notification.mark_failed(
+                        db, ids, error=f"{type(e).__name__}: {e}",
+                        retry_base=self.retry_base, retry_max=self.retry_max,
+                    )
+                else:
+                    await crud_notification.mark_sent(db, ids)
+        return len(batch)
+
+    async def run(self) -> None:
+        """Основной цикл: пачка за пачкой, пока есть что отправлять, затем ожидание."""
+        while True:
+            try:
+                processed = await self.dispatch_once()
+            except Exception:
+                # Например, недоступна БД — повторим на следующем цикле
+                logger.exception("Notification dispatch failed")
+                processed = 0
+            if processed >= self.batch_size:
+                continue
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self.run(), name="notification-dispatcher")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.bot.shutdown()
+
+
+def create_dispatcher() -> NotificationDispatcher:
+    """Создает диспетчер по настройкам приложения."""
+    return NotificationDispatcher(
+        bot=Bot(token=settings.TELEGRAM_BOT_TOKEN, base_url=settings.TELEGRAM_API_BASE_URL),
+        chat_id=settings.TELEGRAM_CHAT_ID,
+        batch_size=settings.NOTIFICATION_BATCH_SIZE,
+        poll_seconds=settings.NOTIFICATION_POLL_SECONDS,
+        lease_seconds=settings.NOTIFICATION_LEASE_SECONDS,
+        min_interval=settings.NOTIFICATION_MIN_INTERVAL_SECONDS,
+        max_attempts=settings.NOTIFICATION_MAX_ATTEMPTS,
+        retry_base=settings.NOTIFICATION_RETRY_BASE_SECONDS,
+        retry_max=settings.NOTIFICATION_RETRY_MAX_SECONDS,
+    )
+
+
+notification_dispatcher = create_dispatcher()
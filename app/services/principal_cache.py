@@ -0,0 +1,73 @@
+import time
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import LRUTTLCache
+from app.core.config import settings
+from app.core.security import decode_access_token
+from app.crud.crud_user import user as crud_user
+from app.schemas.auth import Principal, TokenData
+
+
+class PrincipalCache:
+    """
+    Кэш для авторизации запросов без обращения к БД на каждый вызов.
+
+    Хранит две вещи: уже проверенные токены (подпись и срок проверяются
+    один раз на токен) и пользователей по id в виде `Principal`.
+    Токен принимается, только если его версия совпадает с версией
+    пользователя, поэтому увеличение `token_version` отзывает все его токены:
+    в этом процессе — сразу (`invalidate`), в остальных — не позже TTL.
+    """
+
+    def __init__(self, *, enabled: bool, maxsize: int, ttl: float):
+        self.enabled = enabled
+        self.ttl = ttl
+        self._tokens = LRUTTLCache(maxsize=maxsize, ttl=ttl)
+        self._principals = LRUTTLCache(maxsize=maxsize, ttl=ttl)
+
+    def decode_token(self, token: str) -> TokenData:
+        """
+        Возвращает содержимое токена. Бросает JWTError или ValidationError,
+        если токен поддельный, просрочен или выдан до появления нужных claims.
+        """
+        token_data = self._tokens.get(token) if self.enabled else None
+        if token_data is None:
+            payload = decode_access_token(token)
+            token_data = TokenData.model_validate(payload)
+            if self.enabled:
+                # Токен не должен пережить в кэше собственный срок действия
+                ttl = min(self.ttl, payload["exp"] - time.time())
+                if ttl > 0:
+                    self._tokens.set(token, token_data, ttl=ttl)
+        return token_data
+
+    async def get_principal(self, db: AsyncSession, user_id: int) -> Optional[Principal]:
+        principal = self._principals.get(user_id) if self.enabled else None
+        if principal is None:
+            db_user = await crud_user.get(db, id=user_id)
+            if db_user is None:
+                return None
+            principal = Principal.model_validate(db_user)
+            if self.enabled:
+                self._principals.set(user_id, principal)
+        return principal
+
+    def invalidate(self, user_id: int) -> None:
+        """Вызывается после изменения пользователя (пароль, права, версия токенов)."""
+        self._principals.delete(user_id)
+
+    def stats(self) -> dict:
+        return {
+            "tokens": {**self._tokens.stats.as_dict(), "size": len(self._tokens)},
+            "principals": {**self._principals.stats.as_dict(), "size": len(self._principals)},
+            "enabled": self.enabled,
+        }
+
+
+principal_cache = PrincipalCache(
+    enabled=settings.AUTH_CACHE_ENABLED,
+    maxsize=settings.AUTH_CACHE_MAX_ENTRIES,
+    ttl=settings.AUTH_CACHE_TTL_SECONDS,
+)
@@ -0,0 +1,222 @@
+import asyncio
+import mimetypes
+import os
+import shutil
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List, Optional
+
+from app.core.config import settings
+
+# Отдельный ограниченный пул для файлового и сетевого ввода-вывода хранилища:
+# большие файлы не блокируют event loop и не занимают общий пул потоков Starlette.
+_io_executor = ThreadPoolExecutor(
+    max_workers=settings.UPLOAD_IO_THREADS, thread_name_prefix="media-io"
+)
+
+
+async def run_io(fn, *args):
+    """Выполняет блокирующую функцию в пуле ввода-вывода хранилища."""
+    return await asyncio.get_running_loop().run_in_executor(_io_executor, fn, *args)
+
+
+def _remove_quietly(path: str) -> None:
+    if os.path.exists(path):
+        os.remove(path)
+
+
+class MediaStorage(ABC):
+    """
+    Хранилище медиафайлов. Файлы адресуются ключами вида "ab/cd/<hash>.jpg";
+    в БД хранятся именно ключи, а публичные адреса строятся при отдаче ответа.
+    """
+
+    @abstractmethod
+    async def put(self, key: str, source_path: str) -> None:
+        """Кладет локальный файл под ключ `key`. Исходный файл после этого не нужен."""
+
+    @abstractmethod
+    async def exists(self, key: str) -> bool:
+        """Есть ли файл с таким ключом."""
+
+    @abstractmethod
+    async def delete(self, keys: Iterable[str]) -> None:
+        """Удаляет файлы, отсутствующие ключи пропускает."""
+
+    @abstractmethod
+    async def download(self, key: str, dest_path: str) -> None:
+        """Копирует файл из хранилища в локальный путь (нужно для обработки)."""
+
+    @abstractmethod
+    def url(self, key: str) -> str:
+        """
+        Адрес, по которому клиент скачивает файл напрямую, минуя API.
+        Не выполняет ввода-вывода, поэтому вызывается при сериализации ответа.
+        """
+
+    def url_epoch(self) -> Optional[int]:
+        """
+        Для адресов с ограниченным сроком жизни — номер текущего периода,
+        в течение которого выданные `url` еще действуют. Входит в ETag ответов
+        со ссылками на файлы, чтобы 304 не продлевал жизнь истекших ссылок.
+        None — адреса постоянные.
+        """
+        return None
+
+
+class LocalStorage(MediaStorage):
+    """Файлы на локальном диске, раздаются через /static."""
+
+    def __init__(self, root: str, url_prefix: str):
+        self.root = root
+        self.url_prefix = url_prefix
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key)
+
+    @staticmethod
+    def _move(source_path: str, target_path: str) -> None:
+        os.makedirs(os.path.dirname(target_path), exist_ok=True)
+        # os.replace атомарен: файл под итоговым именем либо целый, либо его нет
+        os.replace(source_path, target_path)
+
+    async def put(self, key: str, source_path: str) -> None:
+        await run_io(self._move, source_path, self._path(key))
+
+    async def exists(self, key: str) -> bool:
+        return await run_io(os.path.exists, self._path(key))
+
+    async def delete(self, keys: Iterable[str]) -> None:
+        await asyncio.gather(*(run_io(_remove_quietly, self._path(key)) for key in keys))
+
+    async def download(self, key: str, dest_path: str) -> None:
+        await run_io(shutil.copyfile, self._path(key), dest_path)
+
+    def url(self, key: str) -> str:
+        return self.url_prefix + key
+
+
+class S3Storage(MediaStorage):
+    """
+    S3-совместимое хранилище (AWS S3, MinIO и т.п.).
+    Файлы загружаются потоково, крупные — multipart-загрузкой.
+    Клиент получает прямые адреса (публичный бакет или CDN)
+    либо подписанные ссылки с ограниченным сроком жизни.
+    """
+
+    # Лимит S3 на количество ключей в одном DeleteObjects
+    _DELETE_BATCH = 1000
+
+    def __init__(
+            self,
+            *,
+            bucket: str,
+            endpoint_url: Optional[str] = None,
+            region: Optional[str] = None,
+            access_key_id: Optional[str] = None,
+            secret_access_key: Optional[str] = None,
+            public_base_url: Optional[str] = None,
+            presign_expires: int = 3600,
+            multipart_chunk_bytes: int = 8 * 1024 * 1024,
+    ):
+        # boto3 нужен только для этого бэкенда
+        import boto3
+        from boto3.s3.transfer import TransferConfig
+        from botocore.exceptions import ClientError
+
+        self.bucket = bucket
+        self.public_base_url = public_base_url.rstrip("/") if public_base_url else None
+        self.presign_expires = presign_expires
+        self._client_error = ClientError
+        self._client = boto3.client(
+            "s3",
+            endpoint_url=endpoint_url,
+            region_name=region,
+            aws_access_key_id=access_key_id,
+            aws_secret_access_key=secret_access_key,
+        )
+        self._transfer_config = TransferConfig(
+            multipart_threshold=multipart_chunk_bytes,
+            multipart_chunksize=multipart_chunk_bytes,
+        )
+
+    def _put_sync(self, key: str, source_path: str) -> None:
+        content_type = mimetypes.guess_type(key)[0] or "application/octet-stream"
+        self._client.upload_file(
+            source_path, self.bucket, key,
+            ExtraArgs={
+                "ContentType": content_type,
+                # Содержимое под ключом-хэшем никогда не меняется
+                "CacheControl": "public, max-age=31536000, immutable",
+            },
+            Config=self._transfer_config,
+        )
+        os.remove(source_path)
+
+    async def put(self, key: str, source_path: str) -> None:
+        await run_io(self._put_sync, key, source_path)
+
+    def _exists_sync(self, key: str) -> bool:
+        try:
+            self._client.head_object(Bucket=self.bucket, Key=key)
+        except self._client_error as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+        return True
+
+    async def exists(self, key: str) -> bool:
+        return await run_io(self._exists_sync, key)
+
+    def _delete_sync(self, keys: List[str]) -> None:
+        for start in range(0, len(keys), self._DELETE_BATCH):
+            batch = keys[start:start + self._DELETE_BATCH]
+            self._client.delete_objects(
+                Bucket=self.bucket,
+                Delete={"Objects": [{"Key": key} for key in batch], "Quiet": True},
+            )
+
+    async def delete(self, keys: Iterable[str]) -> None:
+        keys = list(keys)
+        if keys:
+            await run_io(self._delete_sync, keys)
+
+    async def download(self, key: str, dest_path: str) -> None:
+        await run_io(self._client.download_file, self.bucket, key, dest_path)
+
+    def url_epoch(self) -> Optional[int]:
+        if self.public_base_url:
+            return None
+        # Период — половина срока подписи: ссылки из ответа, подтвержденного
+        # через 304, действуют еще не меньше половины срока
+        return int(time.time() // max(self.presign_expires // 2, 1))
+
+    def url(self, key: str) -> str:
+        if self.public_base_url:
+            return f"{self.public_base_url}/{key}"
+        # Подпись считается локально, без обращения к S3
+        return self._client.generate_presigned_url(
+            "get_object",
+            Params={"Bucket": self.bucket, "Key": key},
+            ExpiresIn=self.presign_expires,
+        )
+
+
+def create_storage() -> MediaStorage:
+    """Создает хранилище по настройкам STORAGE_BACKEND."""
+    if settings.STORAGE_BACKEND == "s3":
+        return S3Storage(
+            bucket=settings.S3_BUCKET,
+            endpoint_url=settings.S3_ENDPOINT_URL,
+            region=settings.S3_REGION,
+            access_key_id=settings.S3_ACCESS_KEY_ID,
+            secret_access_key=settings.S3_SECRET_ACCESS_KEY,
+            public_base_url=settings.S3_PUBLIC_BASE_URL,
+            presign_expires=settings.S3_PRESIGN_EXPIRES_SECONDS,
+        )
+    return LocalStorage(root=settings.LOCAL_STORAGE_DIR, url_prefix=settings.LOCAL_STORAGE_URL_PREFIX)
+
+
+storage = create_storage()
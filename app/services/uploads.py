@@ -0,0 +1,212 @@
+import asyncio
+import hashlib
+import os
+import uuid
+from collections import Counter
+from dataclasses import dataclass
+from typing import Iterable, List
+
+from fastapi import UploadFile
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.core.image_variants import VARIANT_FORMATS, VARIANT_SIZES, all_variant_urls, variant_url
+from app.crud.crud_media_file import media_file as crud_media_file
+from app.db.session import SessionLocal
+from app.services.images import detect_extension, generate_variants
+from app.services.storage import run_io, storage
+
+os.makedirs(settings.UPLOAD_STAGING_DIR, exist_ok=True)
+
+
+class UploadTooLargeError(Exception):
+    """Файл превышает допустимый размер."""
+
+
+class UploadBatchError(Exception):
+    """
+    Не удалось сохранить файлы запроса. Опубликованные к этому моменту
+    файлы уже освобождены, `error` — исходная ошибка.
+    """
+
+    def __init__(self, error: BaseException):
+        super().__init__(str(error))
+        self.error = error
+
+
+@dataclass
+class StagedFile:
+    """Принятый файл во временном каталоге и его будущий ключ в хранилище."""
+    key: str
+    path: str
+
+
+def _discard(path: str, handle=None) -> None:
+    """Закрывает и удаляет недописанный файл, если он есть."""
+    if handle is not None and not handle.closed:
+        handle.close()
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def shard_key(digest: str, extension: str) -> str:
+    """
+    Ключ файла по его хэшу: ab/cd/abcd...ef.jpg.
+    Два уровня каталогов по префиксу хэша не дают одной папке
+    разрастись до сотен тысяч файлов.
+    """
+    return f"{digest[:2]}/{digest[2:4]}/{digest}.{extension}"
+
+
+def staged_variant_paths(path: str) -> List[str]:
+    """Локальные пути производных, которые render_variants кладет рядом с файлом."""
+    return [variant_url(path, size, fmt) for size in VARIANT_SIZES for fmt in VARIANT_FORMATS]
+
+
+def variant_keys(key: str) -> List[str]:
+    """Ключи производных в том же порядке, что и `staged_variant_paths`."""
+    return [variant_url(key, size, fmt) for size in VARIANT_SIZES for fmt in VARIANT_FORMATS]
+
+
+async def _stage_one(upload: UploadFile) -> StagedFile:
+    """
+    Потоково принимает один файл во временный каталог: пишет кусками,
+    проверяя лимит размера и считая SHA-256 содержимого. Расширение ключа
+    берется из формата изображения: имя файла от клиента не используется.
+    """
+    temp_path = os.path.join(settings.UPLOAD_STAGING_DIR, str(uuid.uuid4()))
+
+    handle = None
+    written = 0
+    digest = hashlib.sha256()
+    try:
+        handle = await run_io(open, temp_path, "wb")
+        while chunk := await upload.read(settings.UPLOAD_CHUNK_BYTES):
+            written += len(chunk)
+            if written > settings.UPLOAD_MAX_FILE_BYTES:
+                raise UploadTooLargeError(
+                    f"File '{upload.filename}' exceeds {settings.UPLOAD_MAX_FILE_BYTES} bytes"
+                )
+            digest.update(chunk)
+            await run_io(handle.write, chunk)
+        await run_io(handle.close)
+        extension = await run_io(detect_extension, temp_path, upload.filename)
+    except BaseException:
+        await run_io(_discard, temp_path, handle)
+        raise
+    finally:
+        await upload.close()
+
+    return StagedFile(key=shard_key(digest.hexdigest(), extension), path=temp_path)
+
+
+async def _publish(staged: StagedFile) -> None:
+    """Кладет оригинал и его производные в хранилище."""
+    await asyncio.gather(*(
+        storage.put(key, path)
+        for key, path in zip(variant_keys(staged.key), staged_variant_paths(staged.path))
+    ))
+    # Оригинал — последним: его наличие означает, что файл опубликован целиком
+    await storage.put(staged.key, staged.path)
+
+
+async def save_uploads(uploads: List[UploadFile], *, sessionmaker: async_sessionmaker = SessionLocal) -> List[str]:
+    """
+    Сохраняет несколько файлов и возвращает их ключи в исходном порядке.
+
+    1. Файлы параллельно принимаются во временный каталог с подсчетом хэша.
+    2. Ключи закрепляются в mediafiles: +1 к счетчику ссылок за каждый файл,
+       отдельной транзакцией.
+    3. Файлы, которые уже есть в хранилище (дубликаты), больше не обрабатываются.
+    4. Для новых файлов в пуле процессов строятся производные.
+    5. Оригиналы и производные публикуются в хранилище.
+
+    Пропускать публикацию дубликата можно только потому, что ключ уже
+    закреплен: закрепленный файл `release_uploads` не удалит, а удаление,
+    начатое раньше, закрепление дожидается. Закрепление снимает вызывающий
+    код через `release_uploads(db, unpin=ключи)` после коммита картины,
+    которая на них ссылается, или после неудачи. Если процесс упадет
+    раньше, файлы просто останутся в хранилище.
+
+    При ошибке временные файлы удаляются, закрепление снимается здесь же,
+    а опубликованные файлы без других ссылок удаляются.
+    """
+    results = await asyncio.gather(*(_stage_one(upload) for upload in uploads), return_exceptions=True)
+    staged = [result for result in results if isinstance(result, StagedFile)]
+    pinned: List[str] = []
+    try:
+        errors = [result for result in results if isinstance(result, BaseException)]
+        if errors:
+            raise errors[0]
+
+        async with sessionmaker() as db:
+            await crud_media_file.adjust_references(db, Counter(item.key for item in staged))
+            await db.commit()
+        pinned = [item.key for item in staged]
+
+        exists = await asyncio.gather(*(storage.exists(item.key) for item in staged))
+        fresh = {item.key: item for item, found in zip(staged, exists) if not found}
+        await generate_variants([item.path for item in fresh.values()])
+
+        for item in fresh.values():
+            await _publish(item)
+    except BaseException as e:
+        await _cleanup(staged)
+        if pinned:
+            async with sessionmaker() as db:
+                await release_uploads(db, unpin=pinned)
+        if isinstance(e, Exception):
+            raise UploadBatchError(e)
+        raise
+    await _cleanup(staged)
+    return pinned
+
+
+async def release_uploads(db: AsyncSession, keys: Iterable[str] = (), *, unpin: Iterable[str] = ()) -> None:
+    """
+    Снимает закрепление `unpin`, поставленное `save_uploads`, и удаляет
+    из хранилища файлы из `keys` и `unpin` (с производными), на которые
+    больше не ссылается ни одна картина. Файлы хранятся по хэшу содержимого
+    и могут быть общими, поэтому удалять их напрямую нельзя. Коммитит сессию.
+
+    Удаляются только файлы с учетной записью и счетчиком 0. Их записи
+    заблокированы, пока файлы удаляются из хранилища, поэтому загрузка
+    того же файла ждет конца удаления и публикует его заново.
+    """
+    unpin = Counter(unpin)
+    if unpin:
+        await crud_media_file.adjust_references(db, {key: -count for key, count in unpin.items()})
+        await db.commit()
+
+    garbage = await crud_media_file.lock_unreferenced(db, [*keys, *unpin])
+    await delete_uploads(garbage + all_variant_urls(garbage))
+    await crud_media_file.remove_keys(db, garbage)
+    await db.commit()
+
+
+async def _cleanup(staged: Iterable[StagedFile]) -> None:
+    """Удаляет оставшиеся временные файлы (уже опубликованные перенесены)."""
+    paths = [path for item in staged for path in [item.path, *staged_variant_paths(item.path)]]
+    await asyncio.gather(*(run_io(_discard, path) for path in paths))
+
+
+async def rebuild_variants(key: str) -> None:
+    """Заново строит производные уже сохраненного файла (для бэкфилла)."""
+    extension = key.rsplit(".", 1)[-1]
+    staged = StagedFile(
+        key=key, path=os.path.join(settings.UPLOAD_STAGING_DIR, f"{uuid.uuid4()}.{extension}")
+    )
+    try:
+        await storage.download(key, staged.path)
+        await generate_variants([staged.path])
+        await asyncio.gather(*(
+            storage.put(variant_key, path)
+            for variant_key, path in zip(variant_keys(key), staged_variant_paths(staged.path))
+        ))
+    finally:
+        await _cleanup([staged])
+
+
+async def delete_uploads(keys: Iterable[str]) -> None:
+    """Удаляет файлы из хранилища по ключам, отсутствующие пропускает."""
+    await storage.delete(keys)
@@ -0,0 +1,87 @@
+"""
+Пропускная способность публичных эндпоинтов каталога с кэшем и без него.
+
+Приложение вызывается в том же процессе через httpx.ASGITransport,
+поэтому замер показывает стоимость обработки запроса без сетевых накладных.
+Нагрузка — смесь списка, подсчета, карточки картины и тегов
+на небольшом наборе повторяющихся фильтров, как у реальной витрины.
+
+Запуск:
+    python -m benchmarks.bench_catalog_cache --database-url postgresql+asyncpg://.../bench
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import random
+import time
+
+from benchmarks.common import make_engine, reset_catalog
+
+REQUEST_MIX = [
+    ("/api/paintings", {}),
+    ("/api/paintings", {"tags": "море"}),
+    ("/api/paintings", {"width_min": 50, "width_max": 120}),
+    ("/api/paintings", {"skip": 24}),
+    ("/api/paintings/count", {}),
+    ("/api/paintings/count", {"tags": "море"}),
+    ("/api/paintings/tags/all", {}),
+    ("/api/paintings/{id}", {}),
+]
+
+
+async def run_load(client, *, duration: float, concurrency: int, max_id: int) -> float:
+    """Гоняет смесь запросов `duration` секунд и возвращает запросов в секунду."""
+    deadline = time.perf_counter() + duration
+    done = 0
+    rng = random.Random(42)
+    # Ограниченный набор карточек, чтобы у кэша был шанс на попадания
+    hot_ids = [rng.randint(1, max_id) for _ in range(50)]
+    mix = itertools.cycle(REQUEST_MIX)
+
+    async def worker():
+        nonlocal done
+        while time.perf_counter() < deadline:
+            path, params = next(mix)
+            if "{id}" in path:
+                path = path.replace("{id}", str(rng.choice(hot_ids)))
+            response = await client.get(path, params=params)
+            response.raise_for_status()
+            done += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return done / (time.perf_counter() - started)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark catalog reads with the cache on and off.")
+    parser.add_argument("--database-url", required=True, help="Separate database, it will be truncated.")
+    parser.add_argument("--size", type=int, default=100_000)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+
+    engine = make_engine(args.database_url)
+    await reset_catalog(engine, args.size)
+    await engine.dispose()
+
+    # Приложение читает адрес БД из настроек, поэтому подменяем его до импорта
+    os.environ["DATABASE_URL"] = args.database_url
+    import httpx
+    from app.main import app
+    from app.services.catalog_cache import catalog_cache
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for enabled in (False, True):
+            catalog_cache.enabled = enabled
+            catalog_cache.invalidate()
+            rps = await run_load(
+                client, duration=args.duration, concurrency=args.concurrency, max_id=args.size
+            )
+            print(f"cache {'on ' if enabled else 'off'}: {rps:10.1f} req/s  stats={catalog_cache.stats()}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,102 @@
+"""
+Пропускная способность приема заявок обратной связи.
+
+Сравнивает прежний путь (две CRUDBase.create: сессия, затем отзыв —
+две транзакции и commit/refresh на каждую) с create_with_session,
+которая вставляет обе строки одним INSERT ... RETURNING.
+Нагрузка — `--concurrency` параллельных клиентов, у каждого своя сессия
+из пула, как у запросов к API. Печатает заявок в секунду и число
+запросов к БД на одну заявку.
+
+Запуск:
+    python -m benchmarks.bench_feedback_ingest --database-url postgresql+asyncpg://.../bench
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from sqlalchemy import event, text
+
+from app.crud.crud_feedback import feedback as crud_feedback
+from app.crud.crud_user_session import user_session as crud_user_session
+from app.schemas.feedback import FeedbackBase, FeedbackCreate
+from app.schemas.user_session import UserSessionCreate
+from benchmarks.common import make_engine, make_sessionmaker, reset_catalog
+
+
+async def submit_two_transactions(db, feedback_in: FeedbackBase) -> None:
+    """Прежняя реализация эндпоинта."""
+    new_session = await crud_user_session.create(db=db, obj_in=UserSessionCreate())
+    await crud_feedback.create(
+        db=db, obj_in=FeedbackCreate(**feedback_in.model_dump(), user_session_id=new_session.id)
+    )
+
+
+async def submit_single_statement(db, feedback_in: FeedbackBase) -> None:
+    await crud_feedback.create_with_session(db, obj_in=feedback_in)
+
+
+async def run_load(sessionmaker, submit, *, duration: float, concurrency: int, max_id: int) -> int:
+    """Отправляет заявки `duration` секунд и возвращает их количество."""
+    deadline = time.perf_counter() + duration
+    done = 0
+
+    async def worker(seed: int):
+        nonlocal done
+        rng = random.Random(seed)
+        while time.perf_counter() < deadline:
+            feedback_in = FeedbackBase(
+                user_name=f"Клиент {rng.randint(1, 10_000)}",
+                phone_number=f"+7900{rng.randint(0, 9_999_999):07d}",
+                painting_id=rng.randint(1, max_id),
+            )
+            async with sessionmaker() as db:
+                await submit(db, feedback_in)
+            done += 1
+
+    await asyncio.gather(*(worker(seed) for seed in range(concurrency)))
+    return done
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark feedback ingestion.")
+    parser.add_argument("--database-url", required=True, help="Separate database, it will be truncated.")
+    parser.add_argument("--size", type=int, default=10_000)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    engine = make_engine(args.database_url)
+    await reset_catalog(engine, args.size)
+    sessionmaker = make_sessionmaker(engine)
+
+    statements = 0
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def count_statement(*_):
+        nonlocal statements
+        statements += 1
+
+    for label, submit in (
+            ("two transactions", submit_two_transactions),
+            ("single statement", submit_single_statement),
+    ):
+        async with engine.begin() as conn:
+            await conn.execute(text("TRUNCATE feedbacks, usersessions RESTART IDENTITY"))
+        statements = 0
+        started = time.perf_counter()
+        done = await run_load(
+            sessionmaker, submit, duration=args.duration, concurrency=args.concurrency, max_id=args.size
+        )
+        elapsed = time.perf_counter() - started
+        print(
+            f"{label:<17}: {done / elapsed:8.1f} submissions/s, "
+            f"{statements / max(done, 1):4.1f} statements per submission"
+        )
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
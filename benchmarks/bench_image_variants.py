@@ -0,0 +1,61 @@
+"""
+Пропускная способность построения производных изображений.
+
+Генерирует набор синтетических «сканов» заданного размера и прогоняет их
+через render_variants в пуле процессов с разным числом воркеров.
+Печатает изображений в секунду всего и в пересчете на одно ядро.
+
+Запуск:
+    python -m benchmarks.bench_image_variants --count 48 --size 4000x3000
+"""
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image
+
+from app.core.image_variants import VARIANT_SIZES
+from app.services.images import render_variants
+
+
+def make_source_images(directory: str, count: int, width: int, height: int):
+    """Фото с шумом: в отличие от однотонной заливки, кодируется как настоящее."""
+    paths = []
+    noise = Image.effect_noise((width, height), 64).convert("RGB")
+    for i in range(count):
+        path = os.path.join(directory, f"source_{i}.jpg")
+        noise.rotate(i % 4 * 90, expand=False).save(path, "JPEG", quality=92)
+        paths.append(path)
+    return paths
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark image variant generation.")
+    parser.add_argument("--count", type=int, default=48)
+    parser.add_argument("--size", default="4000x3000")
+    parser.add_argument("--quality", type=int, default=82)
+    parser.add_argument("--workers", type=int, nargs="+", default=None)
+    args = parser.parse_args()
+
+    width, height = (int(side) for side in args.size.split("x"))
+    workers_list = args.workers or sorted({1, 2, os.cpu_count() or 1})
+
+    with tempfile.TemporaryDirectory() as directory:
+        sources = make_source_images(directory, args.count, width, height)
+        context = multiprocessing.get_context("spawn")
+        for workers in workers_list:
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+                # Прогрев: запуск процессов не должен попадать в замер
+                list(pool.map(render_variants, sources[:workers], [VARIANT_SIZES] * workers, [args.quality] * workers))
+                started = time.perf_counter()
+                list(pool.map(render_variants, sources, [VARIANT_SIZES] * len(sources), [args.quality] * len(sources)))
+                elapsed = time.perf_counter() - started
+            rate = len(sources) / elapsed
+            print(f"workers={workers:>2}: {rate:7.2f} images/s, {rate / workers:6.2f} images/s per core")
+
+
+if __name__ == "__main__":
+    main()
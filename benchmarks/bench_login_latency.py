@@ -0,0 +1,102 @@
+"""
+Задержка публичных эндпоинтов, пока воркер засыпают попытками входа.
+
+Несколько клиентов непрерывно логинятся (с верным паролем, чтобы не сработал
+ограничитель попыток), а отдельный клиент последовательно запрашивает
+публичный эндпоинт и замеряет задержку. Сравниваются прежняя проверка
+пароля прямо в event loop и проверка в ограниченном пуле потоков.
+Приложение вызывается в том же процессе через httpx.ASGITransport.
+
+Запуск:
+    python -m benchmarks.bench_login_latency --database-url postgresql+asyncpg://.../bench
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from sqlalchemy import delete
+
+from benchmarks.common import make_engine, make_sessionmaker, median, percentile, reset_catalog
+
+USERNAME = "bench-admin"
+PASSWORD = "bench-password"
+PROBE_PATH = "/api/paintings/tags/all"
+
+
+async def run_mode(client, *, duration: float, logins: int):
+    """Возвращает (задержки пробного эндпоинта в мс, входов в секунду)."""
+    deadline = time.perf_counter() + duration
+    latencies = []
+    done = 0
+
+    async def hammer():
+        nonlocal done
+        while time.perf_counter() < deadline:
+            response = await client.post("/api/auth/login", data={"username": USERNAME, "password": PASSWORD})
+            response.raise_for_status()
+            done += 1
+
+    async def probe():
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            response = await client.get(PROBE_PATH)
+            response.raise_for_status()
+            latencies.append((time.perf_counter() - started) * 1000)
+            await asyncio.sleep(0.005)
+
+    await asyncio.gather(probe(), *(hammer() for _ in range(logins)))
+    return latencies, done / duration
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark public latency under login load.")
+    parser.add_argument("--database-url", required=True, help="Separate database, it will be truncated.")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--logins", type=int, default=8, help="Concurrent login clients.")
+    args = parser.parse_args()
+
+    engine = make_engine(args.database_url)
+    await reset_catalog(engine, 1000)
+
+    # Приложение читает адрес БД из настроек, поэтому подменяем его до импорта
+    os.environ["DATABASE_URL"] = args.database_url
+    import httpx
+    from app.core.security import get_password_hash, verify_password
+    from app.crud import user as crud_user
+    from app.main import app
+    from app.models.user import User
+    from app.services.catalog_cache import catalog_cache
+
+    async with make_sessionmaker(engine)() as db:
+        await db.execute(delete(User).where(User.username == USERNAME))
+        db.add(User(username=USERNAME, hashed_password=get_password_hash(PASSWORD), is_superuser=False))
+        await db.commit()
+    await engine.dispose()
+
+    async def authenticate_in_loop(db, *, username: str, password: str):
+        """Прежняя реализация: bcrypt прямо в event loop."""
+        user = await crud_user.get_by_username(db, username=username)
+        if not user or not verify_password(password, user.hashed_password):
+            return None
+        return user
+
+    # Пробный эндпоинт должен быть дешевым, чтобы была видна именно блокировка
+    catalog_cache.enabled = True
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for label, authenticate in (
+                ("bcrypt in event loop", authenticate_in_loop),
+                ("bcrypt in executor", crud_user.authenticate),
+        ):
+            crud_user.authenticate = authenticate
+            latencies, logins_per_second = await run_mode(client, duration=args.duration, logins=args.logins)
+            print(
+                f"{label:<21}: {PROBE_PATH} p50 {median(latencies):7.1f} ms  "
+                f"p95 {percentile(latencies, 95):7.1f} ms  p99 {percentile(latencies, 99):7.1f} ms  "
+                f"({len(latencies)} probes, {logins_per_second:.1f} logins/s)"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,83 @@
+"""
+Сравнение OFFSET- и keyset-пагинации каталога.
+
+Для каждого размера каталога (по умолчанию 1k, 10k, 100k, 1M) заполняет
+таблицу и замеряет медианную задержку первой, средней и последней страницы
+в обоих режимах, с фильтрами и без. У keyset-режима задержка глубокой
+страницы должна оставаться примерно такой же, как у первой.
+
+Запуск:
+    python -m benchmarks.bench_pagination --database-url postgresql+asyncpg://.../bench
+"""
+import argparse
+import asyncio
+
+from sqlalchemy import select
+
+from app.crud.crud_painting import painting as crud_painting
+from benchmarks.common import make_engine, make_sessionmaker, measure, median, reset_catalog
+
+PAGE_SIZE = 12
+
+FILTER_SETS = {
+    "no filters": {},
+    "tags+width": {"tags": ["море"], "width_min": 50.0},
+}
+
+
+async def cursor_for_page(db, page: int, sort: str, filters: dict):
+    """Курсор, указывающий на начало страницы `page` (вычисляется вне замера)."""
+    if page == 0:
+        return None
+    query = crud_painting._apply_filters(select(crud_painting.model), **filters)
+    query = crud_painting._apply_keyset(query, sort=sort).offset(page * PAGE_SIZE - 1).limit(1)
+    last = (await db.execute(query)).scalars().first()
+    return crud_painting.make_cursor(last, sort=sort) if last else None
+
+
+async def bench_size(sessionmaker, n: int, sort: str, repeat: int) -> None:
+    async with sessionmaker() as db:
+        for label, filters in FILTER_SETS.items():
+            total = await crud_painting.count_filtered(db, **filters)
+            last_page = max(total // PAGE_SIZE - 1, 0)
+            for page in sorted({0, last_page // 2, last_page}):
+                cursor = await cursor_for_page(db, page, sort, filters)
+
+                async def offset_page():
+                    await crud_painting.get_multi_filtered(
+                        db, skip=page * PAGE_SIZE, limit=PAGE_SIZE, sort=sort, **filters
+                    )
+
+                async def keyset_page():
+                    await crud_painting.get_multi_filtered(
+                        db, cursor=cursor, limit=PAGE_SIZE, sort=sort, **filters
+                    )
+
+                offset_ms = median(await measure(offset_page, repeat=repeat))
+                keyset_ms = median(await measure(keyset_page, repeat=repeat))
+                print(
+                    f"{n:>9} | {label:<11} | page {page:>7} | "
+                    f"offset {offset_ms:8.2f} ms | keyset {keyset_ms:8.2f} ms"
+                )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark OFFSET vs keyset pagination.")
+    parser.add_argument("--database-url", required=True, help="Separate database, it will be truncated.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument("--sort", default="id")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    engine = make_engine(args.database_url)
+    sessionmaker = make_sessionmaker(engine)
+    try:
+        for n in args.sizes:
+            await reset_catalog(engine, n)
+            await bench_size(sessionmaker, n, args.sort, args.repeat)
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
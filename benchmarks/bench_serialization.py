@@ -0,0 +1,111 @@
+"""
+Стоимость сериализации страницы каталога: стандартный путь FastAPI
+против FAST_JSON_RESPONSES.
+
+Стандартный путь: ORM-объекты валидируются в PaintingInDB по одному,
+затем FastAPI еще раз прогоняет ответ через response_model и кодирует
+результат json.dumps в JSONResponse. Быстрый путь: страница валидируется
+одним вызовом painting_list_adapter и сразу сериализуется в байты.
+Отдельно замеряется попадание в кэш каталога, когда схемы уже построены
+и остается только сериализация.
+
+Перед замером проверяется, что оба пути отдают один и тот же JSON
+(в том числе псевдоним article_code). База данных не нужна — ORM-объекты
+строятся в памяти, но нужны обычные настройки приложения (.env).
+
+Запуск:
+    python -m benchmarks.bench_serialization --sizes 12 100
+"""
+import argparse
+import asyncio
+import json
+import random
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute, serialize_response
+
+import app.crud  # noqa: F401 — регистрирует все модели, нужные связям Painting
+from app.api.routers.paintings import router
+from app.models.painting import Painting
+from app.schemas.painting import PaintingInDB, painting_list_adapter
+from benchmarks.common import measure, median
+
+WORDS = ["море", "закат", "холст", "масло", "пейзаж", "портрет", "город", "лес", "свет", "тень"]
+
+
+def make_paintings(count: int) -> list:
+    """Картины с правдоподобным объемом данных: описание, теги, 1–4 фото."""
+    rng = random.Random(count)
+    return [
+        Painting(
+            id=i + 1,
+            title=" ".join(rng.choices(WORDS, k=3)).capitalize(),
+            width=rng.randint(20, 200) + 0.5,
+            height=rng.randint(20, 200),
+            tags=rng.sample(WORDS, k=rng.randint(2, 5)),
+            description=" ".join(rng.choices(WORDS, k=80)),
+            photo_filenames=[
+                f"{rng.getrandbits(8):02x}/{rng.getrandbits(8):02x}/{rng.getrandbits(128):032x}.jpg"
+                for _ in range(rng.randint(1, 4))
+            ],
+        )
+        for i in range(count)
+    ]
+
+
+def list_response_field():
+    """Поле response_model списка ровно в том виде, в каком его использует FastAPI."""
+    for route in router.routes:
+        if isinstance(route, APIRoute) and route.name == "read_paintings":
+            return route.secure_cloned_response_field
+    raise RuntimeError("read_paintings route not found")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark catalog JSON serialization.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[12, 100])
+    parser.add_argument("--repeat", type=int, default=500)
+    args = parser.parse_args()
+
+    field = list_response_field()
+
+    async def default_body(schemas) -> bytes:
+        content = await serialize_response(field=field, response_content=schemas)
+        return JSONResponse(content).body
+
+    for size in args.sizes:
+        orm_page = make_paintings(size)
+        schemas = [PaintingInDB.model_validate(p) for p in orm_page]
+
+        expected = json.loads(await default_body(schemas))
+        actual = json.loads(painting_list_adapter.dump_json(schemas, by_alias=True))
+        if actual != expected or "article_code" not in actual[0]:
+            raise SystemExit("Fast path output differs from the default FastAPI response")
+
+        async def default_miss():
+            await default_body([PaintingInDB.model_validate(p) for p in orm_page])
+
+        async def fast_miss():
+            painting_list_adapter.dump_json(painting_list_adapter.validate_python(orm_page), by_alias=True)
+
+        async def default_hit():
+            await default_body(schemas)
+
+        async def fast_hit():
+            painting_list_adapter.dump_json(schemas, by_alias=True)
+
+        print(f"page of {size} paintings, median per page:")
+        for label, default_fn, fast_fn in (
+                ("from ORM (cache miss)", default_miss, fast_miss),
+                ("from cached schemas", default_hit, fast_hit),
+        ):
+            default_ms = median(await measure(default_fn, repeat=args.repeat, warmup=20))
+            fast_ms = median(await measure(fast_fn, repeat=args.repeat, warmup=20))
+            print(
+                f"  {label:<22} default {default_ms * 1000:8.1f} µs"
+                f"   fast {fast_ms * 1000:8.1f} µs   x{default_ms / fast_ms:.1f}"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,88 @@
+"""
+Раздача загрузок: обычный StaticFiles против ImmutableStaticFiles.
+
+Оба варианта вызываются в том же процессе через httpx.ASGITransport на одном
+и том же наборе файлов. Замеряются полная загрузка, перепроверка по ETag (304)
+и Range-запрос к крупному файлу. Главный выигрыш immutable-кэширования —
+клиент вообще не приходит за файлом повторно — в процессе не виден,
+поэтому в отчете отдельно показан заголовок Cache-Control каждого варианта.
+
+Запуск:
+    python -m benchmarks.bench_static_files --duration 5
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+import httpx
+from fastapi.staticfiles import StaticFiles
+from starlette.applications import Starlette
+from starlette.routing import Mount
+
+from app.core.static_files import ImmutableStaticFiles
+
+FILES = {
+    "small.webp": 40 * 1024,
+    "large.jpg": 5 * 1024 * 1024,
+}
+
+
+async def run_load(client, make_request, *, duration: float, concurrency: int) -> float:
+    deadline = time.perf_counter() + duration
+    done = 0
+
+    async def worker():
+        nonlocal done
+        while time.perf_counter() < deadline:
+            response = await make_request()
+            assert response.status_code in (200, 206, 304), response.status_code
+            done += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return done / (time.perf_counter() - started)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark static upload serving.")
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        for name, size in FILES.items():
+            with open(os.path.join(directory, name), "wb") as f:
+                f.write(os.urandom(size))
+
+        variants = {
+            "StaticFiles": StaticFiles(directory=directory),
+            "ImmutableStaticFiles": ImmutableStaticFiles(directory=directory),
+        }
+        for label, static_app in variants.items():
+            app = Starlette(routes=[Mount("/static/uploads", app=static_app)])
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+                first = await client.get("/static/uploads/small.webp")
+                etag = first.headers["etag"]
+                scenarios = {
+                    "full small": lambda: client.get("/static/uploads/small.webp"),
+                    "full large": lambda: client.get("/static/uploads/large.jpg"),
+                    "revalidate": lambda: client.get(
+                        "/static/uploads/small.webp", headers={"If-None-Match": etag}
+                    ),
+                    "range 64KB": lambda: client.get(
+                        "/static/uploads/large.jpg", headers={"Range": "bytes=1048576-1114111"}
+                    ),
+                }
+                print(f"{label} (Cache-Control: {first.headers.get('cache-control', '-')})")
+                for scenario, make_request in scenarios.items():
+                    rps = await run_load(
+                        client, make_request, duration=args.duration, concurrency=args.concurrency
+                    )
+                    print(f"  {scenario:<11} {rps:10.1f} req/s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,95 @@
+"""
+Проверка условных запросов к наборам картин после удаления.
+
+Удаление картины, которая не была изменена последней, не сдвигает
+max(updated_at), поэтому для списков, количества, фасетов и тегов
+If-Modified-Since не должен давать 304: после удаления каждый такой
+запрос обязан вернуть 200, а старый ETag — перестать совпадать.
+Валидатор набора считается только для условного запроса, поэтому первый
+ETag берется из ответа на запрос с заведомо чужим If-None-Match; обычный
+запрос после него должен получить тот же ETag из кэша каталога.
+Приложение вызывается в том же процессе через httpx.ASGITransport.
+Завершается с кодом 1, если что-то не так.
+
+Запуск:
+    python -m benchmarks.check_conditional_get --database-url postgresql+asyncpg://.../bench
+"""
+import argparse
+import asyncio
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+from benchmarks.common import make_engine, reset_catalog
+
+COLLECTIONS = [
+    ("/api/paintings", {}),
+    ("/api/paintings", {"view": "grid"}),
+    ("/api/paintings/count", {}),
+    ("/api/paintings/facets", {}),
+    ("/api/paintings/tags/all", {}),
+    ("/api/paintings/tags/counts", {}),
+]
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Check conditional GETs on collections after a delete.")
+    parser.add_argument("--database-url", required=True, help="Separate database, it will be truncated.")
+    args = parser.parse_args()
+
+    engine = make_engine(args.database_url)
+    await reset_catalog(engine, 100)
+    await engine.dispose()
+
+    # Приложение читает адрес БД из настроек, поэтому подменяем его до импорта
+    os.environ["DATABASE_URL"] = args.database_url
+    import httpx
+    from app.core.http_cache import http_date
+    from app.crud.crud_painting import painting as crud_painting
+    from app.db.session import SessionLocal
+    from app.main import app
+    from app.services.catalog_cache import catalog_cache
+
+    # Дата заведомо позже любого изменения: If-Modified-Since с ней
+    # дал бы 304, если бы учитывалось только время
+    future = http_date(datetime.now(timezone.utc) + timedelta(days=1))
+    problems = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://check") as client:
+        etags = {}
+        for path, params in COLLECTIONS:
+            response = await client.get(path, params=params, headers={"If-None-Match": '"stale"'})
+            response.raise_for_status()
+            etags[(path, str(params))] = response.headers["ETag"]
+            if "Last-Modified" in response.headers:
+                problems.append(f"{path} {params}: sends Last-Modified that deletes do not change")
+            plain = await client.get(path, params=params)
+            if plain.headers.get("ETag") != response.headers["ETag"]:
+                problems.append(f"{path} {params}: unconditional request got ETag {plain.headers.get('ETag')!r}")
+            revalidated = await client.get(path, params=params, headers={"If-None-Match": response.headers["ETag"]})
+            if revalidated.status_code != 304:
+                problems.append(f"{path} {params}: unchanged ETag gave {revalidated.status_code}, expected 304")
+
+        # Все картины засеяны одной транзакцией, так что удаляемая — не новее остальных
+        async with SessionLocal() as db:
+            await crud_painting.remove(db, id=50)
+        catalog_cache.invalidate()
+
+        for path, params in COLLECTIONS:
+            by_date = await client.get(path, params=params, headers={"If-Modified-Since": future})
+            by_etag = await client.get(path, params=params, headers={"If-None-Match": etags[(path, str(params))]})
+            for header, response in (("If-Modified-Since", by_date), ("old If-None-Match", by_etag)):
+                status = "ok" if response.status_code == 200 else "FAIL"
+                print(f"{status:<5}{path} {params or ''} {header}: {response.status_code}")
+                if response.status_code != 200:
+                    problems.append(f"{path} {params}: {header} after delete gave {response.status_code}")
+
+    for problem in problems:
+        print(f"FAIL: {problem}")
+    if problems:
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
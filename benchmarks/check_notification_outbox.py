@@ -0,0 +1,112 @@
+"""
+Сквозная проверка outbox уведомлений на фейковом Telegram.
+
+Создает всплеск заявок через create_with_session, поднимает фейковый
+Bot API со сценарием ошибок (429 с retry_after, затем 500) и гоняет
+NotificationDispatcher, пока все уведомления не будут отправлены.
+Проверяет, что каждая заявка дошла, что всплеск склеен в сводки и что
+интервал между сообщениями не меньше заданного. Завершается с кодом 1,
+если что-то не так.
+
+Запуск:
+    python -m benchmarks.check_notification_outbox --database-url postgresql+asyncpg://.../bench
+"""
+import argparse
+import asyncio
+import re
+import sys
+import time
+
+from sqlalchemy import func, select, text
+from telegram import Bot
+
+from app.crud.crud_feedback import feedback as crud_feedback
+from app.models.notification import Notification
+from app.schemas.feedback import FeedbackBase
+from app.services.notification_service import NotificationDispatcher
+from benchmarks.common import make_engine, make_sessionmaker, reset_catalog
+from benchmarks.fake_telegram import FakeTelegram
+
+CHAT_ID = -100500
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Check the notification outbox against a fake Bot API.")
+    parser.add_argument("--database-url", required=True, help="Separate database, it will be truncated.")
+    parser.add_argument("--feedbacks", type=int, default=120)
+    parser.add_argument("--min-interval", type=float, default=0.2)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    args = parser.parse_args()
+
+    engine = make_engine(args.database_url)
+    await reset_catalog(engine, 100)
+    async with engine.begin() as conn:
+        await conn.execute(text("TRUNCATE feedbacks, usersessions, notifications RESTART IDENTITY"))
+    sessionmaker = make_sessionmaker(engine)
+
+    async def submit(i: int):
+        async with sessionmaker() as db:
+            return await crud_feedback.create_with_session(db, obj_in=FeedbackBase(
+                user_name=f"Клиент {i}", phone_number=f"+7900{i:07d}", painting_id=1 + i % 100,
+            ))
+
+    await asyncio.gather(*(submit(i) for i in range(args.feedbacks)))
+
+    fake = FakeTelegram(failures=["429:1", "500"])
+    base_url = fake.start_in_thread()
+    dispatcher = NotificationDispatcher(
+        bot=Bot(token="123:fake", base_url=base_url),
+        chat_id=CHAT_ID,
+        sessionmaker=sessionmaker,
+        batch_size=50,
+        poll_seconds=0.2,
+        min_interval=args.min_interval,
+        retry_base=0.5,
+        retry_max=2.0,
+    )
+
+    started = time.perf_counter()
+    dispatcher.start()
+    pending = args.feedbacks
+    try:
+        while pending and time.perf_counter() - started < args.timeout:
+            await asyncio.sleep(0.2)
+            async with sessionmaker() as db:
+                pending = (await db.execute(
+                    select(func.count(Notification.id)).where(Notification.sent_at.is_(None))
+                )).scalar_one()
+    finally:
+        await dispatcher.stop()
+        fake.stop()
+        await engine.dispose()
+    elapsed = time.perf_counter() - started
+
+    delivered_phones = set()
+    for message in fake.messages:
+        delivered_phones.update(re.findall(r"\+7900\d{7}", message["text"]))
+    gaps = [later - earlier for earlier, later in zip(fake.call_times, fake.call_times[1:])]
+
+    problems = []
+    if pending:
+        problems.append(f"{pending} notification(s) still unsent after {args.timeout:.0f}s")
+    if len(delivered_phones) != args.feedbacks:
+        problems.append(f"delivered {len(delivered_phones)} of {args.feedbacks} feedbacks")
+    if len(fake.messages) >= args.feedbacks:
+        problems.append("burst was not coalesced into digests")
+    # Небольшой допуск на точность таймеров
+    if gaps and min(gaps) < args.min_interval * 0.9:
+        problems.append(f"messages sent {min(gaps):.3f}s apart, limit is {args.min_interval}s")
+
+    print(
+        f"{args.feedbacks} feedbacks -> {len(fake.messages)} messages "
+        f"({len(fake.call_times)} Bot API calls incl. scripted failures) in {elapsed:.1f}s"
+    )
+    for problem in problems:
+        print(f"FAIL: {problem}")
+    if problems:
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,85 @@
+"""
+Регрессионная проверка планов запросов каталога.
+
+Заполняет большой каталог и убеждается, что фильтры по подстроке названия
+и по тегам — как в списке, так и в подсчете — идут через GIN-индексы
+ix_paintings_title_trgm и ix_paintings_tags_gin, а не через Seq Scan.
+Завершается с ненулевым кодом, если хотя бы один план не тот.
+
+Запуск:
+    python -m benchmarks.check_query_plans --database-url postgresql+asyncpg://.../bench
+"""
+import argparse
+import asyncio
+import json
+import sys
+from typing import Iterator, List
+
+from sqlalchemy import func, select
+
+from app.crud.crud_painting import painting as crud_painting
+from benchmarks.common import RARE_TAG, Explain, make_engine, reset_catalog
+
+TITLE_INDEX = "ix_paintings_title_trgm"
+TAGS_INDEX = "ix_paintings_tags_gin"
+
+# (описание, фильтры, индекс, который обязан появиться в плане)
+CASES = [
+    ("title substring", {"title": "abc1"}, TITLE_INDEX),
+    ("rare tag", {"tags": [RARE_TAG]}, TAGS_INDEX),
+]
+
+
+def _walk(plan: dict) -> Iterator[dict]:
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from _walk(child)
+
+
+def _describe(plan: dict) -> List[str]:
+    return [f"{node['Node Type']}({node.get('Index Name', node.get('Relation Name', ''))})" for node in _walk(plan)]
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Assert catalog filters use GIN indexes.")
+    parser.add_argument("--database-url", required=True, help="Separate database, it will be truncated.")
+    parser.add_argument("--size", type=int, default=200_000)
+    args = parser.parse_args()
+
+    engine = make_engine(args.database_url)
+    failures = 0
+    try:
+        await reset_catalog(engine, args.size)
+        async with engine.connect() as conn:
+            for label, filters, index_name in CASES:
+                queries = {
+                    "list": crud_painting._page_query(
+                        select(crud_painting.model), skip=0, limit=12, sort="id", cursor=None, **filters
+                    ),
+                    "count": crud_painting._apply_filters(select(func.count(crud_painting.model.id)), **filters),
+                }
+                for kind, query in queries.items():
+                    raw = (await conn.execute(Explain(query))).scalar_one()
+                    # В зависимости от настроек драйвера json приходит строкой или уже разобранным
+                    if isinstance(raw, str):
+                        raw = json.loads(raw)
+                    plan = raw[0]["Plan"]
+                    nodes = list(_walk(plan))
+                    uses_index = any(node.get("Index Name") == index_name for node in nodes)
+                    seq_scan = any(
+                        node["Node Type"] == "Seq Scan" and node.get("Relation Name") == "paintings"
+                        for node in nodes
+                    )
+                    ok = uses_index and not seq_scan
+                    failures += not ok
+                    status = "OK  " if ok else "FAIL"
+                    print(f"{status} {label:<16} {kind:<5} {' -> '.join(_describe(plan))}")
+    finally:
+        await engine.dispose()
+
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
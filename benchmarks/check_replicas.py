@@ -0,0 +1,291 @@
+"""
+Сквозная проверка чтения с реплик (ReplicaRouter).
+
+Принимает адрес основной БД и одной или нескольких реплик (один адрес
+можно передать дважды — получится две реплики в ротации). Каждая реплика
+подключается через TCP-прокси внутри процесса, поэтому «остановить»
+реплику — значит закрыть ее прокси. Приложение вызывается в том же
+процессе через httpx.ASGITransport, проверки здоровья реплик запускаются
+из скрипта явно, а не фоновой задачей по таймеру.
+
+Проверяет:
+  * чтения без cookie идут по кругу и делятся между репликами поровну;
+  * после POST приходит cookie db_primary_until, и с ней чтения идут
+    в основную БД, а без нее — по-прежнему на реплики;
+  * реплика с отставанием больше порога выводится из ротации и
+    возвращается, когда догонит (только для настоящей потоковой реплики:
+    воспроизведение WAL ставится на паузу через pg_wal_replay_pause);
+  * после остановки реплики запросы не падают: чтение один раз
+    переходит в основную БД, а реплика выводится из ротации.
+
+Если «реплика» — обычная БД, а не сервер в режиме восстановления,
+каталог засевается и в нее, а проверка отставания пропускается.
+Завершается с кодом 1, если что-то не так.
+
+Запуск:
+    python -m benchmarks.check_replicas --database-url postgresql+asyncpg://.../bench \\
+        --replica-url postgresql+asyncpg://replica/bench --replica-url postgresql+asyncpg://replica/bench
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from typing import List, Optional, Set
+
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+
+from benchmarks.common import make_engine, reset_catalog
+
+MAX_LAG_SECONDS = 1.0
+
+
+class TcpProxy:
+    """
+    Прокси к PostgreSQL на 127.0.0.1. `stop` закрывает и порт, и все
+    открытые через него соединения — как остановка сервера.
+    """
+
+    def __init__(self, database_url: str):
+        url = make_url(database_url)
+        host = url.host or url.query.get("host") or "localhost"
+        port = url.port or int(url.query.get("port", 5432))
+        # Адрес с host=/каталог — это unix-сокет, как у libpq
+        self.unix_path = f"{host}/.s.PGSQL.{port}" if host.startswith("/") else None
+        self.upstream = (host, port)
+        self.port = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._writers: Set[asyncio.StreamWriter] = set()
+        query = {key: value for key, value in url.query.items() if key not in ("host", "port")}
+        self._url = url.set(host="127.0.0.1", query=query)
+
+    @property
+    def url(self) -> str:
+        return self._url.set(port=self.port).render_as_string(hide_password=False)
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", self.port, reuse_address=True)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        self._server.close()
+        for writer in list(self._writers):
+            writer.close()
+        await self._server.wait_closed()
+        # Даем драйверу получить разрыв соединений
+        await asyncio.sleep(0.1)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            if self.unix_path:
+                up_reader, up_writer = await asyncio.open_unix_connection(self.unix_path)
+            else:
+                up_reader, up_writer = await asyncio.open_connection(*self.upstream)
+        except OSError:
+            writer.close()
+            return
+        self._writers.update((writer, up_writer))
+
+        async def pipe(source: asyncio.StreamReader, target: asyncio.StreamWriter) -> None:
+            try:
+                while data := await source.read(65536):
+                    target.write(data)
+                    await target.drain()
+            except (ConnectionError, OSError):
+                pass
+            finally:
+                target.close()
+
+        await asyncio.gather(pipe(reader, up_writer), pipe(up_reader, writer))
+        self._writers.difference_update((writer, up_writer))
+
+
+async def _in_recovery(database_url: str) -> bool:
+    engine = make_engine(database_url)
+    try:
+        async with engine.connect() as conn:
+            return bool((await conn.execute(text("SELECT pg_is_in_recovery()"))).scalar_one())
+    finally:
+        await engine.dispose()
+
+
+async def _replica_execute(database_url: str, sql: str) -> None:
+    engine = make_engine(database_url)
+    try:
+        async with engine.connect() as conn:
+            await conn.execute(text(sql))
+    finally:
+        await engine.dispose()
+
+
+async def _wait_caught_up(primary_url: str, replica_url: str, timeout: float = 30.0) -> None:
+    """Ждет, пока реплика применит весь WAL, записанный основной БД к этому моменту."""
+    primary = make_engine(primary_url)
+    replica = make_engine(replica_url)
+    try:
+        async with primary.connect() as conn:
+            lsn = (await conn.execute(text("SELECT pg_current_wal_lsn()::text"))).scalar_one()
+        deadline = time.monotonic() + timeout
+        async with replica.connect() as conn:
+            while not (await conn.execute(
+                    text("SELECT pg_last_wal_replay_lsn() >= CAST(CAST(:lsn AS text) AS pg_lsn)"), {"lsn": lsn}
+            )).scalar_one():
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"replica did not reach {lsn} in {timeout}s")
+                await asyncio.sleep(0.1)
+                await conn.rollback()
+    finally:
+        await primary.dispose()
+        await replica.dispose()
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Check read routing between the primary and replicas.")
+    parser.add_argument("--database-url", required=True, help="Separate database, it will be truncated.")
+    parser.add_argument(
+        "--replica-url", action="append", required=True,
+        help="Replica of --database-url (or a separate database). Repeat for several replicas.",
+    )
+    parser.add_argument("--requests", type=int, default=30, help="Reads per round-robin check.")
+    args = parser.parse_args()
+
+    engine = make_engine(args.database_url)
+    await reset_catalog(engine, 100)
+    await engine.dispose()
+
+    streaming = {}
+    for url in dict.fromkeys(args.replica_url):
+        streaming[url] = await _in_recovery(url)
+        if streaming[url]:
+            await _wait_caught_up(args.database_url, url)
+        else:
+            seed = make_engine(url)
+            await reset_catalog(seed, 100)
+            await seed.dispose()
+
+    proxies = [TcpProxy(url) for url in args.replica_url]
+    for proxy in proxies:
+        await proxy.start()
+
+    # Приложение читает настройки при импорте, поэтому подменяем их заранее
+    os.environ.update({
+        "DATABASE_URL": args.database_url,
+        "DATABASE_REPLICA_URLS": json.dumps([proxy.url for proxy in proxies]),
+        "REPLICA_MAX_LAG_SECONDS": str(MAX_LAG_SECONDS),
+        "REPLICA_EJECT_SECONDS": "60",
+        "READ_YOUR_WRITES_SECONDS": "30",
+        "CATALOG_CACHE_ENABLED": "false",
+        "NOTIFICATION_DISPATCHER_ENABLED": "false",
+    })
+    import httpx
+    from app.db.replicas import replica_router
+    from app.db.session import engine as primary_engine
+    from app.main import app
+
+    problems: List[str] = []
+    replicas = replica_router.replicas
+
+    async def read_many(client: httpx.AsyncClient, n: int, **kwargs) -> None:
+        for _ in range(n):
+            response = await client.get("/api/paintings/count", **kwargs)
+            if response.status_code != 200:
+                problems.append(f"read gave {response.status_code}: {response.text[:200]}")
+
+    def reads() -> List[int]:
+        return [replica.reads for replica in replicas]
+
+    async def check_all() -> None:
+        await asyncio.gather(*(replica_router.check(replica) for replica in replicas))
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://check") as client:
+        await check_all()
+        for replica in replicas:
+            if replica.ejected_until:
+                problems.append(f"{replica.name}: not healthy at start: {replica.last_error}")
+
+        # 1. Чтения по кругу
+        before, primary_before = reads(), replica_router.primary_reads
+        await read_many(client, args.requests)
+        spread = [after - was for after, was in zip(reads(), before)]
+        print(f"round robin: {spread} replica reads, {replica_router.primary_reads - primary_before} primary")
+        if sum(spread) != args.requests or max(spread) - min(spread) > 1:
+            problems.append(f"reads are not spread evenly: {spread}")
+
+        # 2. Read-your-writes после POST
+        response = await client.post("/api/feedback/", json={
+            "user_name": "Проверка реплик", "phone_number": "+79001234567", "painting_id": 1,
+        })
+        if response.status_code != 200:
+            problems.append(f"POST /api/feedback/ gave {response.status_code}: {response.text[:200]}")
+        if "db_primary_until" not in client.cookies:
+            problems.append("POST did not set the db_primary_until cookie")
+        before, primary_before = reads(), replica_router.primary_reads
+        await read_many(client, len(replicas) * 2)
+        sticky = replica_router.primary_reads - primary_before
+        print(f"with cookie: {sticky} primary reads, {sum(reads()) - sum(before)} replica")
+        if sticky != len(replicas) * 2 or reads() != before:
+            problems.append("reads with db_primary_until went to replicas")
+        client.cookies.clear()
+        await read_many(client, len(replicas) * 2)
+        if sum(reads()) - sum(before) != len(replicas) * 2:
+            problems.append("reads without the cookie did not go back to replicas")
+
+        # 3. Отставание: воспроизведение WAL на паузе, а основная БД пишет
+        lagging = args.replica_url[0]
+        if streaming[lagging]:
+            await _replica_execute(lagging, "SELECT pg_wal_replay_pause()")
+            try:
+                async with primary_engine.begin() as conn:
+                    await conn.execute(text("UPDATE paintings SET updated_at = now() WHERE id = 1"))
+                deadline = time.monotonic() + MAX_LAG_SECONDS * 10
+                while not replicas[0].ejected_until and time.monotonic() < deadline:
+                    await asyncio.sleep(MAX_LAG_SECONDS / 2)
+                    await replica_router.check(replicas[0])
+                print(f"lagging replica: {replicas[0].last_error}")
+                if not replicas[0].ejected_until:
+                    problems.append("lagging replica was not ejected")
+                before = reads()
+                await read_many(client, len(replicas) * 2)
+                if reads()[0] != before[0]:
+                    problems.append("reads went to the lagging replica")
+            finally:
+                await _replica_execute(lagging, "SELECT pg_wal_replay_resume()")
+            await _wait_caught_up(args.database_url, lagging)
+            await check_all()
+            if replicas[0].ejected_until:
+                problems.append(f"replica did not come back after catching up: {replicas[0].last_error}")
+        else:
+            print("lagging replica: skipped, replica is not a streaming standby")
+
+        # 4. Остановка: первое чтение через мертвую реплику уходит в основную БД
+        await read_many(client, len(replicas))  # соединения в пуле реплик уже открыты
+        await proxies[0].stop()
+        before, primary_before = reads(), replica_router.primary_reads
+        await read_many(client, len(replicas) * 2)
+        tried = reads()[0] - before[0]
+        fallbacks = replica_router.primary_reads - primary_before
+        print(f"stopped replica: tried {tried}, {fallbacks} primary reads, {replicas[0].last_error}")
+        if tried != 1:
+            problems.append(f"stopped replica was tried {tried} times, expected once before ejection")
+        if not replicas[0].ejected_until:
+            problems.append("stopped replica was not ejected")
+        if fallbacks < 1:
+            problems.append("read through the stopped replica did not fall back to the primary")
+
+    await replica_router.stop()
+    await primary_engine.dispose()
+    for proxy in proxies[1:]:
+        await proxy.stop()
+
+    for problem in problems:
+        print(f"FAIL: {problem}")
+    if problems:
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
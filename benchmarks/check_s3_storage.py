@@ -0,0 +1,140 @@
+"""
+Сквозная проверка S3Storage на локальном S3-совместимом сервере
+(MinIO, moto_server и т.п.).
+
+Создает бакет, если его нет, и проходит полный цикл для файла больше
+порога multipart и для маленького файла: put (исходный файл удаляется),
+exists, скачивание по url() (подписанная ссылка; адрес от публичной базы
+только сверяется по виду — его доступность зависит от политики бакета
+или CDN), download, delete. Проверяет содержимое по SHA-256, заголовки
+Content-Type и Cache-Control, что большой файл загружен по частям и что
+после delete файла нет, а отсутствующие ключи пропускаются. Завершается
+с кодом 1, если что-то не так.
+
+Запуск (например, с `docker run -p 9000:9000 minio/minio server /data`):
+    python -m benchmarks.check_s3_storage --endpoint-url http://127.0.0.1:9000 \\
+        --access-key minioadmin --secret-key minioadmin
+"""
+import argparse
+import asyncio
+import hashlib
+import os
+import sys
+import tempfile
+import uuid
+
+import httpx
+
+from app.services.storage import S3Storage
+
+# Минимальный размер части multipart-загрузки в S3
+MIN_PART_BYTES = 5 * 1024 * 1024
+
+
+def _write_random(path: str, size: int) -> str:
+    digest = hashlib.sha256()
+    with open(path, "wb") as f:
+        while size > 0:
+            chunk = os.urandom(min(size, 1024 * 1024))
+            digest.update(chunk)
+            f.write(chunk)
+            size -= len(chunk)
+    return digest.hexdigest()
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(1024 * 1024):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Check S3Storage against a local S3-compatible endpoint.")
+    parser.add_argument("--endpoint-url", required=True)
+    parser.add_argument("--bucket", default="gallery-check")
+    parser.add_argument("--region", default="us-east-1")
+    parser.add_argument("--access-key", default="minioadmin")
+    parser.add_argument("--secret-key", default="minioadmin")
+    parser.add_argument("--large-mb", type=int, default=12, help="Size of the multipart file.")
+    args = parser.parse_args()
+
+    options = dict(
+        bucket=args.bucket, endpoint_url=args.endpoint_url, region=args.region,
+        access_key_id=args.access_key, secret_access_key=args.secret_key,
+        presign_expires=60, multipart_chunk_bytes=MIN_PART_BYTES,
+    )
+    storage = S3Storage(**options)
+    client = storage._client
+    if args.bucket not in [bucket["Name"] for bucket in client.list_buckets()["Buckets"]]:
+        client.create_bucket(Bucket=args.bucket)
+    # Тот же бакет, но адреса — от публичной базы (как за CDN)
+    public_base = f"{args.endpoint_url}/{args.bucket}"
+    public = S3Storage(**options, public_base_url=public_base + "/")
+
+    prefix = f"check/{uuid.uuid4().hex}"
+    files = {
+        f"{prefix}/large.jpg": args.large_mb * 1024 * 1024,
+        f"{prefix}/small.webp": 64 * 1024,
+    }
+    problems = []
+    with tempfile.TemporaryDirectory() as workdir:
+        async with httpx.AsyncClient() as http:
+            for key, size in files.items():
+                source = os.path.join(workdir, os.path.basename(key))
+                expected = _write_random(source, size)
+
+                await storage.put(key, source)
+                if os.path.exists(source):
+                    problems.append(f"{key}: source file left after put")
+                if not await storage.exists(key):
+                    problems.append(f"{key}: exists() is false after put")
+
+                head = client.head_object(Bucket=args.bucket, Key=key)
+                multipart = "-" in head["ETag"]
+                if multipart != (size > MIN_PART_BYTES):
+                    problems.append(f"{key}: multipart={multipart} for {size} bytes")
+
+                if public.url(key) != f"{public_base}/{key}" or public.url_epoch() is not None:
+                    problems.append(f"{key}: public url is {public.url(key)!r}")
+                if storage.url_epoch() is None:
+                    problems.append("presigned urls report no expiry period")
+                response = await http.get(storage.url(key))
+                if response.status_code != 200:
+                    problems.append(f"{key}: presigned url gave {response.status_code}")
+                else:
+                    if hashlib.sha256(response.content).hexdigest() != expected:
+                        problems.append(f"{key}: presigned url returned different content")
+                    for header, value in (
+                            ("content-type", "image/jpeg" if key.endswith(".jpg") else "image/webp"),
+                            ("cache-control", "public, max-age=31536000, immutable"),
+                    ):
+                        if response.headers.get(header) != value:
+                            problems.append(f"{key}: {header} is {response.headers.get(header)!r}")
+
+                copy = os.path.join(workdir, "copy")
+                await storage.download(key, copy)
+                if _sha256(copy) != expected:
+                    problems.append(f"{key}: download() returned different content")
+
+                print(f"{key}: {size} bytes, multipart={multipart}, presigned {storage.url(key)[:60]}...")
+
+            # Отсутствующий ключ в пачке не должен мешать удалению остальных
+            await storage.delete([*files, f"{prefix}/missing.jpg"])
+            for key in files:
+                if await storage.exists(key):
+                    problems.append(f"{key}: still exists after delete")
+                response = await http.get(storage.url(key))
+                if response.status_code not in (403, 404):
+                    problems.append(f"{key}: url gave {response.status_code} after delete")
+
+    for problem in problems:
+        print(f"FAIL: {problem}")
+    if problems:
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,118 @@
+"""
+Общие помощники для бенчмарков: отдельный движок, наполнение каталога
+синтетическими данными и замер времени.
+
+ВНИМАНИЕ: бенчмарки очищают таблицу paintings. Запускайте их только
+на отдельной базе, передав ее адрес через --database-url.
+"""
+import math
+import statistics
+import time
+from typing import Awaitable, Callable, List
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, async_sessionmaker, create_async_engine
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+from app.db.base import Base
+# Модели нужно импортировать, чтобы они попали в Base.metadata
+from app.models.painting import Painting  # noqa: F401
+from app.models.user_session import UserSession  # noqa: F401
+from app.models.feedback import Feedback  # noqa: F401
+from app.models.user import User  # noqa: F401
+from app.models.tag import Tag  # noqa: F401
+from app.models.media_file import MediaFile  # noqa: F401
+from app.models.notification import Notification  # noqa: F401
+from app.models.catalog_import import CatalogImport  # noqa: F401
+
+TAG_POOL = ["море", "закат", "портрет", "пейзаж", "абстракция", "город", "цветы", "натюрморт"]
+# Тег, который есть примерно у 0.1% картин: на нем видно, использует ли фильтр индекс
+RARE_TAG = "графика"
+
+# Наполняем таблицу одним INSERT ... SELECT на стороне БД:
+# миллион строк так вставляется за секунды, а не за часы.
+SEED_SQL = text("""
+    INSERT INTO paintings (title, width, height, tags, description, photo_filenames)
+    SELECT
+        'Painting ' || md5(g::text),
+        round((20 + random() * 180)::numeric, 2),
+        round((20 + random() * 180)::numeric, 2),
+        ARRAY[(CAST(:tags AS text[]))[1 + g % 8], (CAST(:tags AS text[]))[1 + (g / 8) % 8]]
+            || CASE WHEN g % 1000 = 0 THEN ARRAY[CAST(:rare_tag AS text)] ELSE ARRAY[]::text[] END,
+        'Описание картины ' || g,
+        ARRAY[substr(md5(g::text), 1, 2) || '/' || substr(md5(g::text), 3, 2) || '/' || md5(g::text) || '.jpg']
+    FROM generate_series(1, :n) AS g
+""")
+
+# Справочник тегов строим по уже вставленным картинам, как это делает миграция
+SEED_TAGS_SQL = text("""
+    INSERT INTO tags (name, painting_count)
+    SELECT tag, count(DISTINCT p.id)
+    FROM paintings AS p, unnest(p.tags) AS tag
+    GROUP BY tag
+""")
+
+
+class Explain(Executable, ClauseElement):
+    """`EXPLAIN (FORMAT JSON)` для произвольного запроса SQLAlchemy с обычными bind-параметрами."""
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(Explain, "postgresql")
+def _compile_explain(element, compiler, **kw):
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
+def make_engine(database_url: str) -> AsyncEngine:
+    return create_async_engine(database_url)
+
+
+def make_sessionmaker(engine: AsyncEngine) -> async_sessionmaker:
+    return async_sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+async def create_schema(conn: AsyncConnection) -> None:
+    """Создает недостающие таблицы по моделям (без миграций)."""
+    # Нужно для триграммного индекса по title
+    await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    await conn.run_sync(Base.metadata.create_all)
+
+
+async def reset_catalog(engine: AsyncEngine, n: int) -> None:
+    """Пересоздает каталог из `n` картин и обновляет статистику планировщика."""
+    async with engine.begin() as conn:
+        await create_schema(conn)
+        await conn.execute(text("TRUNCATE paintings, tags, mediafiles RESTART IDENTITY CASCADE"))
+        await conn.execute(SEED_SQL, {"n": n, "tags": TAG_POOL, "rare_tag": RARE_TAG})
+        await conn.execute(SEED_TAGS_SQL)
+    # Без свежей статистики планировщик может выбрать не тот план
+    async with engine.begin() as conn:
+        await conn.execute(text("ANALYZE paintings"))
+        await conn.execute(text("ANALYZE tags"))
+
+
+async def measure(fn: Callable[[], Awaitable[object]], repeat: int = 20, warmup: int = 3) -> List[float]:
+    """Выполняет `fn` несколько раз и возвращает список задержек в миллисекундах."""
+    for _ in range(warmup):
+        await fn()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def median(timings: List[float]) -> float:
+    return statistics.median(timings)
+
+
+def percentile(timings: List[float], q: float) -> float:
+    """Перцентиль `q` (0–100) методом ближайшего ранга."""
+    ordered = sorted(timings)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[rank - 1]
@@ -0,0 +1,71 @@
+"""
+Сравнение двух отчетов benchmarks.load_test для проверки на регрессию.
+
+Для каждого сценария печатает пропускную способность и перцентили базового
+и нового прогона и отмечает ухудшение больше `--tolerance` (доля, по
+умолчанию 10%) по p50/p95/p99 или по запросам в секунду, а также рост
+числа ошибок. Завершается с кодом 1, если есть регрессии, — можно
+использовать в проверке перед слиянием. Прогоны стоит делать на одной
+машине с одинаковыми --seed, --mix, --concurrency и размером каталога.
+
+Запуск:
+    python -m benchmarks.compare_reports baseline.json run.json --tolerance 0.15
+"""
+import argparse
+import json
+import sys
+from typing import List
+
+METRICS = ("p50_ms", "p95_ms", "p99_ms")
+
+
+def compare(baseline: dict, current: dict, tolerance: float) -> List[str]:
+    regressions = []
+    names = sorted(set(baseline["endpoints"]) | set(current["endpoints"]))
+    print(f"{'scenario':<10}{'metric':<8}{'baseline':>11}{'current':>11}{'change':>9}")
+    for name in names + ["TOTAL"]:
+        old = baseline["total"] if name == "TOTAL" else baseline["endpoints"].get(name)
+        new = current["total"] if name == "TOTAL" else current["endpoints"].get(name)
+        if not old or not new or not old.get("requests") or not new.get("requests"):
+            print(f"{name:<10}{'':<8}{'missing in one of the reports':>39}")
+            continue
+        for metric in ("rps",) + METRICS:
+            before, after = old[metric], new[metric]
+            change = (after - before) / before if before else 0.0
+            # Для rps хуже — меньше, для задержек — больше
+            worse = -change if metric == "rps" else change
+            flag = " !" if worse > tolerance else ""
+            print(f"{name:<10}{metric:<8}{before:>11.1f}{after:>11.1f}{change:>+9.1%}{flag}")
+            if flag:
+                regressions.append(f"{name} {metric}: {before:.1f} -> {after:.1f} ({change:+.1%})")
+        if new.get("failed", 0) > old.get("failed", 0):
+            regressions.append(f"{name} failed requests: {old.get('failed', 0)} -> {new['failed']}")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare two load_test reports.")
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Allowed relative slowdown.")
+    args = parser.parse_args()
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    with open(args.current, encoding="utf-8") as f:
+        current = json.load(f)
+    for label, report in (("baseline", baseline), ("current", current)):
+        meta = report["meta"]
+        print(f"{label}: {meta.get('label') or '-'} commit={meta.get('commit')} at {meta.get('started_at')}")
+
+    regressions = compare(baseline, current, args.tolerance)
+    if regressions:
+        print("\nRegressions:")
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1)
+    print("\nNo regressions")
+
+
+if __name__ == "__main__":
+    main()
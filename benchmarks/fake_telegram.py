@@ -0,0 +1,106 @@
+"""
+Локальный фейковый Telegram Bot API для проверки отправки уведомлений.
+
+Понимает sendMessage и getMe, запоминает принятые сообщения и по сценарию
+отвечает ошибками: 429 с retry_after (ограничение скорости) или 500.
+Приложение направляется на него настройкой
+TELEGRAM_API_BASE_URL=http://127.0.0.1:8081/bot.
+
+Запуск отдельным сервером:
+    python -m benchmarks.fake_telegram --port 8081 --fail 429:3 --fail 500
+"""
+import argparse
+import json
+import threading
+import time
+from collections import deque
+from typing import Iterable, List, Optional
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+
+class FakeTelegram:
+    """
+    `failures` — сценарий ответов на первые вызовы sendMessage:
+    "429:<секунды>" или "500". После него все сообщения принимаются.
+    """
+
+    def __init__(self, failures: Iterable[str] = ()):
+        self.failures = deque(failures)
+        self.messages: List[dict] = []
+        # Время каждого вызова sendMessage (time.monotonic), включая ошибки
+        self.call_times: List[float] = []
+        self._server: Optional[uvicorn.Server] = None
+        self.app = Starlette(routes=[Route("/bot{token}/{method}", self._handle, methods=["GET", "POST"])])
+
+    async def _handle(self, request: Request) -> JSONResponse:
+        method = request.path_params["method"]
+        if method == "getMe":
+            return JSONResponse({"ok": True, "result": {
+                "id": 1, "is_bot": True, "first_name": "Fake", "username": "fake_bot",
+            }})
+        if method != "sendMessage":
+            return JSONResponse({"ok": False, "error_code": 404, "description": "Not Found"}, status_code=404)
+
+        if request.headers.get("content-type", "").startswith("application/json"):
+            data = await request.json()
+        else:
+            data = dict(await request.form())
+        self.call_times.append(time.monotonic())
+
+        if self.failures:
+            failure = self.failures.popleft()
+            if failure.startswith("429"):
+                retry_after = int(failure.partition(":")[2] or 1)
+                return JSONResponse({
+                    "ok": False, "error_code": 429,
+                    "description": f"Too Many Requests: retry after {retry_after}",
+                    "parameters": {"retry_after": retry_after},
+                }, status_code=429)
+            return JSONResponse(
+                {"ok": False, "error_code": 500, "description": "Internal Server Error"}, status_code=500
+            )
+
+        chat_id = int(data["chat_id"])
+        message = {
+            "message_id": len(self.messages) + 1,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "group" if chat_id < 0 else "private"},
+            "text": data["text"],
+        }
+        self.messages.append(message)
+        print(f"[fake telegram] message {message['message_id']} to {chat_id}:\n{data['text']}\n")
+        return JSONResponse({"ok": True, "result": message})
+
+    def start_in_thread(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Поднимает сервер в фоновом потоке и возвращает base_url для Bot."""
+        self._server = uvicorn.Server(uvicorn.Config(self.app, host=host, port=port, log_level="warning"))
+        threading.Thread(target=self._server.run, daemon=True).start()
+        while not self._server.started:
+            time.sleep(0.01)
+        port = self._server.servers[0].sockets[0].getsockname()[1]
+        return f"http://{host}:{port}/bot"
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.should_exit = True
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Fake Telegram Bot API server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--fail", action="append", default=[], help="Scripted failure: 429:<seconds> or 500.")
+    args = parser.parse_args()
+
+    fake = FakeTelegram(args.fail)
+    print(f"Fake Bot API on http://{args.host}:{args.port}/bot, scripted failures: {json.dumps(args.fail)}")
+    uvicorn.run(fake.app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,318 @@
+"""
+Нагрузочный тест работающего API со смесью запросов.
+
+Клиенты (`--concurrency`) в течение `--duration` секунд выбирают сценарий
+по весам из `--mix` и выполняют его:
+    list      — список картин со случайными фильтрами, сортировкой и видом
+    count     — количество картин по фильтрам
+    detail    — карточка картины
+    tags      — справочник тегов с количествами
+    feedback  — заявка на обратную связь
+    upload    — создание картины с новым изображением (суперпользователь)
+Задержки считаются по сценариям; итоговый отчет с пропускной способностью
+и p50/p95/p99 печатается и сохраняется в JSON (`--output`) для сравнения
+прогонов скриптом benchmarks.compare_reports.
+
+Сервер запускается отдельно на базе, заполненной benchmarks.seed_catalog.
+Каждая заявка feedback — уведомление в Telegram, поэтому сервер должен
+отправлять их в фейковый Bot API, а запуск с этим сценарием нужно
+подтвердить флагом `--fake-telegram` (или убрать feedback из `--mix`):
+    python -m benchmarks.fake_telegram --port 8081
+    TELEGRAM_API_BASE_URL=http://127.0.0.1:8081/bot uvicorn app.main:app --workers 2 --port 8000
+    python -m benchmarks.load_test --base-url http://127.0.0.1:8000 --duration 60 --fake-telegram --output run.json
+
+Сценарии feedback и upload пишут в базу — используйте отдельную.
+"""
+import argparse
+import asyncio
+import io
+import json
+import platform
+import random
+import statistics
+import subprocess
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import httpx
+from PIL import Image
+
+from benchmarks.common import percentile
+
+DEFAULT_MIX = "list=50,count=8,detail=25,tags=10,feedback=5,upload=2"
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    weights = {}
+    for item in mix.split(","):
+        name, _, weight = item.partition("=")
+        weights[name.strip()] = float(weight or 1)
+    unknown = set(weights) - set(SCENARIOS)
+    if unknown:
+        raise SystemExit(f"Unknown scenarios in --mix: {', '.join(sorted(unknown))}")
+    return {name: weight for name, weight in weights.items() if weight > 0}
+
+
+class Catalog:
+    """Что известно о каталоге на сервере: для выбора правдоподобных параметров."""
+
+    def __init__(self, total: int, tags: List[str], tag_weights: List[int]):
+        self.total = total
+        self.tags = tags
+        self.tag_weights = tag_weights
+
+    @classmethod
+    async def load(cls, client: httpx.AsyncClient) -> "Catalog":
+        total = (await client.get("/api/paintings/count")).raise_for_status().json()["total"]
+        counts = (await client.get("/api/paintings/tags/counts")).raise_for_status().json()
+        return cls(total, [item["name"] for item in counts], [item["painting_count"] for item in counts])
+
+    def random_id(self, rng: random.Random) -> int:
+        return rng.randint(1, max(1, self.total))
+
+    def random_tags(self, rng: random.Random) -> List[str]:
+        if not self.tags:
+            return []
+        # Чаще фильтруют по популярным тегам
+        return list({*rng.choices(self.tags, weights=self.tag_weights, k=rng.choice([1, 1, 2]))})
+
+
+def random_filters(rng: random.Random, catalog: Catalog) -> dict:
+    params = {}
+    if rng.random() < 0.35:
+        params["tags"] = catalog.random_tags(rng)
+    if rng.random() < 0.15:
+        params["title"] = rng.choice(["берег", "сад", "закат", "Тихий", "маяк", "город"])
+    if rng.random() < 0.2:
+        low = rng.choice([20, 30, 40, 50, 60])
+        params["width_min"], params["width_max"] = low, low + rng.choice([20, 40, 80])
+    if rng.random() < 0.1:
+        params["height_min"] = rng.choice([30, 50, 80])
+    return params
+
+
+async def scenario_list(client, rng, catalog, state) -> httpx.Response:
+    params = random_filters(rng, catalog)
+    params["limit"] = rng.choice([12, 12, 24, 48])
+    params["view"] = "grid" if rng.random() < 0.7 else "full"
+    if rng.random() < 0.2:
+        params["sort"] = rng.choice(["-id", "title", "width", "-height"])
+    if rng.random() < 0.1:
+        params["skip"] = rng.choice([12, 24, 48, 120])
+    if rng.random() < 0.2:
+        params["include_total"] = "true"
+    return await client.get("/api/paintings", params=params)
+
+
+async def scenario_count(client, rng, catalog, state) -> httpx.Response:
+    return await client.get("/api/paintings/count", params=random_filters(rng, catalog))
+
+
+async def scenario_detail(client, rng, catalog, state) -> httpx.Response:
+    return await client.get(f"/api/paintings/{catalog.random_id(rng)}")
+
+
+async def scenario_tags(client, rng, catalog, state) -> httpx.Response:
+    return await client.get("/api/paintings/tags/counts")
+
+
+async def scenario_feedback(client, rng, catalog, state) -> httpx.Response:
+    return await client.post("/api/feedback/", json={
+        "user_name": f"Нагрузка {rng.randint(1, 100_000)}",
+        "phone_number": f"+7900{rng.randint(0, 9_999_999):07d}",
+        "painting_id": catalog.random_id(rng),
+    })
+
+
+def _upload_image(rng: random.Random) -> bytes:
+    # Небольшое изображение со случайными пикселями: каждый раз новый файл
+    image = Image.frombytes("RGB", (64, 48), rng.randbytes(64 * 48 * 3)).resize((800, 600))
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG", quality=80)
+    return buffer.getvalue()
+
+
+async def scenario_upload(client, rng, catalog, state) -> httpx.Response:
+    return await client.post(
+        "/api/paintings",
+        data={
+            "title": f"Нагрузочная картина {rng.randint(1, 1_000_000)}",
+            "width": "50", "height": "70",
+            "tags": ",".join(catalog.random_tags(rng)) or "пейзаж",
+            "description": "Создана нагрузочным тестом",
+        },
+        files=[("images", ("load.jpg", _upload_image(rng), "image/jpeg"))],
+        headers=state["admin_headers"],
+    )
+
+
+Scenario = Callable[[httpx.AsyncClient, random.Random, Catalog, dict], Awaitable[httpx.Response]]
+SCENARIOS: Dict[str, Scenario] = {
+    "list": scenario_list,
+    "count": scenario_count,
+    "detail": scenario_detail,
+    "tags": scenario_tags,
+    "feedback": scenario_feedback,
+    "upload": scenario_upload,
+}
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Counter] = defaultdict(Counter)
+        self.errors: Dict[str, Counter] = defaultdict(Counter)
+
+    def add(self, name: str, latency_ms: float, status: Optional[int], error: Optional[str] = None) -> None:
+        if error is not None:
+            self.errors[name][error] += 1
+            return
+        self.latencies[name].append(latency_ms)
+        self.statuses[name][str(status)] += 1
+
+
+def summarize(timings: List[float], duration: float) -> dict:
+    if not timings:
+        return {"requests": 0, "rps": 0.0}
+    return {
+        "requests": len(timings),
+        "rps": round(len(timings) / duration, 2),
+        "mean_ms": round(statistics.fmean(timings), 2),
+        "p50_ms": round(percentile(timings, 50), 2),
+        "p95_ms": round(percentile(timings, 95), 2),
+        "p99_ms": round(percentile(timings, 99), 2),
+        "max_ms": round(max(timings), 2),
+    }
+
+
+def build_report(recorder: Recorder, *, duration: float, args, mix: Dict[str, float]) -> dict:
+    endpoints = {}
+    for name in sorted(set(recorder.latencies) | set(recorder.errors)):
+        statuses = recorder.statuses[name]
+        failed = sum(count for status, count in statuses.items() if not status.startswith(("2", "3")))
+        endpoints[name] = {
+            **summarize(recorder.latencies[name], duration),
+            "status_codes": dict(statuses),
+            "failed": failed + sum(recorder.errors[name].values()),
+            "errors": dict(recorder.errors[name]),
+        }
+    all_timings = [latency for timings in recorder.latencies.values() for latency in timings]
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "meta": {
+            "label": args.label,
+            "commit": commit,
+            "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "base_url": args.base_url,
+            "duration_s": round(duration, 2),
+            "concurrency": args.concurrency,
+            "mix": mix,
+            "seed": args.seed,
+            "python": platform.python_version(),
+        },
+        "total": {
+            **summarize(all_timings, duration),
+            "failed": sum(endpoint["failed"] for endpoint in endpoints.values()),
+        },
+        "endpoints": endpoints,
+    }
+
+
+def print_report(report: dict) -> None:
+    print(f"{'scenario':<10}{'req':>8}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'failed':>8}")
+    rows = list(report["endpoints"].items()) + [("TOTAL", report["total"])]
+    for name, row in rows:
+        if not row.get("requests"):
+            print(f"{name:<10}{0:>8}{'':>36}{row.get('failed', 0):>8}")
+            continue
+        print(
+            f"{name:<10}{row['requests']:>8}{row['rps']:>9.1f}{row['p50_ms']:>9.1f}"
+            f"{row['p95_ms']:>9.1f}{row['p99_ms']:>9.1f}{row['failed']:>8}"
+        )
+
+
+async def run(args) -> dict:
+    mix = parse_mix(args.mix)
+    names, weights = list(mix), list(mix.values())
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+        catalog = await Catalog.load(client)
+        state = {"admin_headers": {}}
+        if "upload" in mix:
+            response = await client.post(
+                "/api/auth/login", data={"username": args.admin_username, "password": args.admin_password}
+            )
+            response.raise_for_status()
+            state["admin_headers"] = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+        async def worker(seed: int, deadline: float, record: bool):
+            rng = random.Random(seed)
+            while time.perf_counter() < deadline:
+                name = rng.choices(names, weights=weights)[0]
+                started = time.perf_counter()
+                try:
+                    response = await SCENARIOS[name](client, rng, catalog, state)
+                except httpx.HTTPError as e:
+                    if record:
+                        recorder.add(name, 0.0, None, error=type(e).__name__)
+                    continue
+                if record:
+                    recorder.add(name, (time.perf_counter() - started) * 1000, response.status_code)
+
+        if args.warmup > 0:
+            deadline = time.perf_counter() + args.warmup
+            await asyncio.gather(*(worker(-1 - i, deadline, False) for i in range(args.concurrency)))
+
+        started = time.perf_counter()
+        deadline = started + args.duration
+        await asyncio.gather(*(worker(args.seed * 1000 + i, deadline, True) for i in range(args.concurrency)))
+        duration = time.perf_counter() - started
+
+    return build_report(recorder, duration=duration, args=args, mix=mix)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replay a traffic mix against the API and report latencies.")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--warmup", type=float, default=5.0, help="Seconds of unrecorded traffic first.")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"Scenario weights, default: {DEFAULT_MIX}")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--admin-username", default="bench-admin")
+    parser.add_argument("--admin-password", default="bench-password")
+    parser.add_argument("--label", default=None, help="Free-form name of the run, stored in the report.")
+    parser.add_argument("--output", help="Save the JSON report to this file.")
+    parser.add_argument(
+        "--fake-telegram", action="store_true",
+        help="Confirm that the server sends notifications to benchmarks.fake_telegram "
+             "(required by the feedback scenario).",
+    )
+    args = parser.parse_args()
+    if "feedback" in parse_mix(args.mix) and not args.fake_telegram:
+        parser.error(
+            "the feedback scenario sends a Telegram notification per request: point the server's "
+            "TELEGRAM_API_BASE_URL at benchmarks.fake_telegram and pass --fake-telegram, "
+            "or drop feedback from --mix"
+        )
+
+    report = asyncio.run(run(args))
+    print_report(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"Report saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+"""
+Синтетический каталог для нагрузочных тестов.
+
+Создает `--paintings` картин с правдоподобными данными: теги из словаря
+с распределением Ципфа (несколько тегов встречаются часто, большинство —
+редко), стандартные форматы холстов в обеих ориентациях с долей
+произвольных размеров, составные названия для поиска по подстроке.
+Изображения — `--images` настоящих JPEG, которые проходят обычный путь
+загрузки (хэш, производные, хранилище из настроек приложения); каждая
+картина ссылается на 1–4 из них, учет ссылок в mediafiles заполняется.
+Также создается суперпользователь для сценария загрузки в load_test.
+
+Одинаковый `--seed` дает одинаковый каталог.
+
+ВНИМАНИЕ: таблицы paintings, tags и mediafiles очищаются.
+
+Запуск:
+    python -m benchmarks.seed_catalog --database-url postgresql+asyncpg://.../bench --paintings 50000
+"""
+import argparse
+import asyncio
+import io
+import random
+import time
+from collections import Counter
+from typing import Iterator, List
+
+from fastapi import UploadFile
+from PIL import Image, ImageDraw
+from sqlalchemy import insert, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.security import get_password_hash
+from app.models.media_file import MediaFile
+from app.models.painting import Painting
+from app.models.user import User
+from app.services import images
+from app.services.uploads import save_uploads
+from benchmarks.common import SEED_TAGS_SQL, create_schema, make_engine, make_sessionmaker
+
+# Словарь тегов примерно по убыванию популярности
+TAGS = [
+    "пейзаж", "масло", "природа", "море", "цветы", "портрет", "абстракция", "город",
+    "закат", "натюрморт", "акварель", "лес", "горы", "небо", "зима", "осень",
+    "холст", "интерьер", "животные", "река", "весна", "лето", "архитектура", "минимализм",
+    "графика", "импрессионизм", "реализм", "ночь", "дождь", "туман", "сад", "поле",
+    "птицы", "корабли", "деревня", "облака", "фрукты", "женщина", "мужчина", "дети",
+    "акрил", "пастель", "голубой", "красный", "золотой", "черно-белое", "поп-арт", "этника",
+]
+TITLE_ADJECTIVES = [
+    "Тихий", "Летний", "Зимний", "Старый", "Золотой", "Синий", "Утренний", "Вечерний",
+    "Северный", "Южный", "Осенний", "Лунный", "Солнечный", "Дальний", "Туманный",
+]
+TITLE_NOUNS = [
+    "берег", "сад", "город", "лес", "вечер", "причал", "мост", "двор", "луг", "маяк",
+    "перевал", "залив", "бульвар", "парк", "рассвет", "закат", "натюрморт", "портрет",
+]
+# Стандартные форматы холстов, см
+CANVAS_FORMATS = [
+    (20, 30), (30, 40), (40, 50), (40, 60), (50, 60), (50, 70),
+    (60, 80), (70, 90), (80, 100), (90, 120), (100, 150),
+]
+SQUARE_FORMATS = [(30, 30), (50, 50), (80, 80), (100, 100)]
+INSERT_BATCH = 5000
+
+
+def zipf_weights(n: int, s: float = 1.1) -> List[float]:
+    return [1 / (rank ** s) for rank in range(1, n + 1)]
+
+
+def pick_tags(rng: random.Random, weights: List[float]) -> List[str]:
+    """1–5 разных тегов, чаще 2–3."""
+    count = rng.choices([1, 2, 3, 4, 5], weights=[15, 35, 30, 13, 7])[0]
+    chosen = set()
+    while len(chosen) < count:
+        chosen.add(rng.choices(TAGS, weights=weights)[0])
+    return sorted(chosen)
+
+
+def pick_size(rng: random.Random):
+    roll = rng.random()
+    if roll < 0.1:
+        width, height = rng.choice(SQUARE_FORMATS)
+    elif roll < 0.85:
+        width, height = rng.choice(CANVAS_FORMATS)
+        if rng.random() < 0.5:
+            width, height = height, width
+    else:
+        # Нестандартный размер: логнормальное распределение вокруг 60 см
+        width = round(min(300.0, max(10.0, rng.lognormvariate(4.1, 0.5))), 1)
+        height = round(min(300.0, max(10.0, rng.lognormvariate(4.1, 0.5))), 1)
+    return width, height
+
+
+def make_image(rng: random.Random, landscape: bool) -> bytes:
+    """JPEG с градиентом и случайными фигурами: сжимается похоже на живопись."""
+    size = (1600, 1200) if landscape else (1200, 1600)
+    top = tuple(rng.randrange(256) for _ in range(3))
+    bottom = tuple(rng.randrange(256) for _ in range(3))
+    gradient = Image.linear_gradient("L").resize(size)
+    image = Image.composite(Image.new("RGB", size, bottom), Image.new("RGB", size, top), gradient)
+    draw = ImageDraw.Draw(image)
+    for _ in range(rng.randint(20, 60)):
+        x, y = rng.randrange(size[0]), rng.randrange(size[1])
+        radius = rng.randint(20, 300)
+        color = tuple(rng.randrange(256) for _ in range(3))
+        shape = draw.ellipse if rng.random() < 0.6 else draw.rectangle
+        shape((x - radius, y - radius, x + radius, y + radius), fill=color)
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG", quality=85)
+    return buffer.getvalue()
+
+
+async def seed_images(engine: AsyncEngine, rng: random.Random, count: int, batch: int = 8) -> List[str]:
+    """
+    Сохраняет `count` изображений через обычный путь загрузки и возвращает ключи.
+    Закрепления ключей в mediafiles не снимаются: таблица потом заполняется заново.
+    """
+    sessionmaker = make_sessionmaker(engine)
+    keys: List[str] = []
+    for start in range(0, count, batch):
+        uploads = [
+            UploadFile(io.BytesIO(make_image(rng, landscape=rng.random() < 0.6)), filename=f"seed-{i}.jpg")
+            for i in range(start, min(start + batch, count))
+        ]
+        keys.extend(await save_uploads(uploads, sessionmaker=sessionmaker))
+    return keys
+
+
+def make_paintings(rng: random.Random, n: int, image_keys: List[str]) -> Iterator[dict]:
+    weights = zipf_weights(len(TAGS))
+    for i in range(1, n + 1):
+        width, height = pick_size(rng)
+        tags = pick_tags(rng, weights)
+        yield {
+            "title": f"{rng.choice(TITLE_ADJECTIVES)} {rng.choice(TITLE_NOUNS)}"
+                     + (f" №{rng.randint(1, 99)}" if rng.random() < 0.3 else ""),
+            "width": width,
+            "height": height,
+            "tags": tags,
+            "description": f"{', '.join(tags).capitalize()}. Работа {i} из синтетического каталога.",
+            "photo_filenames": rng.sample(image_keys, k=min(len(image_keys), rng.randint(1, 4))),
+        }
+
+
+async def seed(
+        engine: AsyncEngine,
+        *,
+        paintings: int,
+        image_count: int,
+        seed_value: int,
+        admin_username: str,
+        admin_password: str,
+) -> None:
+    rng = random.Random(seed_value)
+
+    started = time.perf_counter()
+    async with engine.begin() as conn:
+        await create_schema(conn)
+    image_keys = await seed_images(engine, rng, image_count)
+    print(f"{len(image_keys)} images stored in {time.perf_counter() - started:.1f}s")
+
+    started = time.perf_counter()
+    references: Counter = Counter()
+    async with engine.begin() as conn:
+        await conn.execute(text("TRUNCATE paintings, tags, mediafiles RESTART IDENTITY CASCADE"))
+        rows = []
+        for row in make_paintings(rng, paintings, image_keys):
+            references.update(row["photo_filenames"])
+            rows.append(row)
+            if len(rows) == INSERT_BATCH:
+                await conn.execute(insert(Painting), rows)
+                rows = []
+        if rows:
+            await conn.execute(insert(Painting), rows)
+        await conn.execute(SEED_TAGS_SQL)
+        await conn.execute(insert(MediaFile), [
+            {"storage_key": key, "ref_count": count} for key, count in sorted(references.items())
+        ])
+
+        stmt = pg_insert(User).values(
+            username=admin_username, hashed_password=get_password_hash(admin_password), is_superuser=True,
+        )
+        await conn.execute(stmt.on_conflict_do_update(
+            index_elements=[User.username],
+            set_={"hashed_password": stmt.excluded.hashed_password, "is_superuser": True},
+        ))
+    async with engine.begin() as conn:
+        for table in ("paintings", "tags", "mediafiles"):
+            await conn.execute(text(f"ANALYZE {table}"))
+    print(f"{paintings} paintings inserted in {time.perf_counter() - started:.1f}s")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Seed a synthetic painting catalog.")
+    parser.add_argument("--database-url", required=True, help="Separate database, it will be truncated.")
+    parser.add_argument("--paintings", type=int, default=10_000)
+    parser.add_argument("--images", type=int, default=100, help="Distinct image files shared by paintings.")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--admin-username", default="bench-admin")
+    parser.add_argument("--admin-password", default="bench-password")
+    args = parser.parse_args()
+
+    engine = make_engine(args.database_url)
+    try:
+        await seed(
+            engine, paintings=args.paintings, image_count=args.images, seed_value=args.seed,
+            admin_username=args.admin_username, admin_password=args.admin_password,
+        )
+    finally:
+        await engine.dispose()
+        images.shutdown_pool()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,78 @@
+import asyncio
+import argparse
+import sys
+from pathlib import Path
+from dotenv import load_dotenv
+
+# путь к корню проекта (родитель папки scripts)
+project_root = Path(__file__).parent.parent
+load_dotenv(project_root / ".env")
+sys.path.append(str(project_root))
+
+# --- Основные импорты из нашего приложения ---
+from app.db.session import SessionLocal  # Наша фабрика асинхронных сессий
+from app.models.painting import Painting  # Модель картины
+from app.services.images import ImageProcessingError, shutdown_pool
+from app.services.storage import storage
+from app.services.uploads import rebuild_variants, variant_keys
+from sqlalchemy import select
+
+
+async def main():
+    """
+    Строит производные изображения (миниатюры и т.д.) для уже загруженных фото.
+    Картины обходятся пачками по id. Фото, у которых производные уже есть,
+    пропускаются, если не передан --force. Работает с любым хранилищем:
+    оригинал скачивается во временный каталог, производные кладутся обратно.
+    """
+    parser = argparse.ArgumentParser(description="Generate image variants for existing paintings.")
+    parser.add_argument("--batch-size", type=int, default=100, help="Paintings per batch.")
+    parser.add_argument("--force", action="store_true", help="Regenerate existing variants.")
+    args = parser.parse_args()
+
+    last_id = 0
+    processed = written = failed = 0
+    try:
+        while True:
+            # 1. Берем очередную пачку картин (keyset по id, без OFFSET)
+            async with SessionLocal() as db:
+                result = await db.execute(
+                    select(Painting.id, Painting.photo_filenames)
+                    .filter(Painting.id > last_id)
+                    .order_by(Painting.id)
+                    .limit(args.batch_size)
+                )
+                rows = result.all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+
+            # 2. Строим производные для всех фото пачки
+            for painting_id, keys in rows:
+                for key in keys:
+                    if not await storage.exists(key):
+                        print(f"Painting {painting_id}: file {key} is missing")
+                        failed += 1
+                        continue
+                    if not args.force:
+                        found = await asyncio.gather(*(storage.exists(k) for k in variant_keys(key)))
+                        if all(found):
+                            continue
+                    try:
+                        await rebuild_variants(key)
+                        written += len(variant_keys(key))
+                    except ImageProcessingError as e:
+                        failed += 1
+                        print(f"Painting {painting_id}: {e}")
+                processed += 1
+
+            print(f"Processed {processed} paintings (last id {last_id}), {written} files written...")
+    finally:
+        shutdown_pool()
+
+    print(f"Done: {processed} paintings, {written} variant files written, {failed} failed.")
+
+
+# Стандартная точка входа для запуска асинхронной функции 'main'
+if __name__ == "__main__":
+    asyncio.run(main())
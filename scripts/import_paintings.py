@@ -0,0 +1,342 @@
+import asyncio
+import argparse
+import csv
+import hashlib
+import json
+import os
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple
+from dotenv import load_dotenv
+
+# путь к корню проекта (родитель папки scripts)
+project_root = Path(__file__).parent.parent
+load_dotenv(project_root / ".env")
+sys.path.append(str(project_root))
+
+# --- Основные импорты из нашего приложения ---
+from app import crud
+from app.db.session import SessionLocal  # Наша фабрика асинхронных сессий
+from app.schemas.painting import PaintingCreate
+from app.services.catalog_export import CSV_FILES_SEPARATOR, CSV_TAGS_SEPARATOR, split_list
+from app.services.images import ImageProcessingError, shutdown_pool
+from app.services.uploads import UploadBatchError, UploadTooLargeError, release_uploads, save_uploads
+from fastapi import UploadFile
+from pydantic import ValidationError
+
+# Граница Numeric(10, 2) для width и height
+MAX_DIMENSION = 10 ** 8
+
+
+class RowError(Exception):
+    """Строку файла нельзя импортировать."""
+
+
+@dataclass
+class SourceRow:
+    """Проверенная строка файла; изображения — пути к файлам на диске."""
+    row_no: int
+    title: str
+    width: float
+    height: float
+    tags: List[str]
+    description: str
+    images: List[str]
+
+
+@dataclass
+class PreparedChunk:
+    """
+    Пачка строк с уже сохраненными изображениями, готовая к записи в БД.
+    `pinned` — ключи, закрепленные при сохранении, по одному на файл.
+    """
+    rows: int
+    paintings: List[PaintingCreate] = field(default_factory=list)
+    errors: List[Tuple[int, str]] = field(default_factory=list)
+    pinned: List[str] = field(default_factory=list)
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(1024 * 1024):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def read_records(path: Path) -> Iterator[dict]:
+    """
+    Строки исходного файла как словари. CSV — с заголовком, списки строкой:
+    теги через запятую, изображения через ";". JSONL — объект на строку,
+    списки массивами или такой же строкой. Изображения берутся из колонки
+    images или photo_filenames (так их называет выгрузка каталога).
+    """
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        if path.suffix.lower() == ".csv":
+            yield from csv.DictReader(f)
+            return
+        for line_no, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                # Сломанная строка не должна сдвигать нумерацию остальных
+                yield {"__error__": f"line {line_no}: invalid JSON: {e}"}
+
+
+def _as_list(value, separator: str) -> List[str]:
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return split_list(value, separator)
+    if isinstance(value, list) and all(isinstance(item, str) for item in value):
+        return [item.strip() for item in value if item.strip()]
+    raise RowError(f"expected a list of strings or a '{separator}'-separated string, got {value!r}")
+
+
+def parse_record(row_no: int, record: dict, images_dir: Path) -> SourceRow:
+    """Проверяет строку теми же правилами, что и создание картины через API."""
+    if "__error__" in record:
+        raise RowError(record["__error__"])
+    images = _as_list(record.get("images", record.get("photo_filenames")), CSV_FILES_SEPARATOR)
+    try:
+        painting = PaintingCreate(
+            title=(record.get("title") or "").strip(),
+            width=record.get("width"),
+            height=record.get("height"),
+            tags=_as_list(record.get("tags"), CSV_TAGS_SEPARATOR),
+            description=record.get("description") or "",
+            photo_filenames=images,
+        )
+    except ValidationError as e:
+        raise RowError("; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors()))
+
+    if not painting.title or len(painting.title) > 255:
+        raise RowError("title must be 1-255 characters long")
+    for name in ("width", "height"):
+        if not 0 < getattr(painting, name) < MAX_DIMENSION:
+            raise RowError(f"{name} must be positive and less than {MAX_DIMENSION}")
+    if not images:
+        raise RowError("no images")
+
+    paths = []
+    root = images_dir.resolve()
+    for name in images:
+        path = (root / name).resolve()
+        if not path.is_relative_to(root):
+            raise RowError(f"image {name} is outside of --images-dir")
+        if not path.is_file():
+            raise RowError(f"image {name} not found")
+        paths.append(str(path))
+    return SourceRow(
+        row_no=row_no, title=painting.title, width=painting.width, height=painting.height,
+        tags=painting.tags, description=painting.description, images=paths,
+    )
+
+
+def scan(path: Path, images_dir: Path) -> Tuple[int, List[Tuple[int, str]]]:
+    """Первый проход: число строк и ошибки проверки, до какой-либо записи."""
+    total = 0
+    errors = []
+    for total, record in enumerate(read_records(path), start=1):
+        try:
+            parse_record(total, record, images_dir)
+        except RowError as e:
+            errors.append((total, str(e)))
+    return total, errors
+
+
+def iter_chunks(path: Path, images_dir: Path, *, skip: int, size: int) -> Iterator[List[object]]:
+    """Пачки по `size` строк после первых `skip`: SourceRow или (номер, ошибка)."""
+    chunk: List[object] = []
+    for row_no, record in enumerate(read_records(path), start=1):
+        if row_no <= skip:
+            continue
+        try:
+            chunk.append(parse_record(row_no, record, images_dir))
+        except RowError as e:
+            chunk.append((row_no, str(e)))
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _upload(path: str) -> UploadFile:
+    return UploadFile(open(path, "rb"), filename=os.path.basename(path))
+
+
+async def _save_batch(paths: List[str]) -> Tuple[Dict[str, str], Dict[str, str]]:
+    """
+    Сохраняет файлы обычным путем загрузки (хэш, дедупликация, производные).
+    Если пачка не прошла, файлы сохраняются по одному, чтобы найти виноватый.
+    Возвращает ключи сохраненных файлов и ошибки остальных.
+    """
+    try:
+        return dict(zip(paths, await save_uploads([_upload(path) for path in paths]))), {}
+    except UploadBatchError as e:
+        if len(paths) == 1:
+            if not isinstance(e.error, (UploadTooLargeError, ImageProcessingError)):
+                raise e.error
+            return {}, {paths[0]: str(e)}
+    keys, errors = {}, {}
+    for path in paths:
+        path_keys, path_errors = await _save_batch([path])
+        keys.update(path_keys)
+        errors.update(path_errors)
+    return keys, errors
+
+
+async def ingest_images(paths: List[str], *, batch_size: int, parallel: int) -> Tuple[Dict[str, str], Dict[str, str]]:
+    """
+    Сохраняет изображения пачками, до `parallel` пачек одновременно.
+    Одинаковые файлы хранятся по хэшу содержимого, поэтому повторный
+    запуск после сбоя заново только считает хэши уже сохраненных файлов.
+    """
+    unique = list(dict.fromkeys(paths))
+    semaphore = asyncio.Semaphore(parallel)
+
+    async def run(batch: List[str]):
+        async with semaphore:
+            return await _save_batch(batch)
+
+    results = await asyncio.gather(*(
+        run(unique[start:start + batch_size]) for start in range(0, len(unique), batch_size)
+    ))
+    keys, errors = {}, {}
+    for batch_keys, batch_errors in results:
+        keys.update(batch_keys)
+        errors.update(batch_errors)
+    return keys, errors
+
+
+async def prepare_chunk(chunk: List[object], *, image_batch: int, parallel: int) -> PreparedChunk:
+    """Сохраняет изображения пачки и собирает картины для вставки."""
+    prepared = PreparedChunk(rows=len(chunk))
+    rows = [item for item in chunk if isinstance(item, SourceRow)]
+    prepared.errors = [item for item in chunk if not isinstance(item, SourceRow)]
+    keys, image_errors = await ingest_images(
+        [path for row in rows for path in row.images], batch_size=image_batch, parallel=parallel
+    )
+    prepared.pinned = list(keys.values())
+    for row in rows:
+        failed = [path for path in row.images if path in image_errors]
+        if failed:
+            prepared.errors.append((row.row_no, image_errors[failed[0]]))
+            continue
+        prepared.paintings.append(PaintingCreate(
+            title=row.title, width=row.width, height=row.height, tags=row.tags,
+            description=row.description, photo_filenames=[keys[path] for path in row.images],
+        ))
+    return prepared
+
+
+def _format_eta(seconds: float) -> str:
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:d}:{minutes:02d}:{seconds:02d}"
+
+
+async def main():
+    """
+    Массовый импорт картин из CSV или JSONL и каталога с изображениями.
+
+    Обязательные поля строки: title, width, height, images (пути относительно
+    --images-dir); необязательные: tags, description. Сначала файл целиком
+    проверяется, и при ошибках ничего не записывается (или такие строки
+    пропускаются с --skip-invalid). Затем пачками по --chunk-size строк:
+    изображения параллельно сохраняются обычным путем загрузки, картины
+    вставляются через COPY во временную таблицу, а прогресс фиксируется
+    в той же транзакции. Пока пачка пишется в БД, готовятся изображения
+    следующей. Повторный запуск с тем же файлом продолжает с места остановки.
+    Работающее приложение увидит новые картины после истечения TTL кэша каталога.
+    """
+    parser = argparse.ArgumentParser(description="Bulk import paintings from CSV/JSONL.")
+    parser.add_argument("file", type=Path, help="CSV with a header row or JSONL.")
+    parser.add_argument("--images-dir", type=Path, help="Base directory of image paths (default: next to the file).")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Rows per transaction.")
+    parser.add_argument("--image-batch", type=int, default=8, help="Images per save batch.")
+    parser.add_argument("--parallel", type=int, default=4, help="Image batches saved concurrently.")
+    parser.add_argument("--skip-invalid", action="store_true", help="Skip invalid rows instead of aborting.")
+    parser.add_argument("--restart", action="store_true", help="Forget progress and import the file again.")
+    args = parser.parse_args()
+
+    images_dir = args.images_dir or args.file.parent
+
+    # 1. Проверяем файл целиком, пока ничего не записано
+    total, errors = scan(args.file, images_dir)
+    for row_no, error in errors[:50]:
+        print(f"Row {row_no}: {error}")
+    if len(errors) > 50:
+        print(f"... and {len(errors) - 50} more invalid rows")
+    if errors and not args.skip_invalid:
+        print(f"{len(errors)} of {total} rows are invalid, nothing imported. Fix them or pass --skip-invalid.")
+        sys.exit(1)
+
+    # 2. Импорт этого файла узнается по хэшу содержимого
+    async with SessionLocal() as db:
+        job = await crud.catalog_import.start(
+            db, source_sha256=file_sha256(args.file), source_name=args.file.name,
+            total_rows=total, restart=args.restart,
+        )
+    if job.finished_at is not None:
+        print(f"{args.file.name} was already imported ({job.paintings_created} paintings). Use --restart to repeat.")
+        return
+    if job.rows_done:
+        print(f"Resuming after row {job.rows_done} of {total}")
+
+    # 3. Пачки: изображения следующей пачки готовятся, пока текущая пишется в БД
+    options = dict(image_batch=args.image_batch, parallel=args.parallel)
+    chunks = iter_chunks(args.file, images_dir, skip=job.rows_done, size=args.chunk_size)
+    done, created, skipped = job.rows_done, job.paintings_created, job.rows_skipped
+    started, done_at_start = time.monotonic(), done
+    first = next(chunks, None)
+    pending = asyncio.create_task(prepare_chunk(first, **options)) if first else None
+    try:
+        while pending is not None:
+            prepared = await pending
+            following = next(chunks, None)
+            pending = asyncio.create_task(prepare_chunk(following, **options)) if following else None
+
+            async with SessionLocal() as db:
+                try:
+                    inserted = await crud.painting.bulk_create(db, prepared.paintings)
+                    await crud.catalog_import.advance(
+                        db, id=job.id, rows=prepared.rows, skipped=len(prepared.errors), created=inserted
+                    )
+                    await db.commit()
+                finally:
+                    # После коммита файлы держат ссылки картин; изображения
+                    # пропущенных строк (или всей пачки при ошибке) освобождаются
+                    await db.rollback()
+                    await release_uploads(db, unpin=prepared.pinned)
+
+            for row_no, error in sorted(prepared.errors):
+                print(f"Row {row_no} skipped: {error}")
+            done += prepared.rows
+            created += inserted
+            skipped += len(prepared.errors)
+            rate = (done - done_at_start) / max(time.monotonic() - started, 1e-9)
+            eta = _format_eta((total - done) / rate) if rate else "-"
+            print(
+                f"{done}/{total} rows ({done / total:.1%}), {created} created, {skipped} skipped, "
+                f"{rate:.0f} rows/s, ETA {eta}",
+                flush=True,
+            )
+    finally:
+        if pending is not None:
+            pending.cancel()
+        shutdown_pool()
+
+    async with SessionLocal() as db:
+        await crud.catalog_import.finish(db, id=job.id)
+    print(f"Done: {created} paintings created, {skipped} rows skipped.")
+
+
+# Стандартная точка входа для запуска асинхронной функции 'main'
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,33 @@
+import asyncio
+import logging
+import sys
+from pathlib import Path
+from dotenv import load_dotenv
+
+# путь к корню проекта (родитель папки scripts)
+project_root = Path(__file__).parent.parent
+load_dotenv(project_root / ".env")
+sys.path.append(str(project_root))
+
+# --- Основные импорты из нашего приложения ---
+from app.services.notification_service import notification_dispatcher
+
+
+async def main():
+    """
+    Запускает диспетчер уведомлений отдельным процессом.
+    Нужен, если в воркерах API он выключен (NOTIFICATION_DISPATCHER_ENABLED=false),
+    например чтобы лимит сообщений Telegram соблюдался одним процессом,
+    а не каждым воркером по отдельности. Несколько копий скрипта
+    безопасны: строки outbox разбираются через SKIP LOCKED.
+    """
+    logging.basicConfig(level=logging.INFO)
+    try:
+        await notification_dispatcher.run()
+    finally:
+        await notification_dispatcher.stop()
+
+
+# Стандартная точка входа для запуска асинхронной функции 'main'
+if __name__ == "__main__":
+    asyncio.run(main())
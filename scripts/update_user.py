@@ -0,0 +1,54 @@
+import asyncio
+import argparse
+import sys
+from pathlib import Path
+from dotenv import load_dotenv
+
+# путь к корню проекта (родитель папки scripts)
+project_root = Path(__file__).parent.parent
+load_dotenv(project_root / ".env")
+sys.path.append(str(project_root))
+
+# --- Основные импорты из нашего приложения ---
+from app.db.session import SessionLocal  # Наша фабрика асинхронных сессий
+from app.crud import user as crud_user
+
+
+async def main():
+    """
+    Меняет пароль или права пользователя либо просто отзывает его токены.
+    Любое из действий увеличивает версию токенов: уже выданные токены
+    перестают приниматься (работающими воркерами — не позже AUTH_CACHE_TTL_SECONDS).
+    """
+    parser = argparse.ArgumentParser(description="Update a user and revoke their tokens.")
+    parser.add_argument("--username", type=str, required=True)
+    parser.add_argument("--password", type=str, help="Set a new password.")
+    parser.add_argument("--superuser", dest="superuser", action="store_true", default=None, help="Grant superuser.")
+    parser.add_argument("--no-superuser", dest="superuser", action="store_false", help="Revoke superuser.")
+    parser.add_argument("--revoke", action="store_true", help="Only revoke issued tokens.")
+    args = parser.parse_args()
+
+    async with SessionLocal() as db:
+        db_user = await crud_user.get_by_username(db, username=args.username)
+        if db_user is None:
+            print(f"Error: User '{args.username}' not found.")
+            return
+        user_id = db_user.id
+
+        if args.password:
+            await crud_user.set_password(db, user_id=user_id, password=args.password)
+            print("Password changed.")
+        if args.superuser is not None:
+            await crud_user.set_superuser(db, user_id=user_id, is_superuser=args.superuser)
+            print(f"Superuser: {args.superuser}.")
+        if args.revoke:
+            await crud_user.revoke_tokens(db, user_id=user_id)
+        if args.password or args.superuser is not None or args.revoke:
+            print(f"Tokens of '{args.username}' revoked.")
+        else:
+            print("Nothing to do.")
+
+
+# Стандартная точка входа для запуска асинхронной функции 'main'
+if __name__ == "__main__":
+    asyncio.run(main())